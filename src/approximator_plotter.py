@@ -1,21 +1,16 @@
 import enum
 from cartography.approximator import equidistant_approximation
 import matplotlib.pyplot as plt
+import numpy as np
 
 def jump_function(t):
     sq_t = (t+4)*(t+4)
-    if t < 0.5:
-        return (t, sq_t)
-    if t < 0.75:
-        return (t , sq_t + 4)
-    return (t , sq_t + 20)
+    return (t, sq_t + np.select([t < 0.5, t < 0.75], [0, 4], 20))
 
 
 def jump_parabola(t: float):
     scaled_t = 10*t
-    if t < 0.5:
-        return (scaled_t, scaled_t*scaled_t)
-    return (scaled_t, scaled_t*scaled_t+10)
+    return (scaled_t, scaled_t*scaled_t + np.where(t < 0.5, 0, 10))
         
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+"""
+Benchmarks for the projections, the approximators and complete runs of the extensions.
+All workloads are generated synthetically, so the benchmarks run offline and are reproducible.
+
+Run them from the src directory:
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+"""
@@ -0,0 +1,40 @@
+from argparse import ArgumentParser
+import sys
+from benchmarks.results import REGRESSION_THRESHOLD, compare_results, get_regressions, load_results, save_results
+from benchmarks.suite import run_benchmarks
+
+def main(arguments=None) -> int:
+    parser = ArgumentParser(prog="python -m benchmarks", description="Benchmarks of the projections, approximators and extensions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and store the results as JSON")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="The JSON file for the results")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Number of measurements of every benchmark")
+    run_parser.add_argument("--quick", action="store_true", help="Use smaller workloads")
+    run_parser.add_argument("--select", default=None, help="Only run benchmarks whose name contains this text")
+
+    compare_parser = commands.add_parser("compare", help="Compare results against a baseline, the exit code is 1 if any benchmark regressed")
+    compare_parser.add_argument("baseline", help="The JSON file of the baseline")
+    compare_parser.add_argument("current", help="The JSON file of the current results")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Benchmarks slower by more than this factor are regressions")
+
+    options = parser.parse_args(arguments)
+    if options.command == "run":
+        results = run_benchmarks(options.repeat, options.quick, options.select, print)
+        save_results(options.output, results)
+        return 0
+
+    baseline = load_results(options.baseline)
+    current = load_results(options.current)
+    comparisons = compare_results(baseline, current)
+    regressions = get_regressions(comparisons, options.threshold)
+    for name, baseline_time, current_time, ratio in comparisons:
+        flag = "REGRESSION" if ratio > options.threshold else ""
+        print(f"{name:<70} {baseline_time*1000:10.3f} ms {current_time*1000:10.3f} ms {ratio:6.2f}x {flag}")
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f"{name:<70} missing in the current results")
+    print(f"{len(regressions)} of {len(comparisons)} benchmarks regressed by more than {options.threshold:.2f}x")
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+import json
+import platform
+import numpy as np
+
+"""
+Benchmark results are stored as JSON:
+    {"metadata": {...}, "results": {name: {"best": seconds, "median": seconds, "repeat": count}}}
+"""
+
+# A benchmark regressed if its time grew by more than this factor
+REGRESSION_THRESHOLD = 1.2
+
+Comparison = Tuple[str, float, float, float]
+
+def save_results(file_name: str, results: Dict[str, Dict[str, float]]):
+    metadata = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+    with open(file_name, "w") as file:
+        json.dump({"metadata": metadata, "results": results}, file, indent=2, sort_keys=True)
+
+def load_results(file_name: str) -> Dict[str, Dict[str, float]]:
+    with open(file_name) as file:
+        return json.load(file)["results"]
+
+def compare_results(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]], key="best") -> List[Comparison]:
+    """
+    Compares all benchmarks contained in both results.
+    Returns (name, baseline time, current time, ratio) for every benchmark, the ratio is current / baseline.
+    The best time is compared by default since it is the least affected by other processes.
+    """
+    comparisons = []
+    for name in sorted(baseline.keys() & current.keys()):
+        baseline_time = baseline[name][key]
+        current_time = current[name][key]
+        comparisons.append((name, baseline_time, current_time, current_time / baseline_time))
+    return comparisons
+
+def get_regressions(comparisons: List[Comparison], threshold=REGRESSION_THRESHOLD) -> List[Comparison]:
+    return [comparison for comparison in comparisons if comparison[3] > threshold]
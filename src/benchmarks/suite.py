@@ -0,0 +1,119 @@
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+import os
+import numpy as np
+from cartography.approximator import get_adaptive_batch_approximator, get_equidistant_batch_approximator
+from cartography.projection import Projection
+from cartography.projection_builder import ProjectionBuilder
+from cartography.projection_types import Pole, Transformation
+from cartography.transformations.map_transformation import *
+from benchmarks.workloads import get_coastline_paths, get_country_paths, get_document, get_graticule_paths, get_small_paths
+
+"""
+A benchmark consists of a setup, which is not timed, and a run, which is timed.
+The setup is repeated for every measurement, so caches (e.g. of the Mollweide projection)
+do not carry over from one measurement to the next.
+"""
+
+WIDTH = 400.0
+HEIGHT = 200.0
+
+# Every projection factory of map_transformation.py with typical arguments
+PROJECTION_FACTORIES = {
+    "get_mercator_projection": lambda: get_mercator_projection(WIDTH, HEIGHT, 0.0, 1.53),
+    "get_winkel_tripel_projection": lambda: get_winkel_tripel_projection(WIDTH, HEIGHT, 0.880689235),
+    "get_robinson_projection": lambda: get_robinson_projection(WIDTH, HEIGHT, 0.0),
+    "get_mollweide_projection": lambda: get_mollweide_projection(WIDTH, HEIGHT, 0.0, 0.0001),
+    "get_cylindrical_equal_area_projection": lambda: get_cylindrical_equal_area_projection(WIDTH, HEIGHT, 0.0, 0.5),
+    "get_peirce_quincuncial_projection": lambda: get_peirce_quincuncial_projection(WIDTH, HEIGHT, 0.0),
+    "get_equidistant_conic_projection": lambda: get_equidistant_conic_projection(WIDTH, HEIGHT, 0.0, 0.5, 0.3, 0.9),
+    "get_orthographic_projection": lambda: get_orthographic_projection(WIDTH, HEIGHT, (0.2, -0.7)),
+    "get_stereographic_projection": lambda: get_stereographic_projection(WIDTH, HEIGHT, 0.63, Pole.NORTHPOLE),
+    "get_lambert_azimuthal_equal_area_projection": lambda: get_lambert_azimuthal_equal_area_projection(WIDTH, HEIGHT, Pole.NORTHPOLE),
+}
+
+Benchmark = Tuple[str, Callable[[], object], Callable[[object], None]]
+
+def get_benchmarks(quick=False) -> List[Benchmark]:
+    """
+    Returns all benchmarks as (name, setup, run) triples. Quick benchmarks use smaller workloads.
+    """
+    scale = 0.1 if quick else 1.0
+    benchmarks = []
+
+    random = np.random.default_rng(0)
+    point_count = int(100000 * scale)
+    longitudes = random.uniform(-np.pi, np.pi, point_count)
+    latitudes = random.uniform(-np.pi/2, np.pi/2, point_count)
+    scalar_count = int(1000 * scale)
+    for name, factory in PROJECTION_FACTORIES.items():
+        benchmarks.append((f"projection/{name}/array", factory, lambda transformation: transformation(longitudes, latitudes)))
+        benchmarks.append((f"projection/{name}/scalar", factory, lambda transformation: _project_points(transformation, longitudes[:scalar_count], latitudes[:scalar_count])))
+
+    workloads = {
+        "graticule": get_graticule_paths(WIDTH, HEIGHT, 10.0 / max(scale, 0.5)),
+        "coastlines": get_coastline_paths(WIDTH, HEIGHT, int(50 * scale), 40),
+        "small_paths": get_small_paths(WIDTH, HEIGHT, int(2000 * scale)),
+        "countries": get_country_paths(WIDTH, HEIGHT, int(40 * scale) + 2, int(20 * scale) + 1),
+    }
+    approximators = {
+        "equidistant": lambda: get_equidistant_batch_approximator(0.1, 35, 1, 0.0, 4),
+        "nested": lambda: get_equidistant_batch_approximator(0.1, 35, 1, 0.0, 4, incremental=True),
+        "adaptive": lambda: get_adaptive_batch_approximator(0.1, 10),
+    }
+    coastline_projection = _build_projection()
+    batch = coastline_projection.gather_paths(workloads["coastlines"], ["coastline"] * len(workloads["coastlines"])).batch
+    def projected_batch(segment_indices: np.ndarray, t_values: np.ndarray):
+        return coastline_projection.kernel(*batch(segment_indices, t_values))
+    for name, factory in approximators.items():
+        benchmarks.append((f"approximator/{name}", factory, lambda approximator: approximator(projected_batch, len(batch))))
+
+    for name, paths in workloads.items():
+        labels = [name] * len(paths)
+        benchmarks.append((f"transform_paths/{name}", _build_projection, lambda projection, paths=paths, labels=labels: projection.transform_paths(paths, labels)))
+
+    document = get_document(workloads["coastlines"] + workloads["small_paths"], WIDTH, HEIGHT)
+    benchmarks.append(("effect/robinson", lambda: document, _run_effect))
+    return benchmarks
+
+def run_benchmarks(repeat=5, quick=False, selection: str = None, logger: Callable[[str], None] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Runs all benchmarks whose name contains the selection and returns the best and the median time of every benchmark.
+    """
+    results = {}
+    for name, setup, run in get_benchmarks(quick):
+        if selection is not None and selection not in name:
+            continue
+        times = []
+        for _ in range(repeat):
+            subject = setup()
+            start = perf_counter()
+            run(subject)
+            times.append(perf_counter() - start)
+        results[name] = {"best": min(times), "median": float(np.median(times)), "repeat": repeat}
+        if logger is not None:
+            logger(f"{name:<70} {results[name]['median']*1000:10.3f} ms")
+    return results
+
+def _project_points(transformation: Transformation, longitudes: np.ndarray, latitudes: np.ndarray):
+    for longitude, latitude in zip(longitudes.tolist(), latitudes.tolist()):
+        transformation(longitude, latitude)
+
+def _build_projection() -> Projection:
+    return ProjectionBuilder()\
+        .from_equirectangular(WIDTH, HEIGHT)\
+        .to_robinson(WIDTH, HEIGHT, 0.0)\
+        .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+        .build()
+
+def _run_effect(document: str):
+    # Imported here since the extensions are modules next to the cartography package
+    from robinson_extension import ApplyRobinsonEffect
+    with TemporaryDirectory() as directory:
+        file_name = os.path.join(directory, "map.svg")
+        with open(file_name, "w") as file:
+            file.write(document)
+        arguments = ["--id=map", "--precision=0.1", "--maximal_resolution=35", "--increment=1", "--z_limit=0.0", "--z_fill=4", file_name]
+        ApplyRobinsonEffect().run(arguments, output=BytesIO())
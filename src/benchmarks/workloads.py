@@ -0,0 +1,106 @@
+from typing import List
+from inkex.paths import Path
+import numpy as np
+
+"""
+Synthetic workloads in equirectangular coordinates of a map with the given width and height.
+"""
+
+def get_graticule_paths(width: float, height: float, step: float = 10.0) -> List[Path]:
+    """
+    Returns the meridians and parallels every step degrees as straight lines.
+    """
+    paths = []
+    for longitude in np.arange(-180.0, 180.0 + step / 2, step):
+        x = (longitude + 180.0) / 360.0 * width
+        paths.append(Path(f"M {x} 0 L {x} {height}"))
+    for latitude in np.arange(-90.0, 90.0 + step / 2, step):
+        y = (90.0 - latitude) / 180.0 * height
+        paths.append(Path(f"M 0 {y} L {width} {y}"))
+    return paths
+
+def get_coastline_paths(width: float, height: float, count: int, segments: int, seed: int = 0) -> List[Path]:
+    """
+    Returns closed random walks of smooth cubic Bézier curves, which look roughly like coastlines.
+    """
+    random = np.random.default_rng(seed)
+    paths = []
+    for _ in range(count):
+        center = random.uniform((0.1 * width, 0.1 * height), (0.9 * width, 0.9 * height))
+        angles = np.sort(random.uniform(0, 2 * np.pi, segments))
+        radii = random.uniform(0.02, 0.1, segments) * width
+        points = center + np.column_stack((np.cos(angles), np.sin(angles))) * radii[:, np.newaxis]
+        # The control points continue the direction of the previous control point, so the curve is smooth
+        tangents = (np.roll(points, -1, axis=0) - np.roll(points, 1, axis=0)) / 6
+        commands = [f"M {points[0][0]} {points[0][1]}"]
+        for i in range(segments):
+            j = (i + 1) % segments
+            control_a = points[i] + tangents[i]
+            control_b = points[j] - tangents[j]
+            commands.append(f"C {control_a[0]} {control_a[1]} {control_b[0]} {control_b[1]} {points[j][0]} {points[j][1]}")
+        commands.append("Z")
+        paths.append(Path(" ".join(commands)))
+    return paths
+
+def get_country_paths(width: float, height: float, columns: int, rows: int, seed: int = 0) -> List[Path]:
+    """
+    Returns a grid of neighbouring "countries" with curved borders. Every inner border is part of two paths,
+    drawn in opposite directions like in political maps.
+    """
+    random = np.random.default_rng(seed)
+    x_values = np.linspace(0, width, columns + 1)
+    y_values = np.linspace(0, height, rows + 1)
+    # Control points of the horizontal and vertical borders, shared by the countries on both sides
+    horizontal = random.uniform(-0.3, 0.3, (rows + 1, columns, 2)) * (height / rows)
+    vertical = random.uniform(-0.3, 0.3, (rows, columns + 1, 2)) * (width / columns)
+    def border(start, end, offsets, horizontal_border: bool):
+        (x0, y0), (x1, y1) = start, end
+        if horizontal_border:
+            controls = ((2*x0 + x1) / 3, y0 + offsets[0]), ((x0 + 2*x1) / 3, y0 + offsets[1])
+        else:
+            controls = (x0 + offsets[0], (2*y0 + y1) / 3), (x0 + offsets[1], (y0 + 2*y1) / 3)
+        return controls, end
+
+    paths = []
+    for row in range(rows):
+        for column in range(columns):
+            corners = [(x_values[column], y_values[row]), (x_values[column+1], y_values[row]),
+                (x_values[column+1], y_values[row+1]), (x_values[column], y_values[row+1])]
+            top = border(corners[0], corners[1], horizontal[row, column], True)
+            right = border(corners[1], corners[2], vertical[row, column+1], False)
+            # The bottom and left borders are the top and right borders of the neighbours in reverse
+            (bottom_a, bottom_b), _ = border(corners[3], corners[2], horizontal[row+1, column], True)
+            (left_a, left_b), _ = border(corners[0], corners[3], vertical[row, column], False)
+            commands = [f"M {corners[0][0]} {corners[0][1]}"]
+            for (control_a, control_b), end in (top, right, ((bottom_b, bottom_a), corners[3]), ((left_b, left_a), corners[0])):
+                commands.append(f"C {control_a[0]} {control_a[1]} {control_b[0]} {control_b[1]} {end[0]} {end[1]}")
+            commands.append("Z")
+            paths.append(Path(" ".join(commands)))
+    return paths
+
+def get_small_paths(width: float, height: float, count: int, seed: int = 0) -> List[Path]:
+    """
+    Returns many small paths (markers, labels, rivers) with a few lines or curves each.
+    """
+    random = np.random.default_rng(seed)
+    paths = []
+    for x, y in random.uniform((0, 0), (width, height), (count, 2)):
+        dx, dy = random.uniform(-0.01, 0.01, 2) * width
+        if random.uniform() < 0.5:
+            paths.append(Path(f"M {x} {y} l {dx} {dy} l {dy} {-dx} z"))
+        else:
+            paths.append(Path(f"M {x} {y} q {dx} {dy} {2*dx} 0 t {2*dx} {dy}"))
+    return paths
+
+def get_document(paths: List[Path], width: float, height: float) -> str:
+    """
+    Returns an SVG document with all paths in a single group with the id "map".
+    """
+    elements = "\n".join(f'    <path id="path{i}" d="{path}" style="fill:none;stroke:#000000"/>' for i, path in enumerate(paths))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
+  <g id="map">
+{elements}
+  </g>
+</svg>
+"""
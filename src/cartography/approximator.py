@@ -1,162 +1,375 @@
-from typing import  List
-from cartography.projection_types import Approximator, Producer,Point
+from typing import  List, Tuple
+from cartography.projection_types import Approximator, BatchApproximator, BatchProducer, Producer, Point, Samples
 import numpy as np
 
+"""
+All approximators work on batches of segments: a BatchProducer maps an array of segment indices and an array of
+t values to the points of those segments. Every sampling step evaluates the points of all segments in a single call.
+The result of a batch approximation are Samples: the segment index, the t value and the point of every sample,
+ordered by segment and by t within a segment.
+The approximators for a single function are thin wrappers around the batch versions with a single segment.
+"""
 
 # Equidistant Approximation
 
-def get_equidistant_approximator(precision: float, maximal_resolution: int, increment: int, z_limit: float, z_fill: int) -> Approximator:
+def get_equidistant_approximator(precision: float, maximal_resolution: int, increment: int, z_limit: float, z_fill: int, incremental=False, z_bisection=False) -> Approximator:
     """
     Returns a preconfigured equidistant approximator with the given parameters for the intervall [0,1]
     """
     def approximator(function: Producer)-> List[Point]:
-        return equidistant_approximation(function, 0.0, 1.0, precision, increment, maximal_resolution, z_limit, z_fill)
+        return equidistant_approximation(function, 0.0, 1.0, precision, increment, maximal_resolution, z_limit, z_fill, incremental, z_bisection)
     return approximator
 
-def equidistant_approximation(function: Producer, lower_bound: float, upper_bound: float, precision: float, increment=1, maximal_resolution=35, z_limit=0.0, z_fill=4):
+def get_equidistant_batch_approximator(precision: float, maximal_resolution: int, increment: int, z_limit: float, z_fill: int, incremental=False, z_bisection=False) -> BatchApproximator:
+    """
+    Returns a preconfigured equidistant approximator with the given parameters for batches of segments over the intervall [0,1]
+    """
+    def approximator(function: BatchProducer, segment_count: int) -> Samples:
+        return equidistant_sampling(function, segment_count, 0.0, 1.0, precision, increment, maximal_resolution, z_limit, z_fill, incremental, z_bisection)
+    return approximator
+
+def equidistant_approximation(function: Producer, lower_bound: float, upper_bound: float, precision: float, increment=1, maximal_resolution=35, z_limit=0.0, z_fill=4, incremental=False, z_bisection=False):
     """
     Takes in a function and a lower and upper bound.
+    The function is evaluated for whole arrays of t values at once.
     It returns a list of points that are the results of evaluating the function between those bounds.
     If z_limit is <=0.0 it just uniformly samples points from the given interval until the picewise linear
     approximation differs lass then the provided precision from the given function. This is checked by
     sampling the midpoints between the sampled points.
     Additionally there is a maximal resolution determining the maximal number of points regardless of the precision.
     Should the z_limit be greater than 0.0 after this sample step we do an additional z filling step:
-    
+
     Here we take the distances between the sampled points and compute their z-score ( Sample  - Sample Mean ) / Sample Standard Diviation
     This gives us the samples "unusuallity" in units of standard diviation.
     Any jump between points that is unusual as determined by exceeding the z limit will cause a z-fill.
     A z-fill inserts additional points evenly spaced in the unusual gap. The number of points is determined by the z_fill parameter.
+    With z_bisection the gap is bisected down to the precision instead, which only adds points on both sides of the jump
+    (see z_bisection_sampling), z_fill is then ignored.
+
+    In incremental mode the increment is ignored. Instead the resolution is doubled and the checked
+    midpoints become the sampled points of the next level, so no point is ever evaluated twice (see nested_grid_sampling).
+    """
+    _, _, points = equidistant_sampling(_as_batch_producer(function), 1, lower_bound, upper_bound, precision, increment, maximal_resolution, z_limit, z_fill, incremental, z_bisection)
+    return points.tolist()
+
+def equidistant_sampling(function: BatchProducer, segment_count: int, lower_bound: float, upper_bound: float, precision: float, increment=1, maximal_resolution=35, z_limit=0.0, z_fill=4, incremental=False, z_bisection=False) -> Samples:
+    """
+    Batch version of the equidistant approximation, every segment is sampled independently.
+    """
+    if incremental:
+        samples = nested_grid_sampling(function, segment_count, lower_bound, upper_bound, precision, maximal_resolution)
+    else:
+        samples = uniform_sampling(function, segment_count, lower_bound, upper_bound, precision, increment, maximal_resolution)
+
+    if z_limit > 0.0 and z_bisection:
+        samples = z_bisection_sampling(function, samples, z_limit, precision)
+    elif z_limit > 0.0:
+        samples = z_fill_sampling(function, samples, z_limit, z_fill)
+    return samples
+
+def uniform_sampling(function: BatchProducer, segment_count: int, lower_bound: float, upper_bound: float, precision: float, increment=1, maximal_resolution=35) -> Samples:
+    """
+    Uniformly samples points from the given interval, increasing the resolution by the increment
+    until all midpoints of a segment are within the precision. Every level is sampled from scratch.
+    All segments that still need a higher resolution are sampled together.
     """
-    
     maximal_resolution = max(2, maximal_resolution)
     resolution = 2
     length = upper_bound - lower_bound
-    
-    found_imprecision = False
-    points = []
-
-    while resolution < maximal_resolution:
-        point_count = resolution - 1 
-        # Compute a list of evenly spaced points between the bounds
-        points = [function(lower_bound + length*(float(i)/point_count)) for i in range(point_count+1)]
+
+    # Segments that are not yet approximated within the precision
+    pending = np.arange(segment_count)
+    finished = []
+
+    while resolution < maximal_resolution and len(pending) > 0:
+        point_count = resolution - 1
+        # Compute evenly spaced points between the bounds
+        t_values = lower_bound + length*(np.arange(point_count+1)/point_count)
+        points = _evaluate_grid(function, pending, t_values)
         # Compute the midpoints between the evenly spaced points
-        mid_points = [function(lower_bound + length*(float(2*i+1)/(2*point_count))) for i in range(point_count)]
-        found_imprecision = False
-        for i in range(point_count):
-            # Check if any of those midpoints differs more than the acceptable margin from its linear approximation
-            mid_value = mid_points[i]
-            mid_approximation = np.add(np.array(points[i]), np.array(points[i+1])) / np.array(2)
-            error = np.linalg.norm(np.array(mid_value) - mid_approximation)
-            if error > precision:
-                # We found a midpoint that differs too much => We must increase the resolution
-                found_imprecision = True
-                break
-        if not found_imprecision:
-            # All midpoints are sufficently approximated
-            break
+        mid_points = _evaluate_grid(function, pending, lower_bound + length*((2*np.arange(point_count)+1)/(2*point_count)))
+        # If we found a midpoint that differs too much we must increase the resolution
+        found_imprecision = np.any(_midpoint_errors(points, mid_points) > precision, axis=1)
+        # All midpoints of the other segments are sufficently approximated
+        precise = ~found_imprecision
+        finished.append(_grid_samples(pending[precise], np.broadcast_to(t_values, points[precise].shape[:2]), points[precise]))
+        pending = pending[found_imprecision]
         resolution += increment
 
-    if found_imprecision:
+    if len(pending) > 0:
         # Even the closest approximation was not enough, we use the maximal resolution as a last resort
-        points = [function(lower_bound + length*(float(i)/(maximal_resolution-1))) for i in range(maximal_resolution)]
-
-    # Z Score Filling
-    # Uses the z-score https://en.wikipedia.org/wiki/Standard_score
-    # Find unusual jumps in the data that are potential discontinuities of the function
-    # then add additional points around these jumps to improve the quality around those jumps
-    if z_limit > 0.0 and len(points) > 1:
-        # Compute the pairwise distance between the sampled points
-        distances = np.linalg.norm(np.diff(points, axis=0), axis=1)
-        # Compute the mean and the standard deviation of those distances
-        mean = np.mean(distances)
-        std = np.std(distances)
-        if std == 0.0:
-            return points
+        t_values = lower_bound + length*(np.arange(maximal_resolution)/(maximal_resolution-1))
+        points = _evaluate_grid(function, pending, t_values)
+        finished.append(_grid_samples(pending, np.broadcast_to(t_values, points.shape[:2]), points))
+    return _merge_samples(finished)
+
+def nested_grid_sampling(function: BatchProducer, segment_count: int, lower_bound: float, upper_bound: float, precision: float, maximal_resolution=35) -> Samples:
+    """
+    Samples the interval on nested grids of 2, 3, 5, 9, 17, ... points.
+    The midpoints checked at one level are exactly the new points of the next level,
+    so every t value is evaluated at most once and reaching a resolution R costs about 2R evaluations.
+    Should the next level exceed the maximal resolution we keep the midpoints with the biggest errors
+    until the maximal resolution is reached.
+    All pending segments share the same level, so their samples are stored as (segments, points) grids.
+    """
+    maximal_resolution = max(2, maximal_resolution)
+    pending = np.arange(segment_count)
+    t_values = np.tile(np.array([lower_bound, upper_bound], dtype=float), (segment_count, 1))
+    points = _evaluate_grid(function, pending, t_values)
+    finished = []
+
+    while t_values.shape[1] < maximal_resolution and len(pending) > 0:
+        point_count = t_values.shape[1]
+        mid_t_values = (t_values[:, :-1] + t_values[:, 1:]) / 2
+        mid_points = _evaluate_grid(function, pending, mid_t_values)
+        errors = _midpoint_errors(points, mid_points)
+
+        # Segments where all midpoints are sufficently approximated are done
+        precise = ~np.any(errors > precision, axis=1)
+        finished.append(_grid_samples(pending[precise], t_values[precise], points[precise]))
+        pending = pending[~precise]
+        t_values, points = t_values[~precise], points[~precise]
+        mid_t_values, mid_points, errors = mid_t_values[~precise], mid_points[~precise], errors[~precise]
+
+        free_slots = maximal_resolution - point_count
+        if free_slots < point_count - 1:
+            # The next level is too big, as a last resort we only add the worst midpoints
+            # Sorting the selected indices keeps them in the order of their t values
+            selected = np.sort(np.argsort(-errors, axis=1, kind="stable")[:, :free_slots], axis=1)
+            mid_t_values = np.take_along_axis(mid_t_values, selected, axis=1)
+            mid_points = np.take_along_axis(mid_points, selected[:, :, np.newaxis], axis=1)
+            finished.append(_grid_samples(pending, np.concatenate((t_values, mid_t_values), axis=1), np.concatenate((points, mid_points), axis=1)))
+            return _merge_samples(finished)
+
+        # Interleave the points with the midpoints for the next level
+        t_values = _interleave(t_values, mid_t_values)
+        points = _interleave(points, mid_points)
+
+    finished.append(_grid_samples(pending, t_values, points))
+    return _merge_samples(finished)
+
+def z_fill_sampling(function: BatchProducer, samples: Samples, z_limit: float, z_fill: int) -> Samples:
+    """
+    Z Score Filling
+    Uses the z-score https://en.wikipedia.org/wiki/Standard_score
+    Find unusual jumps in the data that are potential discontinuities of the function
+    then add additional points around these jumps to improve the quality around those jumps
+    The z-scores are computed for every segment on its own.
+    """
+    segment_indices, t_values, points = samples
+    jumps = _find_jumps(samples, z_limit)
+    if len(jumps) == 0:
+        return samples
+    # We found jumps that are unusual => We fill in additional points in the jump
+    # This is a dynamic increase of resolution at unusual points
+    fill_distances = (t_values[jumps+1] - t_values[jumps]) / (1+z_fill)
+    fill_t_values = (t_values[jumps, np.newaxis] + np.outer(fill_distances, np.arange(z_fill)+1)).ravel()
+    fill_segment_indices = np.repeat(segment_indices[jumps], z_fill)
+    added_points = _evaluate(function, fill_segment_indices, fill_t_values)
+    # All points of one jump share the same insertion index and keep their order
+    insert_indices = np.repeat(jumps+1, z_fill)
+    segment_indices = np.insert(segment_indices, insert_indices, fill_segment_indices)
+    t_values = np.insert(t_values, insert_indices, fill_t_values)
+    points = np.insert(points, insert_indices, added_points, axis=0)
+    return segment_indices, t_values, points
+
+# Maximal number of bisection steps localising a single jump
+MAXIMAL_JUMP_STEPS = 50
+
+def z_bisection_sampling(function: BatchProducer, samples: Samples, z_limit: float, precision: float) -> Samples:
+    """
+    Finds unusual jumps like z_fill_sampling, but instead of filling the gap evenly every gap is bisected:
+    the half with the longer chord contains the jump and is bisected further, until the other half
+    is within the precision (or a jump turns out to be continuous). Every evaluated midpoint is on one side
+    of the jump and is kept, so the points end up on both sides right next to the discontinuity.
+    All jumps are bisected together.
+    """
+    segment_indices, t_values, points = samples
+    jumps = _find_jumps(samples, z_limit)
+    if len(jumps) == 0:
+        return samples
+    jump_segments = segment_indices[jumps]
+    low_t, high_t = t_values[jumps], t_values[jumps+1]
+    low_points, high_points = points[jumps], points[jumps+1]
+    added_samples = [samples]
+    for _ in range(MAXIMAL_JUMP_STEPS):
+        mid_t = (low_t + high_t) / 2
+        mid_points = _evaluate(function, jump_segments, mid_t)
+        added_samples.append((jump_segments, mid_t, mid_points))
+        low_chords = np.linalg.norm(mid_points - low_points, axis=1)
+        high_chords = np.linalg.norm(high_points - mid_points, axis=1)
+        in_low_half = low_chords > high_chords
+        # The half without the jump is continuous, once it is within the precision the jump is localised
+        active = np.minimum(low_chords, high_chords) > precision
+        # NaN chords compare as False, those jumps stop as well
+        active &= np.isfinite(low_chords) & np.isfinite(high_chords)
+        low_t, high_t = np.where(in_low_half, low_t, mid_t)[active], np.where(in_low_half, mid_t, high_t)[active]
+        low_points = np.where(in_low_half[:, np.newaxis], low_points, mid_points)[active]
+        high_points = np.where(in_low_half[:, np.newaxis], mid_points, high_points)[active]
+        jump_segments = jump_segments[active]
+        if len(jump_segments) == 0:
+            break
+    return _merge_samples(added_samples)
+
+def _find_jumps(samples: Samples, z_limit: float) -> np.ndarray:
+    """
+    Returns the indices of the samples followed by an unusual jump, i.e. the distance to the next sample of the segment
+    has a z-score above the z limit.
+    """
+    segment_indices, _, points = samples
+    if len(points) <= 1:
+        return np.empty(0, dtype=int)
+    # Compute the pairwise distance between the sampled points of the same segment
+    same_segment = segment_indices[:-1] == segment_indices[1:]
+    gaps = np.nonzero(same_segment)[0]
+    distances = np.linalg.norm(points[gaps+1] - points[gaps], axis=1)
+    gap_segments = segment_indices[gaps]
+
+    # Compute the mean and the standard deviation of those distances for every segment
+    segment_count = segment_indices[-1] + 1
+    gap_counts = np.bincount(gap_segments, minlength=segment_count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.bincount(gap_segments, distances, segment_count) / gap_counts
+        stds = np.sqrt(np.bincount(gap_segments, (distances - means[gap_segments])**2, segment_count) / gap_counts)
         # Compute the z values of those distances
         # The z value can be thought of as the distance between the sample and the mean in units of standard deviation
         # i.e. a z value of 1.4 means the sample is 1.4 standard deviations away from the mean
-        z_values = np.abs((distances - mean) / std)
-
-        resolution = len(z_values)
-        fill_distance = 1/ ((1+z_fill)*resolution) 
-        # Go though each distance 
-        # reversed order since we may insert additional points and that helps keeping the indices straight
-        for i in reversed(range(len(z_values))):     
-            if z_values[i] > z_limit:
-                # We found a jump that is unusual => We fill in additional points in the jump
-                # This is a dynamic increase of resolution at unusual points
-                start = i/resolution
-                added_points = [function(start + (j+1) * fill_distance) for j in range(z_fill)]
-                points[i+1:i+1] = added_points
-    return points 
+        z_values = np.abs((distances - means[gap_segments]) / stds[gap_segments])
+    # Segments with a standard deviation of zero have no unusual jumps
+    z_values[stds[gap_segments] == 0.0] = 0.0
+    return gaps[z_values > z_limit]
 
 # -----------------------------------------------------------------------------------------------
-# Dynamic linear apprximation
-# Currently unused due to poor performance with some projections
+# Adaptive Approximation
+# Breadth first subdivision that only refines the parts of the curve that are not yet within the precision
 
-def get_linear_approximator(precision: float) -> Approximator:
+def get_adaptive_approximator(precision: float, maximal_depth: int) -> Approximator:
+    """
+    Returns a preconfigured adaptive approximator with the given parameters for the intervall [0,1]
+    """
     def approximator(function: Producer)-> List[Point]:
-        return linear_approximation(function, 0.0, 1.0, precision)
+        return adaptive_approximation(function, 0.0, 1.0, precision, maximal_depth)
     return approximator
 
-def linear_approximation_recursive(function: Producer, lower_bound: float, upper_bound: float, precision: float)-> List[Point]:
-    # compute f(low), f(high), f(mid)
-    f_low = function(lower_bound)
-    f_heigh = function(upper_bound)
-
-    midpoint = (upper_bound + lower_bound) / 2
-    f_mid = np.array(function(midpoint))
-    
-    # compute approximation a(mid) = (f(low) + f(high))/2
-    midpoint_approximation = np.add(np.array(f_low), np.array(f_heigh)) / np.array(2)
-    
-    # compute error ||a(mid) - f(mid)||
-    error = np.linalg.norm(f_mid - midpoint_approximation)
-
-    if error < precision:
-        return [f_low, f_heigh]
-    # if error < precision
-    # return f(low), f(heigh)
-    # otherwise
-    lower_half = linear_approximation_recursive(function, lower_bound, midpoint, precision)
-    upper_half = linear_approximation_recursive(function, midpoint, upper_bound, precision)
-
-    # return a(low),...,a(mid),...,a(heigh)
-    # remove the duplicate midpoint
-    return lower_half[:-1] + upper_half
-
-def linear_approximation(function: Producer, lower_bound: float, upper_bound: float, precision: float, max_depth=14) -> List[Point]:
-    """
-    Start with line l: f(0) -> f(1)
-    Check if ||f(0.5)-l(0.5)|| > p
-    If so Split line into two lines l1: f(0) -> f(0.5), l2: f(0.5) -> f(1)
+def get_adaptive_batch_approximator(precision: float, maximal_depth: int) -> BatchApproximator:
+    """
+    Returns a preconfigured adaptive approximator with the given parameters for batches of segments over the intervall [0,1]
+    """
+    def approximator(function: BatchProducer, segment_count: int) -> Samples:
+        return adaptive_sampling(function, segment_count, 0.0, 1.0, precision, maximal_depth)
+    return approximator
+
+def adaptive_approximation(function: Producer, lower_bound: float, upper_bound: float, precision: float, maximal_depth=10) -> List[Point]:
+    """
+    Start with line l: f(lower) -> f(upper)
+    Check if ||f(mid)-l(mid)|| > p
+    If so split the line into two lines l1: f(lower) -> f(mid), l2: f(mid) -> f(upper)
     Repeat
+
+    Unlike the equidistant approximation only the intervals that fail the precision are split.
+    The subdivision is done breadth first: at every depth the midpoints of all pending intervals are evaluated at once.
+    The maximal depth caps the subdivision, so a segment consists of at most 2^maximal_depth lines.
+    """
+    _, _, points = adaptive_sampling(_as_batch_producer(function), 1, lower_bound, upper_bound, precision, maximal_depth)
+    return points.tolist()
+
+def adaptive_sampling(function: BatchProducer, segment_count: int, lower_bound: float, upper_bound: float, precision: float, maximal_depth=10) -> Samples:
+    """
+    Batch version of the adaptive approximation.
+    The pending intervals of all segments are processed together.
+    """
+    segment_indices = np.repeat(np.arange(segment_count), 2)
+    t_values = np.tile(np.array([lower_bound, upper_bound], dtype=float), segment_count)
+    points = _evaluate(function, segment_indices, t_values)
+
+    # The pending intervals are stored by their segment, their lower and upper t values and points
+    interval_segments = segment_indices[::2]
+    low_t, high_t = t_values[::2], t_values[1::2]
+    low_points, high_points = points[::2], points[1::2]
+    # Every midpoint of a split interval becomes a point of the approximation
+    split_samples = [(segment_indices, t_values, points)]
+
+    for _ in range(maximal_depth):
+        if len(low_t) == 0:
+            break
+        mid_t = (low_t + high_t) / 2
+        mid_points = _evaluate(function, interval_segments, mid_t)
+        mid_approximations = (low_points + high_points) / 2
+        errors = np.linalg.norm(mid_points - mid_approximations, axis=1)
+
+        # Intervals within the precision are done, the others are split at their midpoint
+        split = errors > precision
+        interval_segments = interval_segments[split]
+        mid_t, mid_points = mid_t[split], mid_points[split]
+        split_samples.append((interval_segments, mid_t, mid_points))
+
+        interval_segments = np.concatenate((interval_segments, interval_segments))
+        low_t, high_t = np.concatenate((low_t[split], mid_t)), np.concatenate((mid_t, high_t[split]))
+        low_points, high_points = np.concatenate((low_points[split], mid_points)), np.concatenate((mid_points, high_points[split]))
+
+    return _merge_samples(split_samples)
+
+# -----------------------------------------------------------------------------------------------
+# Helpers
+
+def _as_batch_producer(function: Producer) -> BatchProducer:
+    """
+    Wraps a single producer so it can be used as a batch of a single segment.
+    """
+    def batch_function(segment_indices: np.ndarray, t_values: np.ndarray) -> Point:
+        return function(t_values)
+    return batch_function
+
+def _midpoint_errors(points: np.ndarray, mid_points: np.ndarray) -> np.ndarray:
+    """
+    Returns the distance between every midpoint and its linear approximation by its neighbouring points.
+    The points are expected along the second to last axis.
+    """
+    mid_approximations = (points[..., :-1, :] + points[..., 1:, :]) / 2
+    return np.linalg.norm(mid_points - mid_approximations, axis=-1)
+
+def _evaluate(function: BatchProducer, segment_indices: np.ndarray, t_values: np.ndarray) -> np.ndarray:
+    """
+    Evaluates the producer for all segment indices and t values in a single call and returns the points as (N,2) array.
+    """
+    x, y = function(segment_indices, t_values)
+    return np.column_stack(np.broadcast_arrays(x, y))
+
+def _evaluate_grid(function: BatchProducer, segment_indices: np.ndarray, t_values: np.ndarray) -> np.ndarray:
+    """
+    Evaluates the t values for every given segment. The t values are either shared by all segments
+    or given as one row per segment. Returns the points as (segments, t values, 2) array.
+    """
+    t_grid = np.broadcast_to(t_values, (len(segment_indices), np.shape(t_values)[-1]))
+    segment_grid = np.repeat(segment_indices, t_grid.shape[1])
+    points = _evaluate(function, segment_grid, t_grid.ravel())
+    return points.reshape(t_grid.shape + (2,))
+
+def _grid_samples(segment_indices: np.ndarray, t_values: np.ndarray, points: np.ndarray) -> Samples:
+    """
+    Flattens samples given as (segments, t values) grids.
+    """
+    return np.repeat(segment_indices, t_values.shape[1]), t_values.ravel(), points.reshape(-1, 2)
+
+def _merge_samples(samples: List[Samples]) -> Samples:
+    """
+    Concatenates the samples and orders them by their segment and t value.
+    """
+    # The empty samples keep the concatenation valid for empty batches
+    samples = [(np.empty(0, dtype=int), np.empty(0), np.empty((0, 2)))] + samples
+    segment_indices = np.concatenate([indices for indices, _, _ in samples])
+    t_values = np.concatenate([values for _, values, _ in samples])
+    points = np.concatenate([points for _, _, points in samples]).reshape(-1, 2)
+    order = np.lexsort((t_values, segment_indices))
+    return segment_indices[order], t_values[order], points[order]
+
+def _interleave(values: np.ndarray, mid_values: np.ndarray) -> np.ndarray:
+    """
+    Interleaves the values with the midvalues between them along the second axis.
     """
-    # The current lower bound and lower value of our line
-    low_bound = lower_bound
-    low_value = function(low_bound)
-
-    # The list of higher bounds and values and our worklist
-    high_entries = [(upper_bound, function(upper_bound))]
-    # The output list
-    points = [low_value]
-    while len(high_entries) > 0:
-        high_bound, high_value = high_entries[-1]
-        # Compute the midpoint of our current low and high
-        mid_bound = (low_bound + high_bound) / 2
-        mid_value = function(mid_bound)
-        mid_approximation = np.add(np.array(low_value), np.array(high_value)) / np.array(2)
-        error = np.linalg.norm(np.array(mid_value) - mid_approximation)
-        # Check if the midpoint is sufficently approximated by the current line
-        if error > precision and len(high_entries) <= max_depth:
-            # if not add the midpoint as the new high value
-            # => We must increase the resolution
-            high_entries.append((mid_bound, mid_value))
-        else:
-            # Otherwise we are done with this line segment, we remove the high value
-            # and set the low value to this old high value
-            # => We Decrease Resolution
-            low_bound, low_value = high_entries.pop()
-            points.append(low_value)
-    return points
+    shape = list(values.shape)
+    shape[1] = values.shape[1] + mid_values.shape[1]
+    interleaved = np.empty(shape)
+    interleaved[:, ::2] = values
+    interleaved[:, 1::2] = mid_values
+    return interleaved
@@ -1,34 +1,77 @@
+from abc import ABC, abstractmethod
+from typing import List, Tuple
 from cartography.projection_types import Bound, Point, Producer, Transformation
+from cartography.transformations.kernel import ClampTransformation
 import numpy as np
 from numpy import sin, cos, abs as np_abs, deg2rad, sqrt, pi
 
-def get_line_function(line_start: Point, line_end: Point)-> Producer:
+
+class Segment(ABC):
     """
-    Returns a linear function with f(0)=start and f(1)=end
+    A single segment of an SVG path as a function f(t) with f(0)=start and f(1)=end.
+    Segments are Producers: t may either be a float or a numpy array of t values,
+    for an array the x and y coordinates are returned as arrays.
+    The start and end point are stored so they can be used without re-evaluating the segment.
+    Every segment is fully described by its parameters. evaluate_parameters computes the points from
+    those parameters, so the same formula is used for a single segment and for a SegmentBatch.
     """
-    from_x, from_y = line_start
-    to_x, to_y = line_end
+    def __init__(self, start: Point, end: Point, parameters: Tuple[float, ...]) -> None:
+        self.start = start
+        self.end = end
+        self.parameters = parameters
+
+    def __call__(self, t: float) -> Point:
+        # Like the SegmentBatch the stored start and end point are returned exactly
+        if np.ndim(t) == 0:
+            if t == 0.0:
+                return self.start
+            if t == 1.0:
+                return self.end
+            return self.evaluate_parameters(self.parameters, t)
+        t = np.asarray(t, dtype=float)
+        x, y = np.broadcast_arrays(*self.evaluate_parameters(self.parameters, t))
+        (start_x, start_y), (end_x, end_y) = self.start, self.end
+        x = np.where(t == 0.0, start_x, np.where(t == 1.0, end_x, x))
+        y = np.where(t == 0.0, start_y, np.where(t == 1.0, end_y, y))
+        return x, y
 
-    delta_x = to_x - from_x
-    delta_y = to_y - from_y
+    @staticmethod
+    @abstractmethod
+    def evaluate_parameters(parameters, t: float) -> Point:
+        """
+        Evaluates the segment described by the parameters at t.
+        Each parameter may either be a float or an array with one entry per t value.
+        """
+        pass
 
-    def line(t: float) -> Point:
+    def evaluate(self, t_values: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the segment for a whole vector of t values and returns the points as (N,2) array.
+        """
+        x, y = self(np.asarray(t_values, dtype=float))
+        return np.column_stack(np.broadcast_arrays(x, y))
+
+class LineSegment(Segment):
+    def __init__(self, line_start: Point, line_end: Point) -> None:
+        from_x, from_y = line_start
+        to_x, to_y = line_end
+        super().__init__(line_start, line_end, (from_x, from_y, to_x - from_x, to_y - from_y))
+
+    @staticmethod
+    def evaluate_parameters(parameters, t: float) -> Point:
+        from_x, from_y, delta_x, delta_y = parameters[:4]
         x = from_x + t * delta_x
         y = from_y + t * delta_y
         return x,y
-    
-    return line
 
-def get_quadratic_bezier_function(curve_start: Point, control_point_a: Point, curve_end: Point) -> Producer:
-    """
-    Returns a quadratic Bezier with f(0)=start and f(1)=end
-    using the provided control point
-    """
-    from_x, from_y = curve_start
-    a_x, a_y = control_point_a
-    to_x, to_y = curve_end
+class QuadraticBezierSegment(Segment):
+    def __init__(self, curve_start: Point, control_point_a: Point, curve_end: Point) -> None:
+        super().__init__(curve_start, curve_end, (*curve_start, *control_point_a, *curve_end))
+        self.control_point_a = control_point_a
 
-    def curve(t: float) -> Point:
+    @staticmethod
+    def evaluate_parameters(parameters, t: float) -> Point:
+        from_x, from_y, a_x, a_y, to_x, to_y = parameters[:6]
         t_bar = 1-t
 
         x = from_x * (t_bar ** 2)
@@ -41,19 +84,15 @@ def get_quadratic_bezier_function(curve_start: Point, control_point_a: Point, cu
         y += to_y * (t ** 2)
         return x, y
 
-    return curve
+class CubicBezierSegment(Segment):
+    def __init__(self, curve_start: Point, control_point_a: Point, control_point_b: Point, curve_end: Point) -> None:
+        super().__init__(curve_start, curve_end, (*curve_start, *control_point_a, *control_point_b, *curve_end))
+        self.control_point_a = control_point_a
+        self.control_point_b = control_point_b
 
-def get_cubic_bezier_function(curve_start: Point, control_point_a: Point, control_point_b: Point, curve_end: Point) -> Producer:
-    """
-    Returns a cubic Bezier with f(0)=start and f(1)=end
-    using the provided control points
-    """
-    from_x, from_y = curve_start
-    a_x, a_y = control_point_a
-    b_x, b_y = control_point_b
-    to_x, to_y = curve_end
-
-    def curve(t: float) -> Point:
+    @staticmethod
+    def evaluate_parameters(parameters, t: float) -> Point:
+        from_x, from_y, a_x, a_y, b_x, b_y, to_x, to_y = parameters[:8]
         t_bar = 1-t
 
         x = from_x * (t_bar ** 3)
@@ -69,9 +108,84 @@ def get_cubic_bezier_function(curve_start: Point, control_point_a: Point, contro
         y += to_y * (t ** 3)
         return x, y
 
-    return curve
+class ArcSegment(Segment):
+    """
+    An elliptical arc given in center parameterization, see get_arc_function for the conversion from SVG parameters.
+    """
+    def __init__(self, curve_start: Point, curve_end: Point, center: Point, radii: Point, x_angle: float, start_angle: float, angle_size: float) -> None:
+        super().__init__(curve_start, curve_end, (*center, *radii, x_angle, start_angle, angle_size))
+
+    @staticmethod
+    def evaluate_parameters(parameters, t: float) -> Point:
+        center_x, center_y, radius_x, radius_y, x_angle, start_angle, angle_size = parameters[:7]
+        arc_angle = start_angle + t * angle_size
+        x = center_x + radius_x * cos(x_angle) * cos(arc_angle) - radius_y * sin(x_angle) * sin(arc_angle)
+        y = center_y + radius_x * sin(x_angle) * cos(arc_angle) + radius_y * cos(x_angle) * sin(arc_angle)
+        return x, y
 
-def get_arc_function(curve_start: Point, curve_end: Point, radii: Point, x_angle_in_degrees: float, large_arc: bool, sweep_arc: bool) -> Producer:
+class SegmentBatch:
+    """
+    Structure of arrays for a list of segments: the kind and the parameters of every segment are stored in flat arrays,
+    so the segments of a whole document can be evaluated together. A SegmentBatch is a BatchProducer:
+    calling it with arrays of segment indices and t values evaluates every kind of segment in one vectorized step.
+    At t=0 and t=1 the stored start and end points are returned exactly (e.g. a line evaluated at t=1 may be off in the last bit),
+    so segments sharing a vertex yield the same point.
+    """
+    KINDS = (LineSegment, QuadraticBezierSegment, CubicBezierSegment, ArcSegment)
+    PARAMETER_COUNT = 8
+
+    def __init__(self, segments: List[Segment]) -> None:
+        kind_indices = {kind: index for index, kind in enumerate(self.KINDS)}
+        self.kinds = np.array([kind_indices[type(segment)] for segment in segments], dtype=int)
+        self.parameters = np.zeros((len(segments), self.PARAMETER_COUNT))
+        for index, segment in enumerate(segments):
+            self.parameters[index, :len(segment.parameters)] = segment.parameters
+        self.starts = np.array([segment.start for segment in segments], dtype=float).reshape(-1, 2)
+        self.ends = np.array([segment.end for segment in segments], dtype=float).reshape(-1, 2)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __call__(self, segment_indices: np.ndarray, t_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        segment_indices = np.asarray(segment_indices, dtype=int)
+        t_values = np.asarray(t_values, dtype=float)
+        kinds = self.kinds[segment_indices]
+        x = np.empty(len(t_values))
+        y = np.empty(len(t_values))
+        for kind_index, kind in enumerate(self.KINDS):
+            mask = kinds == kind_index
+            if not np.any(mask):
+                continue
+            # The transposed parameters yield one array per parameter
+            parameters = self.parameters[segment_indices[mask]].T
+            x[mask], y[mask] = kind.evaluate_parameters(parameters, t_values[mask])
+        for t, end_points in ((0.0, self.starts), (1.0, self.ends)):
+            at_end = t_values == t
+            if np.any(at_end):
+                x[at_end], y[at_end] = end_points[segment_indices[at_end]].T
+        return x, y
+
+def get_line_function(line_start: Point, line_end: Point)-> Segment:
+    """
+    Returns a linear function with f(0)=start and f(1)=end
+    """
+    return LineSegment(line_start, line_end)
+
+def get_quadratic_bezier_function(curve_start: Point, control_point_a: Point, curve_end: Point) -> Segment:
+    """
+    Returns a quadratic Bezier with f(0)=start and f(1)=end
+    using the provided control point
+    """
+    return QuadraticBezierSegment(curve_start, control_point_a, curve_end)
+
+def get_cubic_bezier_function(curve_start: Point, control_point_a: Point, control_point_b: Point, curve_end: Point) -> Segment:
+    """
+    Returns a cubic Bezier with f(0)=start and f(1)=end
+    using the provided control points
+    """
+    return CubicBezierSegment(curve_start, control_point_a, control_point_b, curve_end)
+
+def get_arc_function(curve_start: Point, curve_end: Point, radii: Point, x_angle_in_degrees: float, large_arc: bool, sweep_arc: bool) -> Segment:
     """
     Returns an arc with f(0)=start and f(1)=end
     using the provided radii and svg parameters
@@ -125,13 +239,7 @@ def get_arc_function(curve_start: Point, curve_end: Point, radii: Point, x_angle
     start_angle = theta
     angle_size = delta
 
-    def arc(t: float) -> Point:
-        arc_angle = start_angle + t * angle_size
-        x = center_x + radius_x * cos(x_angle) * cos(arc_angle) - radius_y * sin(x_angle) * sin(arc_angle)
-        y = center_y + radius_x * sin(x_angle) * cos(arc_angle) + radius_y * cos(x_angle) * sin(arc_angle)
-        return x, y 
-    
-    return arc
+    return ArcSegment(curve_start, curve_end, (center_x, center_y), (radius_x, radius_y), x_angle, start_angle, angle_size)
 
 def _svg_angle(ux: float, uy: float, vx: float, vy:float) -> float:
     u = np.array([ux, uy])
@@ -144,16 +252,9 @@ def _svg_angle(ux: float, uy: float, vx: float, vy:float) -> float:
         ang = -ang
     return ang
 
-def get_clamp(clamp_bound: Bound) -> Transformation:
+def get_clamp(clamp_bound: Bound) -> ClampTransformation:
     """
     Returns a function that clamps any coordinate into the given bound.
+    The coordinates may either be floats or numpy arrays of the same shape.
     """
-    min_bound, max_bound = clamp_bound
-    x_min, y_min = min_bound
-    x_max, y_max = max_bound
-
-    def clamp(x: float, y: float)-> Point:
-        x_clamped = min(x_max, max(x_min, x))
-        y_clamped = min(y_max, max(y_min, y))
-        return x_clamped, y_clamped
-    return clamp
\ No newline at end of file
+    return ClampTransformation(clamp_bound)
@@ -0,0 +1,132 @@
+from typing import Callable, Tuple
+from cartography.basis_function import SegmentBatch, LineSegment, QuadraticBezierSegment, CubicBezierSegment
+from cartography.projection_types import Bound
+import numpy as np
+
+"""
+The kernel clamps every point into the visibility bounds, so the invisible part of a segment is projected
+onto the edge of the visible area as a long run of points. Clipping finds the visible intervals of every segment
+(the t values where it is inside the clip bound) before anything is approximated,
+only those intervals have to be approximated and projected.
+
+Lines are clipped exactly with the Liang-Barsky algorithm. Curves and arcs are sampled at CLIP_RESOLUTION
+evenly spread t values, every interval between two samples on different sides of the bound is narrowed down
+by bisection. A curve that leaves and re-enters the bound between two samples is not split,
+its invisible part is still clamped by the kernel.
+"""
+
+# Number of intervals every curve is sampled in to find where it leaves or enters the bound
+CLIP_RESOLUTION = 16
+# Bisection steps narrowing down every crossing, the crossing is found up to 2^-(steps) / CLIP_RESOLUTION
+BISECTION_STEPS = 40
+
+def clip_segments(batch: SegmentBatch, segment_indices: np.ndarray, bound: Bound) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the visible intervals of the given segments of the batch: the segment of every interval
+    and its first and last t value, ordered by segment and t. Invisible segments have no interval,
+    fully visible segments the interval [0, 1].
+    """
+    segment_indices = np.asarray(segment_indices, dtype=int)
+    kinds = batch.kinds[segment_indices]
+    lines = kinds == batch.KINDS.index(LineSegment)
+    curves = segment_indices[~lines]
+    # A Bezier curve lies within the convex hull of its control points, so it is visible if they are
+    bezier = (batch.kinds[curves] == batch.KINDS.index(QuadraticBezierSegment)) | (batch.kinds[curves] == batch.KINDS.index(CubicBezierSegment))
+    contained = bezier & _are_controls_inside(batch, curves, bound)
+    intervals = [
+        _clip_lines(batch, segment_indices[lines], bound),
+        (curves[contained], np.zeros(np.count_nonzero(contained)), np.ones(np.count_nonzero(contained))),
+        _clip_curves(batch, curves[~contained], bound),
+    ]
+    owners, starts, ends = (np.concatenate(values) for values in zip(*intervals))
+    order = np.lexsort((starts, owners))
+    return owners[order], starts[order], ends[order]
+
+def _clip_lines(batch: SegmentBatch, segment_indices: np.ndarray, bound: Bound) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Liang-Barsky: every edge of the bound limits the t values of the line from below (where the line enters)
+    or from above (where it leaves). Lines parallel to an edge and outside of it are invisible.
+    """
+    (x_min, y_min), (x_max, y_max) = bound
+    from_x, from_y, delta_x, delta_y = batch.parameters[segment_indices, :4].T
+    starts = np.zeros(len(segment_indices))
+    ends = np.ones(len(segment_indices))
+    visible = np.ones(len(segment_indices), dtype=bool)
+    for p, q in ((-delta_x, from_x - x_min), (delta_x, x_max - from_x), (-delta_y, from_y - y_min), (delta_y, y_max - from_y)):
+        visible &= (p != 0.0) | (q >= 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = q / p
+        starts = np.where(p < 0.0, np.maximum(starts, r), starts)
+        ends = np.where(p > 0.0, np.minimum(ends, r), ends)
+    # Lines that only touch a corner are invisible, points (lines without length) are visible if they are inside
+    visible &= (starts < ends) | ((delta_x == 0.0) & (delta_y == 0.0))
+    return segment_indices[visible], starts[visible], ends[visible]
+
+def _clip_curves(batch: SegmentBatch, segment_indices: np.ndarray, bound: Bound) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Samples the curves, brackets every change between inside and outside and bisects it.
+    Every crossing is the t value on the inside of the final bracket, so the visible intervals never reach outside.
+    """
+    def get_sides(indices: np.ndarray, t_values: np.ndarray) -> np.ndarray:
+        return _is_inside(batch(indices, t_values), bound)
+    inside, rows, lower, upper, lower_inside, _ = find_side_changes(get_sides, segment_indices)
+    crossings = np.where(lower_inside, lower, upper)
+
+    # Every interval starts at t=0 or where the curve enters the bound and ends where it leaves or at t=1,
+    # within a curve the starts and ends alternate
+    first_inside = np.flatnonzero(inside[:, 0])
+    last_inside = np.flatnonzero(inside[:, -1])
+    entering = ~lower_inside
+    start_rows = np.concatenate((first_inside, rows[entering]))
+    start_values = np.concatenate((np.zeros(len(first_inside)), crossings[entering]))
+    end_rows = np.concatenate((rows[~entering], last_inside))
+    end_values = np.concatenate((crossings[~entering], np.ones(len(last_inside))))
+    start_order = np.lexsort((start_values, start_rows))
+    end_order = np.lexsort((end_values, end_rows))
+    owners, starts, ends = segment_indices[start_rows[start_order]], start_values[start_order], end_values[end_order]
+    # Curves that only touch the bound leave intervals no longer than the final brackets
+    longer = ends - starts > 1.0 / (CLIP_RESOLUTION * 2.0 ** BISECTION_STEPS)
+    return owners[longer], starts[longer], ends[longer]
+
+def find_side_changes(get_sides: Callable[[np.ndarray, np.ndarray], np.ndarray], segment_indices: np.ndarray)\
+    -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Samples the sides (e.g. inside or outside) of the segments at CLIP_RESOLUTION + 1 evenly spread t values
+    and bisects every interval between two samples on different sides.
+    Returns the sides of all samples (one row per segment), and for every change its row, the final bracket
+    and the sides at both ends of the bracket.
+    """
+    count = len(segment_indices)
+    t_grid = np.linspace(0.0, 1.0, CLIP_RESOLUTION + 1)
+    sides = get_sides(np.repeat(segment_indices, CLIP_RESOLUTION + 1), np.tile(t_grid, count))
+    sides = sides.reshape(count, CLIP_RESOLUTION + 1)
+
+    rows, columns = np.nonzero(sides[:, 1:] != sides[:, :-1])
+    lower, upper = t_grid[columns], t_grid[columns + 1]
+    lower_sides, upper_sides = sides[rows, columns], sides[rows, columns + 1]
+    for _ in range(BISECTION_STEPS):
+        middle = (lower + upper) / 2
+        middle_sides = get_sides(segment_indices[rows], middle)
+        same_side = middle_sides == lower_sides
+        lower = np.where(same_side, middle, lower)
+        upper = np.where(same_side, upper, middle)
+        upper_sides = np.where(same_side, upper_sides, middle_sides)
+    return sides, rows, lower, upper, lower_sides, upper_sides
+
+def _are_controls_inside(batch: SegmentBatch, segment_indices: np.ndarray, bound: Bound) -> np.ndarray:
+    """
+    Returns for every Bezier curve whether all its control points are inside the bound.
+    Unused parameters of quadratic curves repeat their end point.
+    """
+    parameters = batch.parameters[segment_indices].copy()
+    quadratic = batch.kinds[segment_indices] == batch.KINDS.index(QuadraticBezierSegment)
+    parameters[quadratic, 6:8] = parameters[quadratic, 4:6]
+    inside = np.ones(len(segment_indices), dtype=bool)
+    for index in range(0, batch.PARAMETER_COUNT, 2):
+        inside &= _is_inside((parameters[:, index], parameters[:, index + 1]), bound)
+    return inside
+
+def _is_inside(points: Tuple[np.ndarray, np.ndarray], bound: Bound) -> np.ndarray:
+    (x_min, y_min), (x_max, y_max) = bound
+    x, y = points
+    return (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
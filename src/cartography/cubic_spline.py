@@ -1,12 +1,19 @@
-from math import sqrt
+from bisect import bisect_right
 from typing import List
 import numpy as np
 
 """
 This is a "manual" implementation of a cubic spline interpolator.
 We use this instead of scipy as this may not be deployed with inkscape.
+
+The spline is converted into one cubic polynomial per interval when it is created,
+so evaluating it only needs to find the interval and evaluate the polynomial with Horner's method.
+For uniformly spaced knots (e.g. the 5° steps of the Robinson table) the interval is computed directly.
 """
 
+# Relative tolerance up to which the knots are considered uniformly spaced
+UNIFORM_TOLERANCE = 1e-9
+
 class CubicSplineInterpolator():
     """
     Interpolate a 1-D function using cubic splines.
@@ -17,6 +24,8 @@ class CubicSplineInterpolator():
           A 1-D array of real values. The length of y along the
           interpolation axis must be equal to the length of x.
 
+    Values outside of the knots are extrapolated with the polynomial of the first/last interval.
+
     Natural cubic spline interpolate function
     This class is licenced under: Attribution-ShareAlike 3.0 Unported (CC BY-SA 3.0)
     https://creativecommons.org/licenses/by-sa/3.0/
@@ -26,44 +35,98 @@ class CubicSplineInterpolator():
     """
 
     def __init__(self, x: List[float], y: List[float]) -> None:
-        self.x = np.array(x)
-        self.y = np.array(y)
+        self.x = np.array(x, dtype=float)
+        self.y = np.array(y, dtype=float)
         xdiff = np.diff(self.x)
-        dydx = np.diff(self.y)
-        dydx /= xdiff
+        dydx = np.diff(self.y) / xdiff
 
         n = self.size = len(self.x)
 
-        w = np.empty(n-1, float)
-        self.z = np.empty(n, float)
+        # Second derivatives at the knots, zero at both ends for a natural spline
+        self.z = np.zeros(n)
+        if n > 2:
+            self.z[1:-1] = _solve_tridiagonal(xdiff[1:-1], 2 * (xdiff[:-1] + xdiff[1:]), 6 * np.diff(dydx))
 
-        w[0] = 0.
-        self.z[0] = 0.
-        for i in range(1, n-1):
-            m = xdiff[i-1] * (2 - w[i-1]) + 2 * xdiff[i]
-            w[i] = xdiff[i] / m
-            self.z[i] = (6*(dydx[i] - dydx[i-1]) - xdiff[i-1]*self.z[i-1]) / m
-        self.z[-1] = 0.
+        # Coefficients of the polynomial a + b*u + c*u^2 + d*u^3 with u = x0 - x[i] for every interval i
+        self.coefficients = np.stack((
+            self.y[:-1],
+            dydx - xdiff * (2 * self.z[:-1] + self.z[1:]) / 6,
+            self.z[:-1] / 2,
+            np.diff(self.z) / (6 * xdiff)
+        ), axis=-1)
+        # Python floats for the scalar path, which avoids creating numpy scalars
+        self._knots = self.x.tolist()
+        self._coefficient_list = self.coefficients.tolist()
+        # Contiguous columns for the array path
+        self._coefficient_columns = [np.ascontiguousarray(column) for column in self.coefficients.T]
 
-        for i in range(n-2, -1, -1):
-            self.z[i] = self.z[i] - w[i]*self.z[i+1]
+        self.step = None # type: float
+        if n > 1 and np.allclose(xdiff, xdiff[0], rtol=UNIFORM_TOLERANCE, atol=0.0):
+            self.step = float(xdiff[0])
 
     def evaluate(self, x0: float):
-        return self.evaluate_list([x0])[0]    
-    
-    def evaluate_list(self, x0: List[float]):
-        # find index (it requires x0 is already sorted)
-        index = self.x.searchsorted(x0)
-        np.clip(index, 1, self.size-1, index)
-
-        xi1, xi0 = self.x[index], self.x[index-1]
-        yi1, yi0 = self.y[index], self.y[index-1]
-        zi1, zi0 = self.z[index], self.z[index-1]
-        hi1 = xi1 - xi0
-
-        # calculate cubic
-        f0 = zi0/(6*hi1)*(xi1-x0)**3 + \
-            zi1/(6*hi1)*(x0-xi0)**3 + \
-            (yi1/hi1 - zi1*hi1/6)*(x0-xi0) + \
-            (yi0/hi1 - zi0*hi1/6)*(xi1-x0)
-        return f0
\ No newline at end of file
+        if isinstance(x0, (float, int)):
+            return self.evaluate_scalar(x0)
+        if np.ndim(x0) > 0:
+            return self.evaluate_list(x0)
+        return self.evaluate_scalar(float(x0))
+
+    def evaluate_scalar(self, x0: float) -> float:
+        if self.step is not None:
+            index = int((x0 - self._knots[0]) // self.step)
+        else:
+            index = bisect_right(self._knots, x0) - 1
+        index = min(max(index, 0), self.size - 2)
+        a, b, c, d = self._coefficient_list[index]
+        u = x0 - self._knots[index]
+        return a + u * (b + u * (c + u * d))
+
+    def evaluate_list(self, x0: List[float], out: np.ndarray = None) -> np.ndarray:
+        """
+        Evaluates the spline for every value, the result is written into out if it is given.
+        """
+        x0 = np.asarray(x0, dtype=float)
+        if self.step is not None:
+            u = np.subtract(x0, self._knots[0])
+            u /= self.step
+            # Truncation only differs from floor for negative values, which are clipped to the first interval anyway
+            index = u.astype(np.intp)
+            np.clip(index, 0, self.size-2, index)
+            u -= index
+            u *= self.step
+        else:
+            index = self.x.searchsorted(x0, side="right") - 1
+            np.clip(index, 0, self.size-2, index)
+            u = x0 - self.x.take(index)
+
+        # Horner's method, every step reuses the same array
+        a, b, c, d = self._coefficient_columns
+        result = np.multiply(u, d.take(index), out=out)
+        result += c.take(index)
+        result *= u
+        result += b.take(index)
+        result *= u
+        result += a.take(index)
+        return result
+
+def _solve_tridiagonal(off_diagonal: np.ndarray, diagonal: np.ndarray, right_hand_side: np.ndarray) -> np.ndarray:
+    """
+    Solves a symmetric tridiagonal system in O(n) with the Thomas algorithm.
+    The system of a spline is diagonally dominant, so no pivoting is needed.
+    """
+    off_diagonal, diagonal, values = off_diagonal.tolist(), diagonal.tolist(), right_hand_side.tolist()
+    n = len(diagonal)
+    # Forward sweep: eliminates the lower diagonal and divides every row by its pivot
+    factors = [0.0] * n
+    for i in range(n):
+        pivot = diagonal[i]
+        if i > 0:
+            pivot -= off_diagonal[i-1] * factors[i-1]
+            values[i] -= off_diagonal[i-1] * values[i-1]
+        if i < n - 1:
+            factors[i] = off_diagonal[i] / pivot
+        values[i] /= pivot
+    # Back substitution
+    for i in range(n - 2, -1, -1):
+        values[i] -= factors[i] * values[i+1]
+    return np.array(values)
@@ -0,0 +1,213 @@
+from typing import Tuple
+from cartography.projection_types import CurveFitter, Samples
+from cartography.simplification import get_inner_points, get_segment_bounds
+import numpy as np
+
+"""
+A projected segment is approximated by many samples, written as lines they bloat the file.
+A curve fitter replaces the samples of every segment with as few cubic Bezier curves as possible,
+so that every sample is within the tolerance of the curves.
+
+The samples carry their t values, so the derivative of the projected segment at every sample can be estimated
+from its neighbours (with a quadratic through three samples). Every fitted curve starts and ends at a sample and
+its control points lie along the estimated derivatives there, which makes the curves of a segment join smoothly.
+Each segment is first fitted with a single curve; curves that exceed the tolerance are split at their worst sample
+until they fit or only a line between two neighbouring samples is left. All curves of a batch are fitted together.
+A curve may pass close to every sample and still bulge out between them, so the curve halfway between two neighbouring
+samples also has to be within the tolerance of the projected segment there, estimated from the samples and their derivatives.
+"""
+
+# Newton steps improving the parameters of the samples on the fitted curves
+REPARAMETERIZATION_STEPS = 2
+
+def get_curve_fitter(tolerance: float) -> CurveFitter:
+    """
+    Returns a curve fitter with the given tolerance.
+    """
+    def curve_fitter(samples: Samples) -> Tuple[Samples, np.ndarray]:
+        return fit_curves(samples, tolerance)
+    return curve_fitter
+
+def fit_curves(samples: Samples, tolerance: float) -> Tuple[Samples, np.ndarray]:
+    """
+    Returns the samples that are the nodes of the fitted curves and for every node the control points (x1, y1, x2, y2)
+    of the curve ending at the node. Nodes reached by a line (and the first node of every segment) have NaN controls.
+    """
+    segment_indices, t_values, points = samples
+    derivatives = _estimate_derivatives(segment_indices, t_values, points)
+    controls = np.full((len(segment_indices), 4), np.nan)
+    keep = np.zeros(len(segment_indices), dtype=bool)
+    starts, ends = get_segment_bounds(segment_indices)
+    keep[starts] = True
+    keep[ends] = True
+    while len(starts) > 0:
+        # Two neighbouring samples are joined by a line
+        curved = ends - starts > 1
+        starts, ends = starts[curved], ends[curved]
+        if len(starts) == 0:
+            break
+        indices, owners, group_offsets = get_inner_points(starts, ends)
+        lengths = t_values[ends] - t_values[starts]
+        u = (t_values[indices] - t_values[starts[owners]]) / lengths[owners]
+
+        # Control points along the derivatives, either with the lengths given by the derivatives (a Hermite curve)
+        # or with the lengths that fit the samples best
+        hermite_a = points[starts] + derivatives[starts] * (lengths / 3)[:, np.newaxis]
+        hermite_b = points[ends] - derivatives[ends] * (lengths / 3)[:, np.newaxis]
+        hermite_distances = _get_sample_distances(points, starts, ends, hermite_a, hermite_b, indices, owners, u)
+        # The samples are not evenly spread along the curve, so their parameters are improved
+        # with Newton steps towards the closest point of the curve and the curve is fitted again
+        fitted_u = u
+        for _ in range(REPARAMETERIZATION_STEPS + 1):
+            fitted_a, fitted_b = _fit_control_points(points, derivatives, starts, ends, lengths, indices, owners, group_offsets, fitted_u)
+            fitted_u = _reparameterize(points, starts, ends, fitted_a, fitted_b, indices, owners, fitted_u)
+        fitted_distances = _get_sample_distances(points, starts, ends, fitted_a, fitted_b, indices, owners, fitted_u)
+        use_fitted = np.maximum.reduceat(fitted_distances, group_offsets) < np.maximum.reduceat(hermite_distances, group_offsets)
+        control_a = np.where(use_fitted[:, np.newaxis], fitted_a, hermite_a)
+        control_b = np.where(use_fitted[:, np.newaxis], fitted_b, hermite_b)
+        distances = np.where(use_fitted[owners], fitted_distances, hermite_distances)
+        maximal_distances = np.maximum.reduceat(distances, group_offsets)
+        u = np.where(use_fitted[owners], fitted_u, u)
+        fits = (maximal_distances <= tolerance)\
+            & (_get_maximal_midpoint_distances(t_values, points, derivatives, starts, ends, control_a, control_b, group_offsets, u) <= tolerance)
+        controls[ends[fits]] = np.concatenate((control_a[fits], control_b[fits]), axis=1)
+
+        # Curves that do not fit are split at their worst sample
+        candidates = np.flatnonzero(distances == maximal_distances[owners])
+        _, first = np.unique(owners[candidates], return_index=True)
+        split = ~fits
+        worst = indices[candidates[first]][split]
+        keep[worst] = True
+        starts, ends = np.concatenate((starts[split], worst)), np.concatenate((worst, ends[split]))
+    return (segment_indices[keep], t_values[keep], points[keep]), controls[keep]
+
+def _estimate_derivatives(segment_indices: np.ndarray, t_values: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Estimates the derivative with respect to t at every sample from the quadratic through the sample and its neighbours
+    (the first and last sample of a segment use their two following or preceding samples).
+    Segments with only two samples are lines.
+    """
+    derivatives = np.zeros(points.shape)
+    if len(points) < 2:
+        return derivatives
+    starts, ends = get_segment_bounds(segment_indices)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        differences = np.diff(points, axis=0) / np.diff(t_values)[:, np.newaxis]
+    lines = ends - starts == 1
+    derivatives[starts[lines]] = differences[starts[lines]]
+    derivatives[ends[lines]] = differences[starts[lines]]
+
+    # Inner samples: weighted mean of the slopes before and after the sample
+    inner = np.ones(len(points), dtype=bool)
+    inner[starts] = False
+    inner[ends] = False
+    inner = np.flatnonzero(inner)
+    before = t_values[inner] - t_values[inner - 1]
+    after = t_values[inner + 1] - t_values[inner]
+    derivatives[inner] = (differences[inner - 1] * after[:, np.newaxis] + differences[inner] * before[:, np.newaxis]) / (before + after)[:, np.newaxis]
+
+    # End samples: the slope of the quadratic at the end, extrapolated from the two neighbouring slopes
+    curved_starts, curved_ends = starts[~lines], ends[~lines]
+    first = t_values[curved_starts + 1] - t_values[curved_starts]
+    second = t_values[curved_starts + 2] - t_values[curved_starts + 1]
+    derivatives[curved_starts] = differences[curved_starts] + (differences[curved_starts] - differences[curved_starts + 1]) * (first / (first + second))[:, np.newaxis]
+    last = t_values[curved_ends] - t_values[curved_ends - 1]
+    second_last = t_values[curved_ends - 1] - t_values[curved_ends - 2]
+    derivatives[curved_ends] = differences[curved_ends - 1] + (differences[curved_ends - 1] - differences[curved_ends - 2]) * (last / (last + second_last))[:, np.newaxis]
+    return derivatives
+
+def _fit_control_points(points: np.ndarray, derivatives: np.ndarray, starts: np.ndarray, ends: np.ndarray, lengths: np.ndarray,\
+    indices: np.ndarray, owners: np.ndarray, group_offsets: np.ndarray, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the control points along the derivatives at the starts and ends whose distances to the start and end
+    fit the inner samples best (least squares). Intervals without a solution fall back to Hermite lengths.
+    """
+    direction_a = derivatives[starts]
+    direction_b = -derivatives[ends]
+    basis_0, basis_1, basis_2, basis_3 = _get_bernstein_polynomials(u)
+    a_1 = direction_a[owners] * basis_1[:, np.newaxis]
+    a_2 = direction_b[owners] * basis_2[:, np.newaxis]
+    residual = points[indices] - points[starts[owners]] * (basis_0 + basis_1)[:, np.newaxis] - points[ends[owners]] * (basis_2 + basis_3)[:, np.newaxis]
+    def sum_per_interval(values: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(np.sum(values, axis=1), group_offsets)
+    c_11 = sum_per_interval(a_1 * a_1)
+    c_12 = sum_per_interval(a_1 * a_2)
+    c_22 = sum_per_interval(a_2 * a_2)
+    x_1 = sum_per_interval(a_1 * residual)
+    x_2 = sum_per_interval(a_2 * residual)
+    determinant = c_11 * c_22 - c_12 * c_12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        alpha_a = (x_1 * c_22 - x_2 * c_12) / determinant
+        alpha_b = (c_11 * x_2 - c_12 * x_1) / determinant
+    # The control points must not point backwards
+    valid = np.isfinite(alpha_a) & np.isfinite(alpha_b) & (alpha_a > 0) & (alpha_b > 0)
+    alpha_a = np.where(valid, alpha_a, lengths / 3)
+    alpha_b = np.where(valid, alpha_b, lengths / 3)
+    return points[starts] + direction_a * alpha_a[:, np.newaxis], points[ends] + direction_b * alpha_b[:, np.newaxis]
+
+def _get_sample_distances(points: np.ndarray, starts: np.ndarray, ends: np.ndarray, control_a: np.ndarray, control_b: np.ndarray,\
+    indices: np.ndarray, owners: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """
+    Returns the distance between every inner sample and the curve of its interval at the parameter of the sample.
+    """
+    basis_0, basis_1, basis_2, basis_3 = _get_bernstein_polynomials(u)
+    curves = points[starts[owners]] * basis_0[:, np.newaxis] + control_a[owners] * basis_1[:, np.newaxis]\
+        + control_b[owners] * basis_2[:, np.newaxis] + points[ends[owners]] * basis_3[:, np.newaxis]
+    distances = np.hypot(*(curves - points[indices]).T)
+    distances[np.isnan(distances)] = np.inf
+    return distances
+
+def _get_maximal_midpoint_distances(t_values: np.ndarray, points: np.ndarray, derivatives: np.ndarray, starts: np.ndarray, ends: np.ndarray,\
+    control_a: np.ndarray, control_b: np.ndarray, group_offsets: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """
+    Returns for every interval the largest distance between the curve halfway between two neighbouring samples
+    (the first and last pair include the start and end) and the projected segment halfway between them,
+    estimated by the Hermite curve through the samples and their derivatives.
+    Only the distance across the line between the samples counts, the parameters of the curve are not exactly those of the segment.
+    """
+    counts = ends - starts
+    pair_offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    pair_owners = np.repeat(np.arange(len(starts)), counts)
+    local = np.arange(len(pair_owners)) - pair_offsets[pair_owners]
+    firsts = starts[pair_owners] + local
+    seconds = firsts + 1
+    # The first sample of the pair is the inner sample lower (unless it is the start), the start and end have the parameters 0 and 1
+    lower = group_offsets[pair_owners] + local - 1
+    lower_u = np.where(local == 0, 0.0, u[np.clip(lower, 0, len(u) - 1)])
+    upper_u = np.where(local == counts[pair_owners] - 1, 1.0, u[np.clip(lower + 1, 0, len(u) - 1)])
+    basis_0, basis_1, basis_2, basis_3 = _get_bernstein_polynomials((lower_u + upper_u) / 2)
+    curves = points[starts[pair_owners]] * basis_0[:, np.newaxis] + control_a[pair_owners] * basis_1[:, np.newaxis]\
+        + control_b[pair_owners] * basis_2[:, np.newaxis] + points[ends[pair_owners]] * basis_3[:, np.newaxis]
+    lengths = (t_values[seconds] - t_values[firsts])[:, np.newaxis]
+    midpoints = (points[firsts] + points[seconds]) / 2 + (derivatives[firsts] - derivatives[seconds]) * lengths / 8
+    offsets = curves - midpoints
+    chords = points[seconds] - points[firsts]
+    chord_lengths = np.hypot(*chords.T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distances = np.abs(chords[:, 0] * offsets[:, 1] - chords[:, 1] * offsets[:, 0]) / chord_lengths
+    distances = np.where(chord_lengths == 0.0, np.hypot(*offsets.T), distances)
+    distances[np.isnan(distances)] = np.inf
+    return np.maximum.reduceat(distances, pair_offsets)
+
+def _reparameterize(points: np.ndarray, starts: np.ndarray, ends: np.ndarray, control_a: np.ndarray, control_b: np.ndarray,\
+    indices: np.ndarray, owners: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """
+    Moves the parameter of every inner sample one Newton step closer to the point of the curve closest to the sample.
+    """
+    p_0, p_1, p_2, p_3 = points[starts[owners]], control_a[owners], control_b[owners], points[ends[owners]]
+    basis = _get_bernstein_polynomials(u)
+    v = (1 - u)[:, np.newaxis]
+    w = u[:, np.newaxis]
+    offsets = sum(b[:, np.newaxis] * p for b, p in zip(basis, (p_0, p_1, p_2, p_3))) - points[indices]
+    first_derivatives = 3 * (v * v * (p_1 - p_0) + 2 * v * w * (p_2 - p_1) + w * w * (p_3 - p_2))
+    second_derivatives = 6 * (v * (p_2 - 2 * p_1 + p_0) + w * (p_3 - 2 * p_2 + p_1))
+    numerator = np.sum(offsets * first_derivatives, axis=1)
+    denominator = np.sum(first_derivatives * first_derivatives, axis=1) + np.sum(offsets * second_derivatives, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        new_u = u - numerator / denominator
+    # Steps that fail keep the previous parameter
+    return np.where(np.isfinite(new_u) & (new_u > 0) & (new_u < 1), new_u, u)
+
+def _get_bernstein_polynomials(u: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    v = 1 - u
+    return v * v * v, 3 * u * v * v, 3 * u * u * v, u * u * u
@@ -0,0 +1,34 @@
+from typing import Tuple
+from cartography.basis_function import SegmentBatch
+from cartography.clipping import find_side_changes
+from cartography.projection_types import Transformation
+import numpy as np
+
+"""
+Some projections are not smooth everywhere: Peirce quincuncial tears the southern hemisphere apart along four meridians
+and the orthographic projection folds the far side of the globe onto its horizon. An approximator only finds such
+places by adding more and more points, and a jump still ends up connected by a line.
+
+Projections publish these cuts as a function of the longitude and latitude that returns the side of the cuts
+a point is on (see TransformationPipeline). A segment crosses a cut wherever its side changes,
+the crossing is found by bisection and the segment is split there, so every piece is smooth.
+A negative side marks points away from any cut (e.g. the northern hemisphere of Peirce quincuncial),
+changing from or to such a point is not a crossing.
+"""
+
+def find_cuts(batch: SegmentBatch, segment_indices: np.ndarray, inverse_transformation: Transformation, cut_sides: Transformation)\
+    -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the crossings of the given segments of the batch with the cuts: the segment of every crossing
+    and the t values right before and right after it, ordered by segment and t.
+    The inverse transformation maps the points of the segments to longitudes and latitudes.
+    """
+    segment_indices = np.asarray(segment_indices, dtype=int)
+    def get_sides(indices: np.ndarray, t_values: np.ndarray) -> np.ndarray:
+        longitudes, latitudes = np.broadcast_arrays(*inverse_transformation(*batch(indices, t_values)))
+        return np.broadcast_to(cut_sides(longitudes, latitudes), np.shape(t_values))
+    _, rows, lower, upper, lower_sides, upper_sides = find_side_changes(get_sides, segment_indices)
+    crossings = (lower_sides >= 0) & (upper_sides >= 0)
+    owners, lower, upper = segment_indices[rows[crossings]], lower[crossings], upper[crossings]
+    order = np.lexsort((lower, owners))
+    return owners[order], lower[order], upper[order]
@@ -0,0 +1,71 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Dict, List, Tuple
+import json
+import os
+
+"""
+Opt-in instrumentation of a projection run. It counts events (e.g. projected points or culled paths)
+and measures the time spent in every phase (e.g. gathering the paths or approximating the segments).
+A disabled Instrumentation ignores everything, so the hot paths can call it unconditionally.
+"""
+
+class Instrumentation:
+    """
+    Collects counters and phase timings. Phases may be nested, every phase is recorded
+    with its start and duration so the run can be exported as a Chrome trace (chrome://tracing, Perfetto).
+    """
+    def __init__(self, enabled=True) -> None:
+        self.enabled = enabled
+        self.counters = {} # type: Dict[str, int]
+        self.phase_times = {} # type: Dict[str, float]
+        # (name, start, duration) of every finished phase in seconds since the creation of the instrumentation
+        self.events = [] # type: List[Tuple[str, float, float]]
+        self._origin = perf_counter()
+
+    def count(self, name: str, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def phase(self, name: str):
+        """
+        Returns a context manager that measures the time spent in the phase with the given name.
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            duration = perf_counter() - start
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + duration
+            self.events.append((name, start - self._origin, duration))
+
+    def summary(self) -> List[str]:
+        """
+        Returns a readable summary of all phases and counters, one line each.
+        """
+        lines = ["Phase timings:"]
+        for name, seconds in self.phase_times.items():
+            lines.append(f"  {name}: {seconds*1000:.1f} ms")
+        lines.append("Counters:")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name}: {value}")
+        return lines
+
+    def write_chrome_trace(self, file_name: str):
+        """
+        Writes the phases as complete events and the final counters as counter events in the Chrome trace format.
+        """
+        process = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": process, "tid": 0}\
+            for name, start, duration in self.events]
+        end = max((start + duration for _, start, duration in self.events), default=0.0)
+        for name, value in sorted(self.counters.items()):
+            events.append({"name": name, "ph": "C", "ts": end * 1e6, "pid": process, "tid": 0, "args": {name: value}})
+        with open(file_name, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
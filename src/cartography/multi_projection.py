@@ -0,0 +1,125 @@
+from typing import List, Tuple
+from inkex.elements import PathElement
+from inkex.paths import Path
+from inkex.transforms import Transform
+from cartography.projection import GatheredPaths, Projection
+from cartography.projection_types import Point, Transformation
+from cartography.transformations.kernel import compile_kernel
+import numpy as np
+
+"""
+Several projections of the same map (e.g. a Mercator, a Robinson and an orthographic version of one base map)
+share most of their work: parsing the paths, converting them to absolute coordinates, evaluating the segments
+and applying the inverse transformation. A MultiProjection does this once in a SharedSource,
+every projection only applies its own forward transformation and refines its own approximation.
+"""
+
+# The segments are evaluated in advance at the t values j / SHARED_RESOLUTION.
+# The nested grid and the adaptive approximator only sample such (dyadic) t values up to this resolution.
+SHARED_RESOLUTION = 32
+
+class SharedSource:
+    """
+    The gathered paths in longitude/latitude coordinates.
+    Calling it with segment indices and t values returns the longitudes and latitudes of the segments,
+    from the precomputed table wherever possible.
+    """
+    def __init__(self, gathered: GatheredPaths, inverse_transformation: Transformation) -> None:
+        self.gathered = gathered
+        self.inverse_transformation = inverse_transformation
+
+        moves = np.array(gathered.moves, dtype=float).reshape(-1, 2)
+        self.move_longitudes, self.move_latitudes = self._inverse(moves[:, 0], moves[:, 1])
+
+        segment_count = len(gathered.batch)
+        t_grid = np.arange(SHARED_RESOLUTION + 1) / SHARED_RESOLUTION
+        segment_indices = np.repeat(np.arange(segment_count), SHARED_RESOLUTION + 1)
+        t_values = np.tile(t_grid, segment_count)
+        longitudes, latitudes = self._inverse(*gathered.batch(segment_indices, t_values))
+        self.table_longitudes = longitudes.reshape(segment_count, SHARED_RESOLUTION + 1)
+        self.table_latitudes = latitudes.reshape(segment_count, SHARED_RESOLUTION + 1)
+
+    def __call__(self, segment_indices: np.ndarray, t_values: np.ndarray) -> Point:
+        segment_indices = np.asarray(segment_indices, dtype=int)
+        t_values = np.asarray(t_values, dtype=float)
+        scaled = t_values * SHARED_RESOLUTION
+        columns = np.clip(scaled.astype(int), 0, SHARED_RESOLUTION)
+        hits = columns == scaled
+        longitudes = self.table_longitudes[segment_indices, columns]
+        latitudes = self.table_latitudes[segment_indices, columns]
+        misses = ~hits
+        if np.any(misses):
+            longitudes[misses], latitudes[misses] = self._inverse(*self.gathered.batch(segment_indices[misses], t_values[misses]))
+        return longitudes, latitudes
+
+    def _inverse(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        longitudes, latitudes = self.inverse_transformation(x, y)
+        return np.broadcast_to(longitudes, np.shape(x)).astype(float), np.broadcast_to(latitudes, np.shape(x)).astype(float)
+
+class MultiProjection:
+    """
+    Transforms the same paths into several projections.
+    All projections must be built from the same source projection with the same visibility bounds,
+    the inverse transformation and the visibility bounds of the first projection are used for all of them.
+    """
+    def __init__(self, projections: List[Projection]) -> None:
+        if len(projections) == 0:
+            raise ValueError("A MultiProjection needs at least one projection")
+        source = projections[0]
+        for projection in projections[1:]:
+            if not np.array_equal(projection.bounds, source.bounds):
+                raise ValueError("All projections of a MultiProjection must have the same visibility bounds")
+        self.projections = projections
+        self.inverse_transformation = compile_kernel([source.from_transform, source.bound_clamp])
+        self.forward_transformations = [compile_kernel([projection.to_transform]) for projection in projections]
+
+    def gather(self, paths: List[Path], labels: List[str]) -> SharedSource:
+        """
+        Gathers paths in absolute coordinates and applies the inverse transformation, once for all projections.
+        """
+        return SharedSource(self.projections[0].gather_paths(paths, labels), self.inverse_transformation)
+
+    def transform_paths(self, source: SharedSource) -> List[List[List]]:
+        """
+        Returns the commands of the transformed paths for every projection.
+        """
+        transformed = []
+        for projection, forward_transformation in zip(self.projections, self.forward_transformations):
+            x, y = forward_transformation(source.move_longitudes, source.move_latitudes)
+            moves = np.column_stack(np.broadcast_arrays(x, y)).tolist()
+            def producer(segment_indices: np.ndarray, t_values: np.ndarray, forward_transformation=forward_transformation) -> Point:
+                return forward_transformation(*source(segment_indices, t_values))
+            transformed.append(projection.project_gathered(source.gathered, producer, moves))
+        return transformed
+
+    def prepare_elements(self, path_elements: List[PathElement]) -> Tuple[List[Tuple[PathElement, Transform]], SharedSource]:
+        """
+        Converts the elements to absolute coordinates, deletes the empty and invisible ones and gathers the others.
+        Returns the remaining elements with the transformation back to their relative coordinates and the shared source.
+        """
+        prepared = self.projections[0]._prepare_elements(path_elements)
+        paths = [path_element.path for path_element, _ in prepared]
+        labels = [path_element.label for path_element, _ in prepared]
+        return prepared, self.gather(paths, labels)
+
+    def transform_elements(self, path_elements: List[PathElement]) -> List[List[PathElement]]:
+        """
+        Transforms the elements into every projection. The elements themselves are transformed into the last projection,
+        for all other projections a copy of every element is inserted right before it.
+        Returns the transformed elements of every projection, elements that are empty or invisible are deleted.
+        """
+        prepared, source = self.prepare_elements(path_elements)
+        transformed = self.transform_paths(source)
+        results = []
+        for index, (projection, transformed_paths) in enumerate(zip(self.projections, transformed)):
+            if index == len(self.projections) - 1:
+                targets = prepared
+            else:
+                targets = []
+                for path_element, transformation_to_relative_coordinates in prepared:
+                    path_copy = path_element.copy()
+                    path_element.addprevious(path_copy)
+                    targets.append((path_copy, transformation_to_relative_coordinates))
+            projection._write_elements(targets, transformed_paths)
+            results.append([path_element for path_element, _ in targets])
+        return results
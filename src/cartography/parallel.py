@@ -0,0 +1,77 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+from inkex.paths import Path
+
+"""
+Projecting paths is independent for every path, so large selections can be spread across several processes.
+Projections consist of closures and cannot be sent to other processes. Instead every worker receives the
+configuration of the ProjectionBuilder (the recorded builder calls) and builds its own projection once.
+The paths are sent in contiguous chunks and the results are collected in the original order,
+so the output does not depend on the number of workers. Paths and results are pickled as they are,
+serializing them as d data would round every coordinate.
+"""
+
+# The projection of the current worker process, built once by _initialize_worker
+_worker_projection = None
+
+# Every worker gets a few chunks so a single complex chunk does not keep the others waiting
+CHUNKS_PER_WORKER = 4
+
+class ProjectionPool:
+    """
+    Transforms paths with a pool of worker processes.
+    The pool is only started for the duration of a single transform_paths call.
+    """
+    def __init__(self, configuration: List[Tuple[str, tuple, dict]], workers: int) -> None:
+        self.configuration = configuration
+        self.workers = workers
+
+    def transform_paths(self, paths: List[Path], labels: List[str]) -> Tuple[List[List], List[str]]:
+        """
+        Transforms the paths (in absolute coordinates) and returns the commands of the transformed paths
+        together with all messages the workers have logged.
+        """
+        chunks = _split_chunks(paths, labels, self.workers * CHUNKS_PER_WORKER)
+        transformed_paths = []
+        messages = []
+        with ProcessPoolExecutor(self.workers, initializer=_initialize_worker, initargs=(self.configuration,)) as executor:
+            for chunk_paths, chunk_messages in executor.map(_transform_chunk, chunks):
+                transformed_paths.extend(chunk_paths)
+                messages.extend(chunk_messages)
+        return transformed_paths, messages
+
+def _split_chunks(paths: List[Path], labels: List[str], chunk_count: int) -> List[Tuple[List[Path], List[str]]]:
+    """
+    Splits the paths into contiguous chunks with about the same number of commands.
+    """
+    total = sum(len(path) for path in paths)
+    chunk_size = max(1, total / chunk_count)
+    chunks = []
+    chunk_paths, chunk_labels, chunk_commands = [], [], 0
+    for path, label in zip(paths, labels):
+        # The path of an element stays bound to it and cannot be pickled, a copy of its commands can
+        chunk_paths.append(Path(list(path)))
+        chunk_labels.append(label)
+        chunk_commands += len(path)
+        if chunk_commands >= chunk_size:
+            chunks.append((chunk_paths, chunk_labels))
+            chunk_paths, chunk_labels, chunk_commands = [], [], 0
+    if len(chunk_paths) > 0:
+        chunks.append((chunk_paths, chunk_labels))
+    return chunks
+
+def _initialize_worker(configuration: List[Tuple[str, tuple, dict]]):
+    global _worker_projection
+    # Imported here since the builder itself creates ProjectionPools
+    from cartography.projection_builder import ProjectionBuilder
+    builder = ProjectionBuilder()
+    for method_name, args, kwargs in configuration:
+        getattr(builder, method_name)(*args, **kwargs)
+    _worker_projection = builder.build()
+
+def _transform_chunk(chunk: Tuple[List[Path], List[str]]) -> Tuple[List[List], List[str]]:
+    chunk_paths, chunk_labels = chunk
+    messages = []
+    _worker_projection.logger = messages.append
+    transformed_paths = _worker_projection.transform_paths(chunk_paths, chunk_labels)
+    return transformed_paths, messages
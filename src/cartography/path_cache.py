@@ -0,0 +1,130 @@
+from functools import lru_cache
+from hashlib import sha256
+from typing import Dict, List, Optional
+import glob
+import os
+import sqlite3
+import time
+from inkex.paths import Line, Move, Path, ZoneClose
+
+"""
+A persistent cache of projected paths, so regenerating an unchanged map does not approximate every path again.
+The cache is content-addressed: the key of a path is the hash of its absolute d data, the configuration of the
+ProjectionBuilder (projection, approximator, lookup grid, ...) and the source code of the cartography package,
+so changing any of them never returns a stale projection.
+All entries are stored in a single SQLite database, the least recently used entries are evicted
+once the cache grows beyond its maximal size.
+"""
+
+DATABASE_NAME = "projected_paths.sqlite"
+
+class PathCache:
+    """
+    Stores the projected paths of one projection configuration in the given directory.
+    The maximal size is given in bytes.
+    """
+    def __init__(self, directory: str, maximal_size: int, configuration: list) -> None:
+        self.directory = directory
+        self.maximal_size = maximal_size
+        self.salt = sha256((_get_source_hash() + repr(configuration)).encode()).hexdigest()
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, DATABASE_NAME), timeout=60)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS paths (key TEXT PRIMARY KEY, path TEXT, size INTEGER, last_used REAL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS paths_last_used ON paths (last_used)")
+
+    def get_key(self, path: Path) -> str:
+        return sha256((self.salt + _serialize(path)).encode()).hexdigest()
+
+    def lookup(self, keys: List[str]) -> Dict[str, List]:
+        """
+        Returns the cached commands for all keys that are in the cache and marks them as used.
+        """
+        found = {}
+        unique_keys = list(set(keys))
+        # SQLite limits the number of parameters of a single statement
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start+500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, path in self.connection.execute(f"SELECT key, path FROM paths WHERE key IN ({placeholders})", chunk):
+                found[key] = _deserialize(path)
+        now = time.time()
+        with self.connection:
+            self.connection.executemany("UPDATE paths SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def store(self, keys: List[str], transformed_paths: List[List]):
+        """
+        Stores the commands of the transformed paths and evicts the least recently used paths if the cache is too big.
+        """
+        now = time.time()
+        entries = []
+        for key, commands in zip(keys, transformed_paths):
+            path = _serialize(commands)
+            entries.append((key, path, len(key) + len(path), now))
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)", entries)
+        self._evict()
+
+    def size(self) -> int:
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM paths").fetchone()[0]
+
+    def clear(self):
+        """
+        Removes all paths of all configurations from the cache.
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM paths")
+        self.connection.execute("VACUUM")
+
+    def _evict(self):
+        excess = self.size() - self.maximal_size
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, size FROM paths ORDER BY last_used"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.connection:
+            self.connection.executemany("DELETE FROM paths WHERE key = ?", evicted)
+
+def _serialize(commands: List) -> str:
+    # repr keeps every float exact, so a cached path is identical to a freshly projected one
+    return " ".join(command.letter + "".join(" " + repr(float(argument)) for argument in command.args) for command in commands)
+
+def _deserialize(path: str) -> List:
+    """
+    Parses a serialized path. Projected paths only consist of moves, lines and closes,
+    which are parsed directly since parsing them with inkex takes longer than projecting them.
+    """
+    tokens = path.split()
+    commands = []
+    index = 0
+    while index < len(tokens):
+        letter = tokens[index]
+        if letter == "L":
+            commands.append(Line(float(tokens[index+1]), float(tokens[index+2])))
+            index += 3
+        elif letter == "M":
+            commands.append(Move(float(tokens[index+1]), float(tokens[index+2])))
+            index += 3
+        elif letter == "Z":
+            commands.append(ZoneClose())
+            index += 1
+        else:
+            return list(Path(path))
+    return commands
+
+@lru_cache(maxsize=None)
+def _get_source_hash() -> str:
+    """
+    Returns a hash of the source code of the cartography package, changing the code invalidates the cache.
+    """
+    source_hash = sha256()
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    for file_name in sorted(glob.glob(os.path.join(package_directory, "**", "*.py"), recursive=True)):
+        with open(file_name, "rb") as file:
+            source_hash.update(file.read())
+    return source_hash.hexdigest()
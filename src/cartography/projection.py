@@ -3,28 +3,112 @@ from inkex.elements import PathElement
 from inkex.transforms import BoundingBox, Transform
 from inkex.paths import Path, Move, Line, Vert, Horz, Arc, Curve, Smooth, Quadratic, ZoneClose, TepidQuadratic
 from cartography.projection_types import *
+from cartography.transformations.kernel import compile_kernel, get_clip_bound, is_separable
+from cartography.clipping import clip_segments
+from cartography.cuts import find_cuts
+from cartography.parallel import ProjectionPool
+from cartography.instrumentation import Instrumentation
+from cartography.path_cache import PathCache
+from cartography.vertex_memo import VertexMemo
+from typing import Dict, List, Tuple
+import numpy as np
 
+# Entries of the layout of a gathered path
+MOVE = "move"
+SEGMENT = "segment"
+CLOSE = "close"
+# Starts a visible piece of a clipped path at its first node
+JUMP = "jump"
+# Starts the piece of a segment after a cut of the projection, a jump unless the pieces meet within the tolerance
+CUT = "cut"
+
+# The functions creating the segments from the arguments in their keys (see _transform_basis_function)
+SEGMENT_FUNCTIONS = {
+    LineSegment: get_line_function,
+    QuadraticBezierSegment: get_quadratic_bezier_function,
+    CubicBezierSegment: get_cubic_bezier_function,
+    ArcSegment: get_arc_function,
+}
+
+# The pieces of clipped segments: a mask of the segments that are still used as a whole
+# and for every piece its segment, its first and its last t value
+Pieces = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+class GatheredPaths:
+    """
+    The moves and segments of several paths gathered into one batch, together with the layout of every path.
+    """
+    def __init__(self, layouts: List[List[Tuple[str, object]]], moves: List[Point], segments: List[Segment]) -> None:
+        self.layouts = layouts
+        self.moves = moves
+        self.segments = segments
+        self.batch = SegmentBatch(segments)
 
 class Projection:
     """
     The Projection class takes in PathElements and transforms them to a different projection.
     They do this by first applying the inverse transformation of the current projection
     followed by the transformation to the desired projection.
+    Both transformations and the clamp to the visibility bounds are compiled into a single kernel
+    (see compile_kernel) unless an already compiled kernel is provided.
+    An optional ProjectionPool spreads the paths across several worker processes.
+    An optional enabled Instrumentation counts the work done and times every phase.
+    An optional PathCache returns previously projected paths instead of projecting them again.
+    The projections of moves and segment end points are remembered in a VertexMemo across all paths and calls.
+    An optional Simplifier removes approximated points that are not needed to stay within the tolerance.
+    Horizontal and vertical lines are not approximated if the kernel is separable (e.g. cylindrical projections),
+    they are projected to the line between their projected end points right away.
+    An optional CurveFitter writes cubic Bezier curves fitted to the approximated points instead of lines.
+    With clipping the open subpaths (e.g. rivers or the graticule) are cut at the bound of the kernel's clamp
+    before they are approximated, only their visible pieces are projected. Closed subpaths are still clamped,
+    cutting them would break their fill.
+    Projections that publish cuts (see cuts.py) have every segment split where it crosses a cut,
+    the pieces are approximated separately and only joined by a line if they meet within the tolerance.
     """
     def __init__(self,\
         inverse_transformation: Transformation,\
         visibility_bounds: Bound,\
         transform: Transformation,\
-        approximator: Approximator,\
-        logger: Callable[[str],None]) -> None:
+        approximator: BatchApproximator,\
+        logger: Callable[[str],None],\
+        kernel: Transformation = None,\
+        pool: ProjectionPool = None,\
+        instrumentation: Instrumentation = None,\
+        cache: PathCache = None,\
+        vertex_memo: VertexMemo = None,\
+        simplifier: Simplifier = None,\
+        curve_fitter: CurveFitter = None,\
+        clip=False,\
+        cut_sides: Transformation = None,\
+        tolerance=0.0) -> None:
         self.from_transform = inverse_transformation
         self.bounds = visibility_bounds
         self.bound_clamp = get_clamp(self.bounds)
         self.to_transform = transform
+        if kernel is None:
+            kernel = compile_kernel([self.from_transform, self.bound_clamp, self.to_transform])
+        self.kernel = kernel
+        # Separable kernels map horizontal and vertical lines to horizontal and vertical lines
+        self.separable = is_separable(kernel)
         self.approximator = approximator
+        self.pool = pool
         self.logger = logger
         if logger is None:
             self.logger = lambda x: None
+        self.instrumentation = instrumentation
+        if instrumentation is None:
+            self.instrumentation = Instrumentation(enabled=False)
+        self.cache = cache
+        self.vertex_memo = vertex_memo
+        if vertex_memo is None:
+            self.vertex_memo = VertexMemo()
+        self.simplifier = simplifier
+        self.curve_fitter = curve_fitter
+        # The input points the kernel does not clamp, None if the kernel does not clamp right at its start
+        self.clip_bound = get_clip_bound(kernel) if clip else None
+        self.cut_sides = cut_sides
+        self.to_longitude_latitude = compile_kernel([self.from_transform, self.bound_clamp])
+        self.tolerance = tolerance
             
         
     def transform(self, path_element: PathElement):
@@ -32,27 +116,147 @@ class Projection:
         Transforms a given PathElement to the new projection.
         If the element is empty or it is outside the visible area it will be deleted.
         """
-        transformation_to_relative_coordinates = self._convert_to_absolute_coordinates(path_element)
+        self.transform_elements([path_element])
 
-        path_empty = len(path_element.path) == 0
-        if path_empty:
-            # self.logger(f"Path \"{path_element.label}\" is empty and was discarded.")
-            path_element.delete()
-            return
+    def transform_elements(self, path_elements: List[PathElement]):
+        """
+        Transforms all given PathElements to the new projection in one batch:
+        1. Gather: the segments of all paths are collected into a single SegmentBatch
+        2. Approximate: all segments are approximated and projected together, so every
+           sampling step is a single array operation for the whole document
+        3. Scatter: the resulting points are written back into the individual paths
+        If the projection has a pool of worker processes the paths are split among the workers,
+        each of them transforms its share of the paths as a batch.
+        With a PathCache only the paths that are not cached yet are transformed.
+        Elements that are empty or outside the visible area will be deleted.
+        """
+        gathered = self._prepare_elements(path_elements)
+        paths = [path_element.path for path_element, _ in gathered]
+        labels = [path_element.label for path_element, _ in gathered]
+        if self.cache is None:
+            transformed_paths = self._transform_uncached_paths(paths, labels)
+        else:
+            with self.instrumentation.phase("cache lookup"):
+                keys = [self.cache.get_key(path) for path in paths]
+                cached = self.cache.lookup(keys)
+            missing = [index for index, key in enumerate(keys) if key not in cached]
+            self.instrumentation.count("cache_hits", len(paths) - len(missing))
+            self.instrumentation.count("cache_misses", len(missing))
+            transformed_missing = []
+            if len(missing) > 0:
+                transformed_missing = self._transform_uncached_paths([paths[index] for index in missing], [labels[index] for index in missing])
+                with self.instrumentation.phase("cache store"):
+                    self.cache.store([keys[index] for index in missing], transformed_missing)
+            transformed_paths = [cached.get(key) for key in keys]
+            for index, transformed_path in zip(missing, transformed_missing):
+                transformed_paths[index] = transformed_path
+        self._write_elements(gathered, transformed_paths)
 
-        if not self._bounds_intersect_visibility(path_element.bounding_box()):
-            # The Path is fully invisible and thus does not need to be transformed
-            # self.logger(f"Path \"{path_element.label}\" is outside of the projection bounds and was discarded.")
-            path_element.delete()
-            return
+    def _transform_uncached_paths(self, paths: List[Path], labels: List[str]) -> List:
+        if self.pool is not None and len(paths) > 1:
+            # The workers are not instrumented, their work is only timed as a whole
+            with self.instrumentation.phase("worker pool"):
+                transformed_paths, messages = self.pool.transform_paths(paths, labels)
+            for message in messages:
+                self.logger(message)
+            return transformed_paths
+        return self.transform_paths(paths, labels)
+
+    def transform_paths(self, paths: List[Path], labels: List[str]) -> List[List]:
+        """
+        Transforms paths given in absolute coordinates as a single batch and returns the commands of the transformed paths.
+        The labels are only used for log messages.
+        """
+        return self.project_gathered(self.gather_paths(paths, labels))
+
+    def gather_paths(self, paths: List[Path], labels: List[str]) -> GatheredPaths:
+        """
+        Collects the moves and segments of all paths (in absolute coordinates) into a single batch.
+        Identical segments (e.g. the border of two neighbouring countries, drawn in opposite directions)
+        are only gathered once, so they are approximated once and match exactly in every path.
+        """
+        self.instrumentation.count("paths", len(paths))
+        with self.instrumentation.phase("parse paths"):
+            self._segments = [] # type: List[Segment]
+            self._moves = [] # type: List[Point]
+            # The key of every gathered segment to its index
+            self._segment_keys = {} # type: Dict[tuple, int]
+            layouts = [self._gather_path(path, label) for path, label in zip(paths, labels)]
+            return GatheredPaths(layouts, self._moves, self._segments)
+
+    def project_gathered(self, gathered: GatheredPaths, producer: BatchProducer = None, moves: List[Point] = None) -> List[List]:
+        """
+        Approximates the gathered segments and returns the commands of the transformed paths.
+        By default the moves and segments are projected with the kernel. Instead a producer of the projected segments
+        and the projected moves can be given, e.g. to share the inverse transformation between projections (see multi_projection.py).
+        """
+        layouts = gathered.layouts
+        pieces = None
+        if (self.clip_bound is not None or self.cut_sides is not None) and len(gathered.segments) > 0:
+            with self.instrumentation.phase("splitting"):
+                layouts, pieces = self._split_layouts(gathered)
+        with self.instrumentation.phase("approximation"):
+            moves, points, offsets, controls = self._project_batch(gathered, producer, moves, pieces)
+        with self.instrumentation.phase("scatter"):
+            # The projected moves follow the projected points of the segments
+            nodes = np.concatenate((points, np.array(moves, dtype=float).reshape(-1, 2)))
+            return [self._scatter_path(layout, nodes, offsets, len(points), controls) for layout in layouts]
 
+    def _prepare_elements(self, path_elements: List[PathElement]) -> List[Tuple[PathElement, Transform]]:
+        """
+        Converts the elements to absolute coordinates and deletes the empty and invisible ones.
+        Returns the remaining elements with the transformation back to their relative coordinates.
+        """
+        instrumentation = self.instrumentation
+        gathered = []
+        for path_element in path_elements:
+            with instrumentation.phase("absolute coordinates"):
+                transformation_to_relative_coordinates = self._convert_to_absolute_coordinates(path_element)
+
+            path_empty = len(path_element.path) == 0
+            if path_empty:
+                # self.logger(f"Path \"{path_element.label}\" is empty and was discarded.")
+                instrumentation.count("empty_paths")
+                path_element.delete()
+                continue
+
+            with instrumentation.phase("culling"):
+                visible = self._bounds_intersect_visibility(path_element.bounding_box())
+            if not visible:
+                # The Path is fully invisible and thus does not need to be transformed
+                # self.logger(f"Path \"{path_element.label}\" is outside of the projection bounds and was discarded.")
+                instrumentation.count("culled_paths")
+                path_element.delete()
+                continue
+
+            gathered.append((path_element, transformation_to_relative_coordinates))
+        return gathered
+
+    def _write_elements(self, gathered: List[Tuple[PathElement, Transform]], transformed_paths: List):
+        """
+        Writes the transformed paths back into the prepared elements and returns to relative coordinates.
+        """
+        with self.instrumentation.phase("write back"):
+            for (path_element, transformation_to_relative_coordinates), transformed_path in zip(gathered, transformed_paths):
+                if len(transformed_path) == 0:
+                    # Every subpath was clipped away
+                    self.instrumentation.count("clipped_paths")
+                    path_element.delete()
+                    continue
+                path_element.path = transformed_path
+                self._convert_to_relative_coodinates(path_element, transformation_to_relative_coordinates)
+
+    def _gather_path(self, path: Path, label: str) -> List[Tuple[str, object]]:
+        """
+        Collects the moves and segments of a path into the batch.
+        Returns the layout of the path: a list of (MOVE, move index), (SEGMENT, (segment index, reversed)) and (CLOSE, command) entries.
+        """
         self._current_x_untransformed = 0.0
         self._current_y_untransformed = 0.0
         self._start_x_untransformed = None
         self._start_y_untransformed = None
-        self.transformed_path = []
+        self._layout = []
 
-        path = path_element.path # type:Path
         path = path.to_non_shorthand() # type:Path
         for command in path:
             if isinstance(command, Move):
@@ -72,16 +276,321 @@ class Projection:
             elif isinstance(command, ZoneClose):
                 # Insert a line to the start
                 self._transform_line(Line(self._start_x_untransformed, self._start_y_untransformed))
-                self.transformed_path.append(command)
+                self._layout.append((CLOSE, command))
                 # We start a new zone and reset the start point
                 self._start_x_untransformed = None
                 self._start_y_untransformed = None
             else:
                 # Default: identity
-                self.logger(f"Unsupported Command {type(command)} in path {path_element.label}")
-                # self.transformed_path.append(command)
-        path_element.path = self.transformed_path
-        self._convert_to_relative_coodinates(path_element, transformation_to_relative_coordinates)
+                self.logger(f"Unsupported Command {type(command)} in path {label}")
+        return self._layout
+
+    def _project_batch(self, gathered: GatheredPaths, producer: BatchProducer = None, moves: List[Point] = None, pieces: Pieces = None) -> Tuple[List[Point], np.ndarray, List[int], np.ndarray]:
+        """
+        Projects all gathered moves with a single kernel call and approximates all gathered segments
+        with a single call of the approximator.
+        With the pieces of split segments (see _split_layouts) only the segments used in the layouts and the pieces are approximated,
+        the pieces follow the segments.
+        Returns the projected moves, the projected points of all segments and pieces, the offsets of every segment and piece
+        within the points and the control points of the curves ending at the points (None without a curve fitter).
+        """
+        instrumentation = self.instrumentation
+        if moves is None:
+            moves = []
+            if len(gathered.moves) > 0:
+                move_x, move_y = np.array(gathered.moves, dtype=float).T
+                instrumentation.count("projection_evaluations", len(move_x))
+                x, y = self._project(move_x, move_y, memoize=True)
+                moves = np.column_stack(np.broadcast_arrays(x, y)).tolist()
+
+        points = np.empty((0, 2))
+        offsets = [0]
+        controls = None
+        if len(gathered.segments) > 0:
+            batch = gathered.batch
+            instrumentation.count("segments", len(batch))
+            if producer is None:
+                def producer(segment_indices: np.ndarray, t_values: np.ndarray) -> Point:
+                    return self._project_segments(batch, segment_indices, t_values)
+            def counted_producer(segment_indices: np.ndarray, t_values: np.ndarray) -> Point:
+                # Every call of the producer is one iteration of the approximator
+                instrumentation.count("approximator_iterations")
+                instrumentation.count("projection_evaluations", len(t_values))
+                return producer(segment_indices, t_values)
+            # Every approximated segment or piece runs along a segment from a first to a last t value
+            segment_count = len(batch)
+            segments = np.arange(segment_count)
+            if pieces is not None:
+                used, piece_segments, piece_starts, piece_ends = pieces
+                instrumentation.count("approximated_pieces", len(piece_segments))
+                segments = np.concatenate((segments, piece_segments))
+                starts = np.concatenate((np.zeros(segment_count), piece_starts))
+                ends = np.concatenate((np.ones(segment_count), piece_ends))
+                approximated = np.flatnonzero(np.concatenate((used, np.ones(len(piece_segments), dtype=bool))))
+                def piece_producer(indices: np.ndarray, t_values: np.ndarray) -> Point:
+                    indices = approximated[indices]
+                    first, last = starts[indices], ends[indices]
+                    # The last t value is kept exactly, so shared end points are still memoized
+                    return counted_producer(segments[indices], np.where(t_values == 1.0, last, first + t_values * (last - first)))
+                samples = self._approximate(batch, piece_producer, segments[approximated])
+                samples = (approximated[samples[0]], samples[1], samples[2])
+            else:
+                samples = self._approximate(batch, counted_producer, segments)
+            if self.simplifier is not None:
+                with instrumentation.phase("simplification"):
+                    instrumentation.count("unsimplified_points", len(samples[0]))
+                    samples = self.simplifier(samples)
+            if self.curve_fitter is not None:
+                with instrumentation.phase("curve fitting"):
+                    instrumentation.count("unfitted_points", len(samples[0]))
+                    samples, controls = self.curve_fitter(samples)
+                    instrumentation.count("fitted_curves", np.count_nonzero(~np.isnan(controls[:, 0])))
+            segment_indices, _, points = samples
+            if instrumentation.enabled:
+                points_per_kind = np.bincount(batch.kinds[segments[segment_indices]], minlength=len(batch.KINDS))
+                for kind, count in zip(batch.KINDS, points_per_kind):
+                    instrumentation.count(f"points_{kind.__name__}", count)
+            # The samples are ordered by segment, so the points of a segment are a consecutive block
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(segment_indices, minlength=len(segments))))).tolist()
+        return moves, points, offsets, controls
+
+    def _approximate(self, batch: SegmentBatch, producer: BatchProducer, segments: np.ndarray) -> Samples:
+        """
+        Approximates everything the producer produces with the approximator, the segments are the segments of the batch
+        the produced curves run along.
+        With a separable kernel horizontal and vertical lines are skipped, their end points are their samples.
+        """
+        if not self.separable:
+            return self.approximator(producer, len(segments))
+        line_index = batch.KINDS.index(LineSegment)
+        delta_x, delta_y = batch.parameters[segments, 2], batch.parameters[segments, 3]
+        axis_aligned = (batch.kinds[segments] == line_index) & ((delta_x == 0.0) | (delta_y == 0.0))
+        if not np.any(axis_aligned):
+            return self.approximator(producer, len(segments))
+        self.instrumentation.count("axis_aligned_segments", np.count_nonzero(axis_aligned))
+        lines = np.repeat(np.flatnonzero(axis_aligned), 2)
+        line_t_values = np.tile([0.0, 1.0], len(lines) // 2)
+        line_points = np.column_stack(np.broadcast_arrays(*producer(lines, line_t_values)))
+        samples = [(lines, line_t_values, line_points)]
+        others = np.flatnonzero(~axis_aligned)
+        if len(others) > 0:
+            def other_producer(segment_indices: np.ndarray, t_values: np.ndarray) -> Point:
+                return producer(others[segment_indices], t_values)
+            other_indices, other_t_values, other_points = self.approximator(other_producer, len(others))
+            samples.append((others[other_indices], other_t_values, other_points))
+        # The samples have to be ordered by segment again, a stable sort keeps the order within every segment
+        segment_indices, t_values, points = (np.concatenate(values) for values in zip(*samples))
+        order = np.argsort(segment_indices, kind="stable")
+        return segment_indices[order], t_values[order], points[order]
+
+    def _split_layouts(self, gathered: GatheredPaths) -> Tuple[List[List[Tuple[str, object]]], Pieces]:
+        """
+        Splits the segments of the layouts into pieces: open subpaths are cut at the clip bound
+        and every subpath is split where it crosses a cut of the projection. The pieces are numbered after the segments.
+        A piece that starts at a cut starts with a CUT, a piece that does not continue from the current point
+        starts with a JUMP to its first node. Subpaths that start outside lose their move.
+        Returns the new layouts and the pieces.
+        """
+        batch = gathered.batch
+        subpaths = [_split_subpaths(layout) for layout in gathered.layouts]
+
+        # The visible intervals of the segments of open subpaths that are only partly visible
+        visible_intervals = {} # type: Dict[int, List[Tuple[float, float]]]
+        if self.clip_bound is not None:
+            open_segments = np.unique(np.array([value[0] for layout_subpaths in subpaths for subpath, closed in layout_subpaths if not closed\
+                for entry, value in subpath if entry == SEGMENT], dtype=int))
+            clipped_segments = set(open_segments.tolist())
+            for segment_index, start, end in zip(*(values.tolist() for values in clip_segments(batch, open_segments, self.clip_bound))):
+                if start == 0.0 and end == 1.0:
+                    clipped_segments.discard(segment_index)
+                else:
+                    visible_intervals.setdefault(segment_index, []).append((start, end))
+            for segment_index in clipped_segments:
+                visible_intervals.setdefault(segment_index, [])
+            self.instrumentation.count("clipped_segments", len(clipped_segments))
+        # The t values right before and after every crossing with a cut
+        crossings = {} # type: Dict[int, List[Tuple[float, float]]]
+        if self.cut_sides is not None:
+            cut_owners, cut_lower, cut_upper = find_cuts(batch, np.arange(len(batch)), self.to_longitude_latitude, self.cut_sides)
+            for segment_index, lower, upper in zip(cut_owners.tolist(), cut_lower.tolist(), cut_upper.tolist()):
+                crossings.setdefault(segment_index, []).append((lower, upper))
+            self.instrumentation.count("cut_segments", len(crossings))
+
+        # The pieces of a segment (None if it is used as a whole) with their first and last t value
+        # and whether they start and end at a cut
+        piece_segments, piece_starts, piece_ends = [], [], []
+        split_segments = {} # type: Dict[Tuple[int, bool], List[Tuple[int, float, float, bool, bool]]]
+        def get_pieces(segment_index: int, clipped: bool) -> List[Tuple[int, float, float, bool, bool]]:
+            clipped = clipped and segment_index in visible_intervals
+            if not clipped and segment_index not in crossings:
+                return None
+            if (segment_index, clipped) not in split_segments:
+                pieces = []
+                for first, last in (visible_intervals[segment_index] if clipped else [(0.0, 1.0)]):
+                    start_cut = False
+                    for lower, upper in crossings.get(segment_index, []):
+                        if first < lower and upper < last:
+                            pieces.append((first, lower, start_cut, True))
+                            first, start_cut = upper, True
+                    pieces.append((first, last, start_cut, False))
+                split_segments[segment_index, clipped] = [(len(batch) + len(piece_segments) + index, *piece) for index, piece in enumerate(pieces)]
+                for first, last, _, _ in pieces:
+                    piece_segments.append(segment_index)
+                    piece_starts.append(first)
+                    piece_ends.append(last)
+            return split_segments[segment_index, clipped]
+
+        used = np.zeros(len(batch), dtype=bool)
+        layouts = []
+        for layout_subpaths in subpaths:
+            split_layout = []
+            for subpath, closed in layout_subpaths:
+                split_subpath = []
+                # Whether the current point is the end of the last entry
+                connected = True
+                for entry, value in subpath:
+                    if entry != SEGMENT:
+                        split_subpath.append((entry, value))
+                        continue
+                    segment_index, reversed = value
+                    pieces = get_pieces(segment_index, not closed)
+                    if pieces is None:
+                        if not connected:
+                            split_subpath.append((JUMP, value))
+                        split_subpath.append((entry, value))
+                        used[segment_index] = True
+                        connected = True
+                        continue
+                    if reversed:
+                        pieces = [(piece, 1.0 - last, 1.0 - first, end_cut, start_cut) for piece, first, last, start_cut, end_cut in pieces[::-1]]
+                    for piece, first, last, start_cut, _ in pieces:
+                        # The t values are given along the direction of the path
+                        if start_cut:
+                            split_subpath.append((CUT, (piece, reversed)))
+                        elif not connected or first != 0.0:
+                            split_subpath.append((JUMP, (piece, reversed)))
+                        split_subpath.append((SEGMENT, (piece, reversed)))
+                        connected = last == 1.0
+                    if len(pieces) == 0:
+                        connected = False
+                # A move followed by a jump or by nothing but invisible segments is not needed
+                has_segments = any(entry == SEGMENT for entry, _ in subpath)
+                if len(split_subpath) > 0 and split_subpath[0][0] == MOVE and has_segments\
+                    and (len(split_subpath) == 1 or split_subpath[1][0] == JUMP):
+                    split_subpath = split_subpath[1:]
+                split_layout.extend(split_subpath)
+            layouts.append(split_layout)
+        return layouts, (used, np.array(piece_segments, dtype=int), np.array(piece_starts, dtype=float), np.array(piece_ends, dtype=float))
+
+    def _scatter_path(self, layout: List[Tuple[str, object]], nodes: np.ndarray, offsets: List[int], move_offset: int, controls: np.ndarray = None) -> List:
+        """
+        Builds the transformed path from its layout and the projected batch.
+        The first point of every segment is the end of the previous segment (or the move) and is skipped.
+        Consecutive coincident points and points within a strictly collinear run of lines are dropped as well.
+        With control points every node with controls is reached by a cubic Bezier curve instead of a line.
+        A subpath that was split by a jump is not closed. If its last segment returns to its start (within the tolerance),
+        the part before the first jump is appended to the last part, so the subpath is only broken where it was split.
+        """
+        transformed_path = []
+        # The node indices of the current run of segments, starting with the current point
+        run = []
+        start = None
+        node_count = 0
+        close_count = 0
+        split = False
+        # The positions of the move of the current subpath and of its first jump within the transformed path
+        subpath_move, first_jump = None, None
+        for entry, value in layout:
+            if entry == CUT:
+                segment_index, reversed = value
+                first = offsets[segment_index+1] - 1 if reversed else offsets[segment_index]
+                if len(run) > 0 and np.hypot(*(nodes[first] - nodes[run[-1]])) <= self.tolerance:
+                    # The pieces meet, the first point of the next piece is skipped like the first point of a segment
+                    continue
+                entry = JUMP
+            if entry == SEGMENT:
+                segment_index, reversed = value
+                begin, end = offsets[segment_index], offsets[segment_index+1]
+                node_count += end - begin
+                if len(run) == 0:
+                    # A path without a move keeps the first point of its first segment
+                    run = [end - 1 if reversed else begin]
+                    transformed_path.append(Line(*nodes[run[0]].tolist()))
+                if controls is not None:
+                    run = self._append_curves(transformed_path, nodes, controls, run, begin, end, reversed)
+                elif reversed:
+                    run.extend(range(end - 2, begin - 1, -1))
+                else:
+                    run.extend(range(begin + 1, end))
+                continue
+            self._append_lines(transformed_path, nodes[run])
+            if entry == JUMP:
+                segment_index, reversed = value
+                first = offsets[segment_index+1] - 1 if reversed else offsets[segment_index]
+                if first_jump is None:
+                    first_jump = len(transformed_path)
+                transformed_path.append(Move(*nodes[first].tolist()))
+                run = [first]
+                split = True
+                continue
+            if entry == MOVE:
+                start = move_offset + value
+                transformed_path.append(Move(*nodes[start].tolist()))
+                node_count += 1
+            elif not split:
+                transformed_path.append(value)
+                close_count += 1
+            elif subpath_move is not None:
+                self._join_split_ring(transformed_path, subpath_move, first_jump)
+            split = False
+            subpath_move = len(transformed_path) - 1 if entry == MOVE else None
+            first_jump = None
+            run = [] if start is None else [start]
+        self._append_lines(transformed_path, nodes[run])
+        self.instrumentation.count("approximated_nodes", node_count)
+        self.instrumentation.count("output_nodes", len(transformed_path) - close_count)
+        return transformed_path
+
+    def _join_split_ring(self, transformed_path: List, subpath_move: int, first_jump: int):
+        """
+        Moves the commands of a split closed subpath before its first jump to its end, if its end meets its start.
+        """
+        start = transformed_path[subpath_move]
+        end = transformed_path[-1]
+        if np.hypot(end.x - start.x, end.y - start.y) > self.tolerance:
+            return
+        leading = transformed_path[subpath_move+1:first_jump]
+        del transformed_path[subpath_move:first_jump]
+        transformed_path.extend(leading)
+
+    def _append_lines(self, transformed_path: List, run: np.ndarray):
+        for x, y in _remove_redundant_points(run):
+            transformed_path.append(Line(x, y))
+
+    def _append_curves(self, transformed_path: List, nodes: np.ndarray, controls: np.ndarray, run: List[int], begin: int, end: int, reversed: bool) -> List[int]:
+        """
+        Adds the nodes of a fitted segment to the run of lines, every curve ends the run and is appended right away.
+        Returns the new run of lines.
+        """
+        if reversed:
+            # The curve ending at a node of the reversed segment is the curve ending at the following node, reversed
+            node_indices = range(end - 2, begin - 1, -1)
+            curve_controls = controls[begin+1:end][::-1][:, [2, 3, 0, 1]]
+        else:
+            node_indices = range(begin + 1, end)
+            curve_controls = controls[begin+1:end]
+        curves = ~np.isnan(curve_controls[:, 0])
+        if not np.any(curves):
+            run.extend(node_indices)
+            return run
+        for node_index, curve, control_points in zip(node_indices, curves.tolist(), curve_controls.tolist()):
+            if curve:
+                self._append_lines(transformed_path, nodes[run])
+                transformed_path.append(Curve(*control_points, *nodes[node_index].tolist()))
+                run = [node_index]
+            else:
+                run.append(node_index)
+        return run
     
     def _convert_to_absolute_coordinates(self, path_element: PathElement) -> Transform:
         """
@@ -136,10 +645,43 @@ class Projection:
         
         return True
     
-    def _project(self, x: float, y: float) -> Point:
-        longitude, latitude = self.from_transform(x, y)
-        longitude, latitude = self.bound_clamp(longitude, latitude)
-        return self.to_transform(longitude, latitude)
+    def _project(self, x: float, y: float, memoize=False) -> Point:
+        """
+        Projects the given points with the kernel. Memoized points are looked up in the vertex memo first,
+        only the points that are not in the memo are projected and stored afterwards.
+        """
+        with self.instrumentation.phase("projection calls"):
+            if not memoize:
+                return self.kernel(x, y)
+            memo = self.vertex_memo
+            found, projected_x, projected_y = memo.lookup(x, y)
+            self.instrumentation.count("vertex_memo_hits", np.count_nonzero(found))
+            missing = ~found
+            if np.any(missing):
+                self.instrumentation.count("vertex_memo_misses", np.count_nonzero(missing))
+                missing_x, missing_y = np.broadcast_arrays(*self.kernel(x[missing], y[missing]))
+                projected_x[missing] = missing_x
+                projected_y[missing] = missing_y
+                memo.store(x[missing], y[missing], missing_x, missing_y)
+            return projected_x, projected_y
+
+    def _project_segments(self, batch: SegmentBatch, segment_indices: np.ndarray, t_values: np.ndarray) -> Point:
+        """
+        Projects the given samples of the batch. The end points (t=0 and t=1) are shared with the neighbouring segments
+        and are memoized, the inner samples are projected directly.
+        """
+        x, y = batch(segment_indices, t_values)
+        end_points = (t_values == 0.0) | (t_values == 1.0)
+        if not np.any(end_points):
+            return self._project(x, y)
+        if np.all(end_points):
+            return self._project(x, y, memoize=True)
+        projected_x = np.empty(len(x))
+        projected_y = np.empty(len(y))
+        projected_x[end_points], projected_y[end_points] = self._project(x[end_points], y[end_points], memoize=True)
+        inner = ~end_points
+        projected_x[inner], projected_y[inner] = self._project(x[inner], y[inner])
+        return projected_x, projected_y
 
     def _update_start_coordinates(self, x: float, y: float):
         if self._start_x_untransformed is None:
@@ -150,26 +692,26 @@ class Projection:
         self._update_start_coordinates(move.x, move.y)
         self._current_x_untransformed = move.x
         self._current_y_untransformed = move.y
-        self.transformed_path.append(Move(*self._project(move.x, move.y)))
+        self._layout.append((MOVE, len(self._moves)))
+        self._moves.append((move.x, move.y))
     
     def _transform_line(self, line: Line):
-        line_function = get_line_function((self._current_x_untransformed, self._current_y_untransformed), (line.x, line.y))
-        self._transform_basis_function(line_function)
+        start = (self._current_x_untransformed, self._current_y_untransformed)
+        end = (line.x, line.y)
+        self._transform_basis_function((LineSegment, start, end), (LineSegment, end, start))
 
     def _transform_quadratic(self, curve: Quadratic):
         start = (self._current_x_untransformed, self._current_y_untransformed)
         control_a = (curve.x2, curve.y2)
         end = (curve.x3, curve.y3)
-        curve_function = get_quadratic_bezier_function(start, control_a, end)
-        self._transform_basis_function(curve_function)
+        self._transform_basis_function((QuadraticBezierSegment, start, control_a, end), (QuadraticBezierSegment, end, control_a, start))
         
     def _transform_cubic(self, curve: Curve):
         start = (self._current_x_untransformed, self._current_y_untransformed)
         control_a = (curve.x2, curve.y2)
         control_b = (curve.x3, curve.y3)
         end = (curve.x4, curve.y4)
-        curve_function = get_cubic_bezier_function(start, control_a, control_b, end)
-        self._transform_basis_function(curve_function)
+        self._transform_basis_function((CubicBezierSegment, start, control_a, control_b, end), (CubicBezierSegment, end, control_b, control_a, start))
 
     def _transform_arc(self, arc: Arc):
         start = (self._current_x_untransformed, self._current_y_untransformed)
@@ -178,14 +720,61 @@ class Projection:
         x_angle = arc.x_axis_rotation
         sweep = arc.sweep
         large = arc.large_arc
-        arc_function = get_arc_function(start, end, radii, x_angle, large, sweep)
-        self._transform_basis_function(arc_function)
+        # The reversed arc runs along the same ellipse in the opposite direction
+        self._transform_basis_function((ArcSegment, start, end, radii, x_angle, bool(large), bool(sweep)),\
+            (ArcSegment, end, start, radii, x_angle, bool(large), not sweep))
 
 
-    def _transform_basis_function(self, basis_function: Producer):
-        def transformed_basis(t: float)-> Point:
-            return self._project(*basis_function(t))
-        points = self.approximator(transformed_basis)
-        for x,y in points:
-            self.transformed_path.append(Line(x,y))
-        self._current_x_untransformed, self._current_y_untransformed = basis_function(1.0)
\ No newline at end of file
+    def _transform_basis_function(self, key: tuple, reversed_key: tuple):
+        """
+        Adds the segment with the given key (its kind followed by the arguments of its function) to the layout.
+        Every segment is gathered in the direction of the smaller key, i.e. from its lexicographically smaller end point,
+        so it is approximated the same way no matter which path gathers it first or how the paths are batched.
+        Segments that were already gathered (in either direction) are reused.
+        """
+        is_reversed = reversed_key < key
+        canonical_key = reversed_key if is_reversed else key
+        if canonical_key in self._segment_keys:
+            index = self._segment_keys[canonical_key]
+            self.instrumentation.count("shared_segments")
+        else:
+            index = len(self._segments)
+            self._segment_keys[canonical_key] = index
+            self._segments.append(SEGMENT_FUNCTIONS[canonical_key[0]](*canonical_key[1:]))
+        self._layout.append((SEGMENT, (index, is_reversed)))
+        segment = self._segments[index]
+        self._current_x_untransformed, self._current_y_untransformed = segment.start if is_reversed else segment.end
+
+def _split_subpaths(layout: List[Tuple[str, object]]) -> List[Tuple[List[Tuple[str, object]], bool]]:
+    """
+    Splits the layout of a path at its moves. Returns the entries of every subpath and whether it is closed.
+    """
+    subpaths = []
+    for entry, value in layout:
+        if entry == MOVE or len(subpaths) == 0:
+            subpaths.append(([], False))
+        entries, closed = subpaths[-1]
+        entries.append((entry, value))
+        if entry == CLOSE:
+            subpaths[-1] = (entries, True)
+    return subpaths
+
+def _remove_redundant_points(run: np.ndarray) -> List[Point]:
+    """
+    Returns the points of the run after its first point (the current point) without consecutive coincident points
+    and without the inner points of strictly collinear runs, i.e. points that lie exactly on the line
+    between their neighbours and do not reverse the direction.
+    """
+    if len(run) < 2:
+        return []
+    points = np.asarray(run, dtype=float)
+    distinct = np.concatenate(([True], np.any(points[1:] != points[:-1], axis=1)))
+    points = points[distinct]
+    if len(points) > 2:
+        incoming = points[1:-1] - points[:-2]
+        outgoing = points[2:] - points[1:-1]
+        cross = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+        dot = incoming[:, 0] * outgoing[:, 0] + incoming[:, 1] * outgoing[:, 1]
+        kept = np.concatenate(([True], (cross != 0.0) | (dot <= 0.0), [True]))
+        points = points[kept]
+    return points[1:].tolist()
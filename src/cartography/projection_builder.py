@@ -1,110 +1,268 @@
-from typing import Callable
-from cartography.approximator import get_equidistant_approximator, get_linear_approximator
+from functools import wraps
+import warnings
+from typing import Callable, List, Tuple
+from cartography.approximator import get_adaptive_batch_approximator, get_equidistant_batch_approximator
+from cartography.instrumentation import Instrumentation
+from cartography.parallel import ProjectionPool
+from cartography.path_cache import PathCache
 from cartography.projection import Projection
+from cartography.basis_function import get_clamp
+from cartography.transformations.kernel import compile_kernel, get_cut_sides
+from cartography.transformations.lookup_grid import get_lookup_grid_transformation
 from cartography.transformations.map_transformation import *
 from cartography.transformations.inverse_map_transformation import *
-from cartography.projection_types import Point, Pole, Transformation, Bound, Approximator
+from cartography.curve_fitting import get_curve_fitter
+from cartography.simplification import get_douglas_peucker_simplifier, get_visvalingam_simplifier
+from cartography.projection_types import Point, Pole, Transformation, Bound, BatchApproximator
 from numpy import pi
 
 
+def configuration_step(method):
+    """
+    Records the calls of a builder method in the configuration of the builder.
+    Only the outermost call is recorded, i.e. to_lambert but not the to_cylindrical_equal_area it calls.
+    """
+    @wraps(method)
+    def recorded_method(self: "ProjectionBuilder", *args, **kwargs) -> "ProjectionBuilder":
+        if self._recording:
+            return method(self, *args, **kwargs)
+        self._recording = True
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            self._recording = False
+        self.configuration.append((method.__name__, args, kwargs))
+        return result
+    return recorded_method
+
+# The simplifier factories by name, none disables the simplification
+SIMPLIFIERS = {
+    "none": None,
+    "douglas_peucker": get_douglas_peucker_simplifier,
+    "visvalingam": get_visvalingam_simplifier,
+}
+
 class ProjectionBuilder:
     """
     The ProjectionBuilder is a simple builder pattern to create a Projection instance.
+    Every configuration step is recorded, replaying the configuration on a new builder
+    (e.g. in a worker process) yields the same projection.
     """
 
     def __init__(self) -> None:
         self.inverse_transformation = None # type:Transformation
         self.visibility_bounds = ((-pi, -pi/2), (pi, pi/2)) # type:Bound
         self.transform = None # type:Transformation
-        self.approximator = None # type:Approximator
+        self.approximator = None # type:BatchApproximator
+        self.precision = 0.0
+        self.simplification = "none"
+        self.curve_fitting = False
+        self.clipping = False
         self.logger = None # type:Callable[[str], None]
+        self.instrumentation = None # type:Instrumentation
+        self.workers = 1
+        self.lookup_grid_error = 0.0
+        self.lookup_grid_level = 5
+        self.cache_directory = None # type:str
+        self.cache_size = 0
+        self.configuration = [] # type:List[Tuple[str, tuple, dict]]
+        self._recording = False
 
+    @configuration_step
     def from_equirectangular(self, width: float, height: float) -> "ProjectionBuilder":
         self.inverse_transformation = get_inverse_equirectangular_projection(width, height)
         return self
 
+    @configuration_step
     def to_mercator(self, width: float, height: float, standard_longitude: float, latitude_limit: float) -> "ProjectionBuilder":
         self.transform = get_mercator_projection(width, height, standard_longitude, latitude_limit)
         return self
 
+    @configuration_step
     def to_winkel_tripel(self, width: float, height: float, standard_latitude: float)-> "ProjectionBuilder":
         self.transform = get_winkel_tripel_projection(width, height, standard_latitude)
         return self
     
+    @configuration_step
     def to_robinson(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         self.transform = get_robinson_projection(width, height, reference_longitude)
         return self
     
+    @configuration_step
     def to_mollweide(self, width: float, height: float, reference_longitude: float, precision: float) -> "ProjectionBuilder":
         self.transform = get_mollweide_projection(width, height, reference_longitude, precision)
         return self
 
+    @configuration_step
     def to_cylindrical_equal_area(self, width: float, height: float, reference_longitude: float, standard_latitude: float) -> "ProjectionBuilder":
         self.transform = get_cylindrical_equal_area_projection(width, height, reference_longitude, standard_latitude)
         return self
 
+    @configuration_step
     def to_lambert(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, 0.0)
 
+    @configuration_step
     def to_behrmann(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, 0.523598776)
 
+    @configuration_step
     def to_smyth_equal_surface(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, np.arccos(np.sqrt(2/np.pi)))
 
+    @configuration_step
     def to_trystan_edwards(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, 0.6527531402)
 
+    @configuration_step
     def to_hobo_dyer(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, 0.6544984695)
 
+    @configuration_step
     def to_gall_peters(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, 0.785398163)
 
+    @configuration_step
     def to_balthasart(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, 0.872664626)
 
+    @configuration_step
     def to_toblers_word_in_a_square(self, width: float, height: float, reference_longitude: float) -> "ProjectionBuilder":
         return self.to_cylindrical_equal_area(width, height, reference_longitude, np.arccos(np.sqrt(1/np.pi)))
 
 
+    @configuration_step
     def to_peirce_quincuncial(self, width: float, height: float, standard_longitude: float) -> "ProjectionBuilder":
         self.transform = get_peirce_quincuncial_projection(width, height, standard_longitude)
         return self
 
+    @configuration_step
     def to_equidistant_conic(self, width: float, height: float, reference_longitude: float,\
         reference_latitiude: float, standard_latitude_a: float, standard_latitude_b: float) -> "ProjectionBuilder":
         self.transform = get_equidistant_conic_projection(width, height, reference_longitude, reference_latitiude, standard_latitude_a, standard_latitude_b)
         return self
 
+    @configuration_step
     def to_orthographic(self, width: float, height: float, origin: Point) -> "ProjectionBuilder":
         self.transform = get_orthographic_projection(width, height, origin)
         return self
 
+    @configuration_step
     def to_stereographic(self, width: float, height: float, latitude_limit: float, pole: Pole) -> "ProjectionBuilder":
         self.transform = get_stereographic_projection(width, height, latitude_limit, pole)
         return self
 
+    @configuration_step
     def to_lambert_azimuthal_equal_area(self, width: float, height: float, pole: Pole) -> "ProjectionBuilder":
         self.transform = get_lambert_azimuthal_equal_area_projection(width, height, pole)
         return self
 
+    @configuration_step
     def with_visibility_bounds(self, bounds: Bound) -> "ProjectionBuilder":
         self.visibility_bounds = bounds
         return self
 
+    @configuration_step
+    def with_adaptive_approximator(self, precision: float, maximal_depth: int) -> "ProjectionBuilder":
+        self.approximator = get_adaptive_batch_approximator(precision, maximal_depth)
+        self.precision = precision
+        return self
+
     def with_linear_approximator(self, precision: float) -> "ProjectionBuilder":
-        self.approximator = get_linear_approximator(precision)
+        """
+        Deprecated alias of with_adaptive_approximator, which subdivides at the midpoints like the former linear approximator
+        (with its maximal depth of 14). Not recorded itself, the configuration contains the adaptive approximator.
+        """
+        warnings.warn("with_linear_approximator is deprecated, use with_adaptive_approximator instead", DeprecationWarning, stacklevel=2)
+        return self.with_adaptive_approximator(precision, 14)
+
+    @configuration_step
+    def with_equidistant_approximator(self, precision: float, maximal_resolution: int, increment: int, z_limit: float, z_fill: int, incremental=False, z_bisection=False) -> "ProjectionBuilder":
+        self.approximator = get_equidistant_batch_approximator(precision, maximal_resolution, increment, z_limit, z_fill, incremental, z_bisection)
+        self.precision = precision
         return self
 
-    def with_equidistant_approximator(self, precision: float, maximal_resolution: int, increment: int, z_limit: float, z_fill: int) -> "ProjectionBuilder":
-        self.approximator = get_equidistant_approximator(precision, maximal_resolution, increment, z_limit, z_fill)
+    @configuration_step
+    def with_lookup_grid(self, maximal_error: float, maximal_level=5) -> "ProjectionBuilder":
+        """
+        Interpolates the projection from a precomputed lookup grid with the given maximal error (see lookup_grid.py).
+        A maximal error of 0.0 evaluates the projection directly.
+        """
+        self.lookup_grid_error = maximal_error
+        self.lookup_grid_level = maximal_level
+        return self
+
+    @configuration_step
+    def with_simplification(self, method: str) -> "ProjectionBuilder":
+        """
+        Simplifies the approximated segments with the tolerance of the approximator (see simplification.py).
+        The method is none, douglas_peucker or visvalingam.
+        """
+        if method not in SIMPLIFIERS:
+            raise ValueError(f"Unknown simplification {method}, expected one of {', '.join(SIMPLIFIERS)}")
+        self.simplification = method
+        return self
+
+    @configuration_step
+    def with_curve_fitting(self, enabled=True) -> "ProjectionBuilder":
+        """
+        Writes cubic Bezier curves fitted within the tolerance of the approximator instead of lines (see curve_fitting.py).
+        """
+        self.curve_fitting = enabled
+        return self
+
+    @configuration_step
+    def with_clipping(self, enabled=True) -> "ProjectionBuilder":
+        """
+        Cuts open paths at the visibility bounds before they are approximated instead of clamping their invisible parts
+        onto the bounds (see clipping.py). Closed paths are always clamped so they keep their fill.
+        """
+        self.clipping = enabled
+        return self
+
+    def with_workers(self, workers: int) -> "ProjectionBuilder":
+        """
+        Transforms the paths with the given number of worker processes, 1 transforms everything in this process.
+        """
+        self.workers = workers
+        return self
+
+    def with_cache(self, directory: str, maximal_size: int) -> "ProjectionBuilder":
+        """
+        Caches the projected paths in the given directory (see path_cache.py), the maximal size is given in bytes.
+        """
+        self.cache_directory = directory
+        self.cache_size = maximal_size
         return self
 
     def with_logger(self, logger: Callable[[str], None]) -> "ProjectionBuilder":
         self.logger = logger
         return self
 
+    def with_instrumentation(self, instrumentation: Instrumentation) -> "ProjectionBuilder":
+        self.instrumentation = instrumentation
+        return self
+
     def build(self) -> Projection:
+        transform = self.transform
+        if self.lookup_grid_error > 0.0:
+            transform = get_lookup_grid_transformation(transform, self.visibility_bounds, self.lookup_grid_error, self.lookup_grid_level)
+            if self.logger is not None:
+                self.logger(f"Lookup grid with {len(transform.errors)} tiles, measured maximal interpolation error {transform.maximal_error:.5f}")
+        # The inverse transformation, the visibility clamp and the projection are fused into one kernel
+        kernel = compile_kernel([self.inverse_transformation, get_clamp(self.visibility_bounds), transform])
+        pool = None
+        if self.workers > 1:
+            pool = ProjectionPool(list(self.configuration), self.workers)
+        cache = None
+        if self.cache_directory is not None:
+            cache = PathCache(self.cache_directory, self.cache_size, self.configuration)
+        simplifier = None
+        if SIMPLIFIERS[self.simplification] is not None:
+            simplifier = SIMPLIFIERS[self.simplification](self.precision)
+        curve_fitter = None
+        if self.curve_fitting:
+            curve_fitter = get_curve_fitter(self.precision)
         return Projection(self.inverse_transformation, self.visibility_bounds,\
-            self.transform, self.approximator, self.logger)
\ No newline at end of file
+            transform, self.approximator, self.logger, kernel, pool, self.instrumentation, cache, simplifier=simplifier, curve_fitter=curve_fitter, clip=self.clipping,\
+            cut_sides=get_cut_sides(self.transform), tolerance=self.precision)
\ No newline at end of file
@@ -1,13 +1,27 @@
 from enum import Enum
 from typing import Callable, Tuple, List
+import numpy as np
 
 # Types used for typehinting
 
 Point = Tuple[float, float]
 Bound = Tuple[Point, Point]
+# Producers also accept a numpy array of t values and then return a pair of arrays
 Producer = Callable[[float], Point]
+# Transformations also accept two numpy arrays of the same shape and then return a pair of arrays
 Transformation = Callable[[float, float], Point]
 Approximator = Callable[[Producer], List[Point]]
+# Batch producers map arrays of segment indices and t values to the x and y coordinates of those segments
+BatchProducer = Callable[[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+# Samples of a batch approximation: segment indices, t values and (N,2) points ordered by segment and t
+Samples = Tuple[np.ndarray, np.ndarray, np.ndarray]
+# Batch approximators take a batch producer and the number of segments in the batch
+BatchApproximator = Callable[[BatchProducer, int], Samples]
+# Simplifiers remove samples that are not needed to stay within the tolerance
+Simplifier = Callable[[Samples], Samples]
+# Curve fitters return the samples that are the nodes of the fitted curves and the (N,4) control points
+# of the cubic Bezier curve ending at every node, NaN for nodes reached by a line
+CurveFitter = Callable[[Samples], Tuple[Samples, np.ndarray]]
 
 class Pole(Enum):
     NORTHPOLE = 0
@@ -0,0 +1,143 @@
+from typing import Tuple
+from cartography.projection_types import Samples, Simplifier
+import numpy as np
+
+"""
+The approximators only ever add points, so parts of a projected curve that turned out nearly straight
+keep the full resolution of the sampling. A simplifier removes points from the approximated polylines again,
+every point that is removed is within the tolerance of the simplified polyline.
+
+Simplifiers work on Samples like the approximators: every segment is simplified on its own and
+its first and last point are always kept. Every step handles all segments of a batch at once.
+Since every segment is simplified independently, a segment shared by two paths stays the same in both.
+"""
+
+def get_douglas_peucker_simplifier(tolerance: float) -> Simplifier:
+    """
+    Returns a simplifier using the Ramer-Douglas-Peucker algorithm with the given tolerance.
+    """
+    def simplifier(samples: Samples) -> Samples:
+        return douglas_peucker_simplification(samples, tolerance)
+    return simplifier
+
+def get_visvalingam_simplifier(tolerance: float) -> Simplifier:
+    """
+    Returns a simplifier using the Visvalingam-Whyatt algorithm bounded by the given tolerance.
+    """
+    def simplifier(samples: Samples) -> Samples:
+        return visvalingam_simplification(samples, tolerance)
+    return simplifier
+
+def douglas_peucker_simplification(samples: Samples, tolerance: float) -> Samples:
+    """
+    Keeps the first and last point of every segment. Every interval between two kept points is split at its point
+    farthest away from the line between them until all points of the interval are within the tolerance of that line.
+    All intervals of all segments are split together, so the number of steps is the depth of the recursion.
+    """
+    segment_indices, t_values, points = samples
+    keep = np.zeros(len(segment_indices), dtype=bool)
+    starts, ends = get_segment_bounds(segment_indices)
+    keep[starts] = True
+    keep[ends] = True
+    while len(starts) > 0:
+        indices, owners, group_offsets = get_inner_points(starts, ends)
+        if len(indices) == 0:
+            break
+        active = np.unique(owners)
+        starts, ends = starts[active], ends[active]
+        owners = np.searchsorted(active, owners)
+        distances = _get_distances(points[indices], points[starts[owners]], points[ends[owners]])
+        maximal_distances = np.maximum.reduceat(distances, group_offsets[active])
+        # The first point with the maximal distance of every interval
+        candidates = np.flatnonzero(distances == maximal_distances[owners])
+        _, first = np.unique(owners[candidates], return_index=True)
+        farthest = indices[candidates[first]]
+        split = maximal_distances > tolerance
+        farthest = farthest[split]
+        keep[farthest] = True
+        starts, ends = np.concatenate((starts[split], farthest)), np.concatenate((farthest, ends[split]))
+    return segment_indices[keep], t_values[keep], points[keep]
+
+def visvalingam_simplification(samples: Samples, tolerance: float) -> Samples:
+    """
+    Repeatedly removes the points with the smallest effective area, i.e. the area of the triangle with their
+    current neighbours. Unlike the original algorithm a point is only removed while all points
+    it replaces (including the points removed before) are within the tolerance of the line between its neighbours.
+    Every step removes all points whose area is a local minimum, so no two neighbouring points are removed at once.
+    Only the points next to a removed point are measured again in the next step.
+    """
+    segment_indices, t_values, points = samples
+    current = np.arange(len(segment_indices))
+    # The first and the last point of a segment are never removed
+    fixed = np.zeros(len(current), dtype=bool)
+    starts, ends = get_segment_bounds(segment_indices)
+    fixed[starts] = True
+    fixed[ends] = True
+    areas = np.full(len(current), np.inf)
+    changed = ~fixed
+    while True:
+        positions = np.flatnonzero(changed)
+        if len(positions) > 0:
+            previous, middle, following = current[positions - 1], current[positions], current[positions + 1]
+            indices, owners, group_offsets = get_inner_points(previous, following)
+            distances = _get_distances(points[indices], points[previous[owners]], points[following[owners]])
+            errors = np.maximum.reduceat(distances, group_offsets)
+            # Points that can not be removed get an infinite area
+            areas[positions] = np.where(errors <= tolerance, _get_areas(points[previous], points[middle], points[following]), np.inf)
+        # Local minima, ties are broken in favour of the left point
+        padded = np.concatenate(([np.inf], areas, [np.inf]))
+        minima = np.isfinite(areas) & (areas < padded[:-2]) & (areas <= padded[2:])
+        if not np.any(minima):
+            break
+        removed = np.flatnonzero(minima)
+        changed = np.zeros(len(current), dtype=bool)
+        changed[removed - 1] = True
+        changed[removed + 1] = True
+        changed &= ~fixed
+        keep = ~minima
+        current, fixed, areas, changed = current[keep], fixed[keep], areas[keep], changed[keep]
+    return segment_indices[current], t_values[current], points[current]
+
+def get_segment_bounds(segment_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the indices of the first and the last sample of every segment.
+    """
+    if len(segment_indices) == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    starts = np.flatnonzero(np.concatenate(([True], segment_indices[1:] != segment_indices[:-1])))
+    ends = np.concatenate((starts[1:] - 1, [len(segment_indices) - 1]))
+    return starts, ends
+
+def get_inner_points(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the indices of all points strictly between the starts and ends, the interval every point belongs to
+    and the offset of the first point of every interval.
+    """
+    counts = np.maximum(ends - starts - 1, 0)
+    group_offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    owners = np.repeat(np.arange(len(starts)), counts)
+    indices = starts[owners] + 1 + np.arange(len(owners)) - group_offsets[owners]
+    return indices, owners, group_offsets
+
+def _get_distances(points: np.ndarray, line_starts: np.ndarray, line_ends: np.ndarray) -> np.ndarray:
+    """
+    Returns the distances of the points to the lines between the line starts and ends.
+    Points that are not finite get an infinite distance, so they are never simplified away.
+    """
+    direction = line_ends - line_starts
+    offset = points - line_starts
+    squared_length = np.sum(direction * direction, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(np.sum(offset * direction, axis=1) / squared_length, 0.0, 1.0)
+    t[squared_length == 0.0] = 0.0
+    distances = np.hypot(*(offset - t[:, np.newaxis] * direction).T)
+    distances[np.isnan(distances)] = np.inf
+    return distances
+
+def _get_areas(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    Returns the areas of the triangles a b c.
+    """
+    ab = b - a
+    ac = c - a
+    return np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / 2
@@ -1,11 +1,14 @@
 from cartography.projection_types import Bound, Transformation, Point
+from cartography.transformations.kernel import AffineTransformation
+import numpy as np
 from numpy import pi
 
 
-def get_linear_transform(old_bounds: Bound, new_bounds: Bound) -> Transformation:
+def get_linear_transform(old_bounds: Bound, new_bounds: Bound) -> AffineTransformation:
     """
     Returns a function that transforms any point from the space defined by the old bounds into a point from the space defined by the new bounds
     bounds are pairs of points with the first point being the lower and the second point being the heigher bound
+    The function is an AffineTransformation so it can be folded with other affine steps (see compile_kernel).
     """
     old_min, old_max = old_bounds
     old_min_x, old_min_y = old_min
@@ -23,7 +26,19 @@ def get_linear_transform(old_bounds: Bound, new_bounds: Bound) -> Transformation
         new_y = y_normalized * (new_max_y - new_min_y) + new_min_y
         return (new_x, new_y)
     
-    return transform
+    x_scale = (new_max_x - new_min_x) / (old_max_x - old_min_x)
+    y_scale = (new_max_y - new_min_y) / (old_max_y - old_min_y)
+    matrix = ((x_scale, 0.0), (0.0, y_scale))
+    offset = (new_min_x - old_min_x * x_scale, new_min_y - old_min_y * y_scale)
+    return AffineTransformation(matrix, offset, transform)
+
+def get_translation(x_offset: float, y_offset: float) -> AffineTransformation:
+    """
+    Returns a function that moves every point by the given offsets
+    """
+    def transform(x: float, y: float) -> Point:
+        return x + x_offset, y + y_offset
+    return AffineTransformation(((1.0, 0.0), (0.0, 1.0)), (x_offset, y_offset), transform)
 
 def get_circle_bound(x_radius=1.0, y_radius=1.0) -> Bound:
     """
@@ -79,3 +94,12 @@ def get_transform_to_fit(old_bounds: Bound, width: float, height: float) -> Tran
 
     new_bounds = ((x_offset, y_offset),(x_offset+scaled_width, y_offset+scaled_height))
     return get_linear_transform(old_bounds, new_bounds)
+
+def transform_arrays(transformation: Transformation, longitudes: np.ndarray, latitudes: np.ndarray) -> np.ndarray:
+    """
+    Applies the transformation to (N,) arrays of longitudes and latitudes at once.
+    Returns the transformed points as a (N,2) array.
+    """
+    x, y = transformation(np.asarray(longitudes, dtype=float), np.asarray(latitudes, dtype=float))
+    # Some transformations return a constant for one of the axes, we broadcast those to the full length
+    return np.column_stack(np.broadcast_arrays(x, y))
@@ -0,0 +1,215 @@
+from typing import Dict, List
+from cartography.projection_types import Bound, Point, Transformation
+import numpy as np
+
+"""
+A projection is a chain of transformations: the inverse of the current projection, the clamp to the visible bounds
+and the new projection, which is often itself a chain of a few simple steps and a final scaler.
+Calling these one after another costs several Python calls per point.
+compile_kernel collapses such a chain into as few steps as possible that all work on whole coordinate arrays:
+adjacent affine transformations are folded into a single matrix and adjacent clamps into a single bound.
+"""
+
+class AffineTransformation:
+    """
+    An affine transformation (x, y) -> matrix @ (x, y) + offset.
+    Calling it evaluates the provided function so results stay identical to the unfolded transformation,
+    the matrix and offset are only used to fold it with other affine transformations.
+    """
+    def __init__(self, matrix: np.ndarray, offset: np.ndarray, function: Transformation = None) -> None:
+        self.matrix = np.array(matrix, dtype=float)
+        self.offset = np.array(offset, dtype=float)
+        if function is None:
+            function = _get_matrix_function(self.matrix, self.offset)
+        self.function = function
+
+    def __call__(self, x: float, y: float) -> Point:
+        return self.function(x, y)
+
+    def is_axis_aligned(self) -> bool:
+        """
+        Returns True if x only depends on x and y only depends on y.
+        """
+        return self.matrix[0, 1] == 0.0 and self.matrix[1, 0] == 0.0
+
+    def then(self, other: "AffineTransformation") -> "AffineTransformation":
+        """
+        Returns the affine transformation that first applies this and then the other transformation.
+        """
+        matrix = other.matrix @ self.matrix
+        offset = other.matrix @ self.offset + other.offset
+        return AffineTransformation(matrix, offset)
+
+class ClampTransformation:
+    """
+    Clamps any coordinate into the given bound.
+    The coordinates may either be floats or numpy arrays of the same shape.
+    """
+    def __init__(self, bound: Bound) -> None:
+        self.bound = bound
+        min_bound, max_bound = bound
+        x_min, y_min = min_bound
+        x_max, y_max = max_bound
+
+        def clamp(x: float, y: float)-> Point:
+            # np.minimum / np.maximum so the clamp also works element-wise on coordinate arrays
+            x_clamped = np.minimum(x_max, np.maximum(x_min, x))
+            y_clamped = np.minimum(y_max, np.maximum(y_min, y))
+            return x_clamped, y_clamped
+        self.function = clamp
+
+    def __call__(self, x: float, y: float) -> Point:
+        return self.function(x, y)
+
+    def intersect(self, other: "ClampTransformation") -> "ClampTransformation":
+        """
+        Returns the clamp that is equivalent to applying this clamp followed by the other one.
+        """
+        (x_min_a, y_min_a), (x_max_a, y_max_a) = self.bound
+        (x_min_b, y_min_b), (x_max_b, y_max_b) = other.bound
+        x_min, x_max = _intersect_range(x_min_a, x_max_a, x_min_b, x_max_b)
+        y_min, y_max = _intersect_range(y_min_a, y_max_a, y_min_b, y_max_b)
+        return ClampTransformation(((x_min, y_min), (x_max, y_max)))
+
+    def transformed(self, affine: AffineTransformation) -> "ClampTransformation":
+        """
+        Returns the clamp that applied after the (axis aligned) affine transformation
+        is equivalent to this clamp applied before it.
+        """
+        x_scale, y_scale = affine.matrix[0, 0], affine.matrix[1, 1]
+        x_offset, y_offset = affine.offset
+        (x_min, y_min), (x_max, y_max) = self.bound
+        x_a, x_b = x_min * x_scale + x_offset, x_max * x_scale + x_offset
+        y_a, y_b = y_min * y_scale + y_offset, y_max * y_scale + y_offset
+        return ClampTransformation(((min(x_a, x_b), min(y_a, y_b)), (max(x_a, x_b), max(y_a, y_b))))
+
+class SeparableTransformation:
+    """
+    A transformation where x' only depends on x and y' only depends on y, each through a monotonic function
+    (e.g. the latitude of cylindrical projections). Horizontal and vertical lines stay horizontal and vertical lines,
+    the image of such a line is exactly the line between the images of its end points.
+    """
+    def __init__(self, function: Transformation) -> None:
+        self.function = function
+
+    def __call__(self, x: float, y: float) -> Point:
+        return self.function(x, y)
+
+class TransformationPipeline:
+    """
+    A transformation that applies a list of transformations one after another.
+    Projections built from simple steps use pipelines so compile_kernel can see and fold those steps.
+    The diagnostics are counters a projection may update while it is evaluated (e.g. invalid arguments).
+    Projections that are not smooth everywhere publish their cuts as a function from longitudes and latitudes
+    to the side of the cuts (see cuts.py).
+    """
+    def __init__(self, transformations: List[Transformation], diagnostics: Dict[str, int] = None, cut_sides: Transformation = None) -> None:
+        self.transformations = transformations
+        if diagnostics is None:
+            diagnostics = {}
+        self.diagnostics = diagnostics
+        self.cut_sides = cut_sides
+
+    def __call__(self, x: float, y: float) -> Point:
+        for transformation in self.transformations:
+            x, y = transformation(x, y)
+        return x, y
+
+def compile_kernel(transformations: List[Transformation]) -> TransformationPipeline:
+    """
+    Compiles a chain of transformations into a single pipeline working on whole coordinate arrays.
+    1. Nested pipelines are flattened
+    2. Clamps are moved behind axis aligned affine transformations (the clamp bound is transformed accordingly)
+    3. Adjacent affine transformations are multiplied into a single matrix, adjacent clamps are intersected
+    """
+    stages = _flatten(transformations)
+
+    # Move affine transformations in front of clamps so they end up next to each other
+    moved = True
+    while moved:
+        moved = False
+        for i in range(len(stages)-1):
+            clamp, affine = stages[i], stages[i+1]
+            if isinstance(clamp, ClampTransformation) and isinstance(affine, AffineTransformation) and _is_invertible_axis_aligned(affine):
+                stages[i], stages[i+1] = affine, clamp.transformed(affine)
+                moved = True
+
+    folded = []
+    for stage in stages:
+        previous = folded[-1] if len(folded) > 0 else None
+        if isinstance(previous, AffineTransformation) and isinstance(stage, AffineTransformation):
+            folded[-1] = previous.then(stage)
+        elif isinstance(previous, ClampTransformation) and isinstance(stage, ClampTransformation):
+            folded[-1] = previous.intersect(stage)
+        else:
+            folded.append(stage)
+    # Folded affine transformations are evaluated by their matrix
+    folded = [AffineTransformation(stage.matrix, stage.offset) if isinstance(stage, AffineTransformation) else stage for stage in folded]
+    return TransformationPipeline(folded)
+
+def is_separable(transformation: Transformation) -> bool:
+    """
+    Returns True if the transformation maps horizontal and vertical lines to horizontal and vertical lines,
+    i.e. it only consists of axis aligned affine transformations, clamps and separable transformations.
+    """
+    if isinstance(transformation, TransformationPipeline):
+        return all(is_separable(stage) for stage in transformation.transformations)
+    if isinstance(transformation, AffineTransformation):
+        return transformation.is_axis_aligned()
+    return isinstance(transformation, (ClampTransformation, SeparableTransformation))
+
+def get_cut_sides(transformation: Transformation) -> Transformation:
+    """
+    Returns the cuts published by the transformation, None if it has none.
+    """
+    if isinstance(transformation, TransformationPipeline):
+        return transformation.cut_sides
+    return None
+
+def get_clip_bound(kernel: TransformationPipeline) -> Bound:
+    """
+    Returns the bound of the input points the compiled kernel leaves unchanged by its first clamp,
+    i.e. the clamp right behind the leading affine transformation mapped back through that transformation.
+    Returns None if the kernel does not start that way.
+    """
+    stages = kernel.transformations
+    if len(stages) > 0 and isinstance(stages[0], ClampTransformation):
+        return stages[0].bound
+    if len(stages) < 2 or not isinstance(stages[1], ClampTransformation):
+        return None
+    affine = stages[0]
+    if not isinstance(affine, AffineTransformation) or not _is_invertible_axis_aligned(affine):
+        return None
+    inverse_matrix = np.linalg.inv(affine.matrix)
+    inverse = AffineTransformation(inverse_matrix, -inverse_matrix @ affine.offset)
+    return stages[1].transformed(inverse).bound
+
+def _flatten(transformations: List[Transformation]) -> List[Transformation]:
+    stages = []
+    for transformation in transformations:
+        if isinstance(transformation, TransformationPipeline):
+            stages.extend(_flatten(transformation.transformations))
+        else:
+            stages.append(transformation)
+    return stages
+
+def _is_invertible_axis_aligned(affine: AffineTransformation) -> bool:
+    return affine.is_axis_aligned() and affine.matrix[0, 0] != 0.0 and affine.matrix[1, 1] != 0.0
+
+def _intersect_range(min_a: float, max_a: float, min_b: float, max_b: float):
+    # Clamping into a, then into b: the result is always inside b
+    lower = min(max(min_a, min_b), max_b)
+    upper = max(min(max_a, max_b), min_b)
+    return lower, upper
+
+def _get_matrix_function(matrix: np.ndarray, offset: np.ndarray) -> Transformation:
+    (a, b), (c, d) = matrix
+    e, f = offset
+    if b == 0.0 and c == 0.0:
+        def axis_aligned_transform(x: float, y: float) -> Point:
+            return x * a + e, y * d + f
+        return axis_aligned_transform
+
+    def transform(x: float, y: float) -> Point:
+        return a * x + b * y + e, c * x + d * y + f
+    return transform
@@ -0,0 +1,190 @@
+from typing import List, Tuple
+from cartography.projection_types import Bound, Point, Transformation
+import numpy as np
+
+"""
+Some projections (Peirce Quincuncial with its elliptic integrals, Mollweide with its Newton-Raphson iteration)
+are expensive to evaluate. A lookup grid tabulates any transformation once on a longitude/latitude grid
+and afterwards answers every query by bicubic (Catmull-Rom) interpolation of the tabulated values.
+
+The grid consists of tiles with cells x cells grid cells each. The interpolation error of every tile is measured
+at the centers of its cells, which is where the interpolation is the least accurate. Tiles with an error above
+the maximal error are split into four tiles of half the size until the error is small enough
+or the maximal level is reached. As a result only the parts of the map that are hard to interpolate
+(e.g. close to the poles) get a finer grid. Tiles that still exceed the maximal error (e.g. across the cuts
+of a projection) are not interpolated, queries within them evaluate the transformation itself.
+"""
+
+# Entries of the tile maps for tiles that are not leafs
+REFINED = -1
+ABSENT = -2
+# A tile is only split again if splitting it reduced the error at least by this factor
+REFINEMENT_GAIN = 0.8
+
+class LookupGridTransformation:
+    """
+    A transformation that interpolates the given transformation from a precomputed grid.
+    Queries outside of the bound are clamped into the bound.
+    The measured maximal interpolation error of all interpolated tiles is stored in maximal_error.
+    """
+    def __init__(self, transformation: Transformation, bound: Bound, maximal_error: float, maximal_level=5, tiles=(8, 4), cells=8) -> None:
+        self.transformation = transformation
+        self.bound = bound
+        self.tiles = tiles
+        self.cells = cells
+        (x_min, y_min), (x_max, y_max) = bound
+        self.width = x_max - x_min
+        self.height = y_max - y_min
+
+        # For every level a map of all tiles of this level to their leaf index, REFINED or ABSENT
+        self.tile_maps = [] # type: List[np.ndarray]
+        values, errors, leaf_levels, leaf_x, leaf_y = [], [], [], [], []
+        leaf_count = 0
+        tiles_x, tiles_y = tiles
+        tile_y, tile_x = np.divmod(np.arange(tiles_x * tiles_y), tiles_x)
+        parent_errors = np.full(len(tile_x), np.inf)
+        for level in range(maximal_level + 1):
+            tile_map = np.full((tiles_y << level, tiles_x << level), ABSENT)
+            self.tile_maps.append(tile_map)
+            if len(tile_x) == 0:
+                break
+            tile_values, tile_errors = self._tabulate(level, tile_x, tile_y)
+            # Tiles across a discontinuity (e.g. a cut of the projection) do not get any better when they are split,
+            # so a tile is only refined further while splitting it noticeably reduces the error
+            refine = (tile_errors > maximal_error) & (tile_errors < parent_errors * REFINEMENT_GAIN) & (level < maximal_level)
+            leafs = ~refine
+            tile_map[tile_y[refine], tile_x[refine]] = REFINED
+            tile_map[tile_y[leafs], tile_x[leafs]] = leaf_count + np.arange(np.count_nonzero(leafs))
+            leaf_count += np.count_nonzero(leafs)
+            values.append(tile_values[leafs])
+            errors.append(tile_errors[leafs])
+            leaf_levels.append(np.full(np.count_nonzero(leafs), level))
+            leaf_x.append(tile_x[leafs])
+            leaf_y.append(tile_y[leafs])
+            # Every refined tile is split into four tiles of the next level
+            parent_errors = np.repeat(tile_errors[refine], 4)
+            tile_x = (2 * tile_x[refine, np.newaxis] + np.array([0, 1, 0, 1])).ravel()
+            tile_y = (2 * tile_y[refine, np.newaxis] + np.array([0, 0, 1, 1])).ravel()
+
+        self.values = np.concatenate(values)
+        self.errors = np.concatenate(errors)
+        self.leaf_levels = np.concatenate(leaf_levels)
+        self.leaf_x = np.concatenate(leaf_x)
+        self.leaf_y = np.concatenate(leaf_y)
+        # Tiles that could not be interpolated precisely enough evaluate the transformation itself
+        self.exact = self.errors > maximal_error
+        self.maximal_error = float(np.max(self.errors[~self.exact], initial=0.0))
+
+    def __call__(self, x: float, y: float) -> Point:
+        (x_min, y_min), (x_max, y_max) = self.bound
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        shape = x.shape
+        x = np.clip(x.ravel(), x_min, x_max)
+        y = np.clip(y.ravel(), y_min, y_max)
+
+        # Exactly one level contains a leaf for every point, all other levels are REFINED or ABSENT
+        tiles_x, tiles_y = self.tiles
+        leafs = np.full(len(x), ABSENT)
+        for level, tile_map in enumerate(self.tile_maps):
+            column = np.clip(((x - x_min) / self.width * (tiles_x << level)).astype(int), 0, (tiles_x << level) - 1)
+            row = np.clip(((y - y_min) / self.height * (tiles_y << level)).astype(int), 0, (tiles_y << level) - 1)
+            leafs = np.maximum(leafs, tile_map[row, column])
+
+        # Position within the cells of the leaf
+        levels = self.leaf_levels[leafs]
+        tile_width = self.width / (tiles_x << levels)
+        tile_height = self.height / (tiles_y << levels)
+        cell_x = (x - x_min - self.leaf_x[leafs] * tile_width) / tile_width * self.cells
+        cell_y = (y - y_min - self.leaf_y[leafs] * tile_height) / tile_height * self.cells
+        column = np.clip(np.floor(cell_x).astype(int), 0, self.cells - 1)
+        row = np.clip(np.floor(cell_y).astype(int), 0, self.cells - 1)
+
+        weights_x = _catmull_rom_weights(cell_x - column)
+        weights_y = _catmull_rom_weights(cell_y - row)
+        result = np.zeros((len(x), 2))
+        # The grid of a tile has a border of one node, so the 4x4 neighbourhood of a cell starts at its own index
+        for k in range(4):
+            for l in range(4):
+                weight = weights_y[k] * weights_x[l]
+                result += weight[:, np.newaxis] * self.values[leafs, row + k, column + l]
+        exact = self.exact[leafs]
+        if np.any(exact):
+            exact_x, exact_y = self.transformation(x[exact], y[exact])
+            result[exact, 0] = exact_x
+            result[exact, 1] = exact_y
+        new_x = result[:, 0].reshape(shape)[()]
+        new_y = result[:, 1].reshape(shape)[()]
+        return new_x, new_y
+
+    def _tabulate(self, level: int, tile_x: np.ndarray, tile_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates the transformation on the grids of the given tiles.
+        Returns the grid values (tiles, cells+3, cells+3, 2) including a border of one node
+        and the interpolation error of every tile.
+        """
+        (x_min, y_min), (x_max, y_max) = self.bound
+        tiles_x, tiles_y = self.tiles
+        cells = self.cells
+        tile_width = self.width / (tiles_x << level)
+        tile_height = self.height / (tiles_y << level)
+
+        node_offsets = np.arange(-1, cells + 2)
+        node_x = x_min + tile_x[:, np.newaxis] * tile_width + node_offsets * (tile_width / cells)
+        node_y = y_min + tile_y[:, np.newaxis] * tile_height + node_offsets * (tile_height / cells)
+        values = self._evaluate_grid(np.clip(node_x, x_min, x_max), np.clip(node_y, y_min, y_max))
+
+        # Border nodes outside of the bound are linearly extrapolated instead
+        outside = node_x[:, 0] < x_min
+        values[outside, :, 0] = 2 * values[outside, :, 1] - values[outside, :, 2]
+        outside = node_x[:, -1] > x_max
+        values[outside, :, -1] = 2 * values[outside, :, -2] - values[outside, :, -3]
+        outside = node_y[:, 0] < y_min
+        values[outside, 0] = 2 * values[outside, 1] - values[outside, 2]
+        outside = node_y[:, -1] > y_max
+        values[outside, -1] = 2 * values[outside, -2] - values[outside, -3]
+
+        center_offsets = np.arange(cells) + 0.5
+        center_x = x_min + tile_x[:, np.newaxis] * tile_width + center_offsets * (tile_width / cells)
+        center_y = y_min + tile_y[:, np.newaxis] * tile_height + center_offsets * (tile_height / cells)
+        exact = self._evaluate_grid(center_x, center_y)
+
+        weights = _catmull_rom_weights(0.5)
+        interpolated = np.zeros(exact.shape)
+        for k in range(4):
+            for l in range(4):
+                interpolated += weights[k] * weights[l] * values[:, k:k+cells, l:l+cells]
+        errors = np.max(np.linalg.norm(exact - interpolated, axis=-1), axis=(1, 2))
+        # Projections that are not finite on a tile can not be interpolated
+        errors[np.isnan(errors)] = np.inf
+        return values, errors
+
+    def _evaluate_grid(self, x_values: np.ndarray, y_values: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the transformation on the grids spanned by every row of the x and y values.
+        """
+        x_grid = np.broadcast_to(x_values[:, np.newaxis, :], (len(x_values), y_values.shape[1], x_values.shape[1]))
+        y_grid = np.broadcast_to(y_values[:, :, np.newaxis], x_grid.shape)
+        x, y = self.transformation(x_grid.ravel(), y_grid.ravel())
+        return np.stack(np.broadcast_arrays(x, y), axis=-1).reshape(x_grid.shape + (2,))
+
+def get_lookup_grid_transformation(transformation: Transformation, bound: Bound, maximal_error: float, maximal_level=5) -> LookupGridTransformation:
+    """
+    Returns a transformation that interpolates the given transformation within the bound from a lookup grid.
+    The grid is refined locally until the measured interpolation error is below the maximal error
+    or the maximal level is reached, check maximal_error of the result for the error that was achieved.
+    Tiles that do not reach the maximal error are evaluated exactly.
+    """
+    return LookupGridTransformation(transformation, bound, maximal_error, maximal_level)
+
+def _catmull_rom_weights(u):
+    """
+    Returns the weights of the four nodes around a position u in [0,1] between the two inner nodes.
+    """
+    u_squared = u * u
+    u_cubed = u_squared * u
+    return (
+        (-u_cubed + 2 * u_squared - u) / 2,
+        (3 * u_cubed - 5 * u_squared + 2) / 2,
+        (-3 * u_cubed + 4 * u_squared + u) / 2,
+        (u_cubed - u_squared) / 2
+    )
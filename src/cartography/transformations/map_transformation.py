@@ -1,8 +1,9 @@
-from cartography.transformations.generic_transformation import get_centered_square_bound, get_linear_transform, get_long_lat_bound, get_rectangle_bound, get_circle_bound, get_transform_to_fit
+from cartography.transformations.generic_transformation import get_centered_square_bound, get_linear_transform, get_long_lat_bound, get_rectangle_bound, get_circle_bound, get_transform_to_fit, get_translation
+from cartography.transformations.kernel import SeparableTransformation, TransformationPipeline
 import numpy as np
 from numpy import sin, cos, sinc, arccos, tan, pi, sqrt
 from cartography.basis_function import get_clamp
-from cartography.transformations.peirce_quincuncial import PeirceQuincuncialScale, toPeirceQuincuncial
+from cartography.transformations.peirce_quincuncial import PeirceQuincuncialScale, peirce_quincuncial_arrays
 
 from cartography.projection_types import *
 from cartography.transformations.robinson import get_robinson_factors
@@ -10,6 +11,14 @@ from cartography.transformations.robinson import get_robinson_factors
 """
 Latitude: North-South Angle (+90 = pi/2 = Northpole, -90 = -pi/2 = Southpole) 
 Longitude: East- West Angle (+140 = Tokyo, -122 = San Francisco) +180 = pi => -180 = -pi
+
+Every transformation accepts either a single longitude, latitude pair of floats
+or two numpy arrays of the same shape. For arrays the x and y coordinates are returned
+as arrays of that shape (see transform_arrays for the (N,2) form).
+Data dependent branches are therefore written with np.where instead of if statements.
+
+Projections are returned as TransformationPipelines of their individual steps (shifts, clamps, the actual projection and the scaler)
+so that compile_kernel can fold the affine steps and clamps with those of the inverse projection.
 """
 
 
@@ -23,13 +32,12 @@ def get_mercator_projection(width: float, height: float, standard_longitude: flo
     scaler = get_transform_to_fit(old_bound, width, height)
 
     def transform(longitude: float, latitude: float) -> Point:
-        #Step 1 Clamp the latitude
-        longitude, latitude = clamp(longitude-standard_longitude, latitude)
-        # Step 2 Compute the latitude
+        # Compute the latitude
         latitude = np.log(np.tan(np.pi/4 + latitude/2))
-        # Step 3 Scale to the map size
-        return scaler(longitude, latitude)   
-    return transform
+        return longitude, latitude
+
+    # Step 1 Shift the longitude, Step 2 Clamp the latitude, Step 3 Compute the latitude, Step 4 Scale to the map size
+    return TransformationPipeline([get_translation(-standard_longitude, 0.0), clamp, SeparableTransformation(transform), scaler])
 
 def get_winkel_tripel_projection(width: float, height: float, standard_latitude: float) -> Transformation:
     # https://en.wikipedia.org/wiki/Winkel_tripel_projection
@@ -47,13 +55,7 @@ def get_winkel_tripel_projection(width: float, height: float, standard_latitude:
 
     old_bound = ((x_min,y_min),(x_max, y_max))
     scaler = get_transform_to_fit(old_bound, width, height)
-    def transform(longitude: float, latitiude: float) -> Point:
-        # We divide by pi since numpy's sinc function is normalized
-        alpha = arccos(cos(latitiude)*cos(longitude/2)) / pi
-        x = 0.5 * ( (longitude * cos(standard_latitude)) + ((2*cos(latitiude)*sin(longitude/2))/sinc(alpha))) 
-        y = 0.5 * ( latitiude + sin(latitiude)/sinc(alpha))
-        return scaler(x, y) 
-    return transform
+    return TransformationPipeline([transform_unscaled, scaler])
 
 def get_robinson_projection(width: float, height: float, reference_longitude: float) -> Transformation:
     # https://en.wikipedia.org/wiki/Robinson_projection
@@ -66,32 +68,90 @@ def get_robinson_projection(width: float, height: float, reference_longitude: fl
         X_factor, Y_factor = get_robinson_factors(latitude)
         x = 0.8487 * X_factor * (longitude - reference_longitude)
         y = 1.3523 * Y_factor
-        return scaler(x,y)
-    return transform
+        return x,y
+    return TransformationPipeline([transform, scaler])
+
+# Number of latitudes in the table used to seed the Newton-Raphson iteration of Mollweide
+MOLLWEIDE_TABLE_SIZE = 181
+# Maximal number of Newton-Raphson iterations of Mollweide
+MOLLWEIDE_MAXIMAL_ITERATIONS = 100
+# Maximal number of latitudes whose theta is remembered by a Mollweide projection
+MOLLWEIDE_CACHE_SIZE = 4096
 
 def get_mollweide_projection(width: float, height: float, reference_longitude: float, precision: float) -> Transformation:
     # https://en.wikipedia.org/wiki/Mollweide_projection
     def newton_raphson_iteration(theta: float, latitude: float) -> float:
         cos_theta = cos(theta)
-        if cos_theta == 0:
-            return latitude
         numerator = 2*theta + sin(2*theta) - pi*sin(latitude)
         divisor = 4 * (cos_theta**2)
-        return theta - (numerator / divisor)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = theta - (numerator / divisor)
+        # At the poles the derivative vanishes, here we just return the latitude
+        # [()] unwraps the 0-d array np.where returns for scalar inputs
+        return np.where(cos_theta == 0, latitude, step)[()]
+
+    def solve_theta(latitude: np.ndarray, seed: np.ndarray, solver_precision: float) -> np.ndarray:
+        perv_theta = seed
+        theta = newton_raphson_iteration(perv_theta, latitude)
+        # Converged latitudes are frozen, the others keep iterating
+        unconverged = np.abs(theta-perv_theta) > solver_precision
+        iterations = 1
+        # Very small precisions may never be reached due to rounding, so the iterations are capped
+        while(np.any(unconverged) and iterations < MOLLWEIDE_MAXIMAL_ITERATIONS):
+            iterations += 1
+            next_theta = newton_raphson_iteration(theta, latitude)
+            perv_theta = np.where(unconverged, theta, perv_theta)
+            theta = np.where(unconverged, next_theta, theta)
+            unconverged = unconverged & (np.abs(theta-perv_theta) > solver_precision)
+        return theta
+
+    # The Newton-Raphson iteration is seeded by interpolating a table of precisely solved thetas
+    table_latitudes = np.linspace(-pi/2, pi/2, MOLLWEIDE_TABLE_SIZE)
+    table_thetas = solve_theta(table_latitudes, table_latitudes, 1e-12)
+
+    # Points on the same parallel share their theta, every latitude is only solved once.
+    # The cache keeps the least recently used latitudes: every call stamps the latitudes it solves or looks up with the
+    # number of the call and the latitudes with the oldest stamps are evicted first. The order sorts them by latitude for lookups
+    theta_cache = {"latitudes": np.empty(0), "thetas": np.empty(0), "last_used": np.empty(0, dtype=int), "order": np.empty(0, dtype=int), "calls": 0}
+    diagnostics = {"solved_latitudes": 0, "cached_latitudes": 0}
+
+    def get_theta(latitude: float) -> float:
+        latitudes, inverse = np.unique(np.asarray(latitude, dtype=float).ravel(), return_inverse=True)
+        thetas = np.full(len(latitudes), np.nan)
+        cached_latitudes, cached_thetas, last_used, order = theta_cache["latitudes"], theta_cache["thetas"], theta_cache["last_used"], theta_cache["order"]
+        theta_cache["calls"] += 1
+        if len(cached_latitudes) > 0:
+            sorted_latitudes = cached_latitudes[order]
+            positions = np.minimum(np.searchsorted(sorted_latitudes, latitudes), len(sorted_latitudes) - 1)
+            hits = sorted_latitudes[positions] == latitudes
+            thetas[hits] = cached_thetas[order[positions[hits]]]
+            last_used[order[positions[hits]]] = theta_cache["calls"]
+        missing = np.isnan(thetas)
+        if np.any(missing):
+            seeds = np.interp(latitudes[missing], table_latitudes, table_thetas)
+            thetas[missing] = solve_theta(latitudes[missing], seeds, precision)
+            cached_latitudes = np.concatenate((cached_latitudes, latitudes[missing]))
+            cached_thetas = np.concatenate((cached_thetas, thetas[missing]))
+            last_used = np.concatenate((last_used, np.full(np.count_nonzero(missing), theta_cache["calls"])))
+            if len(cached_latitudes) > MOLLWEIDE_CACHE_SIZE:
+                # The stable sort keeps the latest solved latitudes among those used by the same call
+                kept = np.sort(np.argsort(last_used, kind="stable")[-MOLLWEIDE_CACHE_SIZE:])
+                cached_latitudes, cached_thetas, last_used = cached_latitudes[kept], cached_thetas[kept], last_used[kept]
+            theta_cache["latitudes"], theta_cache["thetas"], theta_cache["last_used"] = cached_latitudes, cached_thetas, last_used
+            theta_cache["order"] = np.argsort(cached_latitudes, kind="stable")
+        diagnostics["solved_latitudes"] += int(np.count_nonzero(missing))
+        diagnostics["cached_latitudes"] += int(np.count_nonzero(~missing))
+        return thetas[inverse].reshape(np.shape(latitude))[()]
 
     old_bound = get_circle_bound()
     scaler = get_transform_to_fit(old_bound, width, height)
 
     def transform(longitude: float, latitude: float)-> Point:
-        perv_theta = latitude
-        theta = newton_raphson_iteration(perv_theta, latitude)
-        while(abs(theta-perv_theta) > precision):
-            perv_theta, theta = theta, newton_raphson_iteration(theta, latitude)
-
+        theta = get_theta(latitude)
         x = (longitude - reference_longitude) * cos(theta)*2 / pi
         y = sin(theta)
-        return scaler(x,y)
-    return transform
+        return x,y
+    return TransformationPipeline([transform, scaler], diagnostics)
 
 def get_cylindrical_equal_area_projection(width: float, height: float, reference_longitude: float, standard_latitude: float) -> Transformation:
     # https://en.wikipedia.org/wiki/Cylindrical_equal-area_projection
@@ -115,11 +175,10 @@ def get_cylindrical_equal_area_projection(width: float, height: float, reference
     new_bounds = ((x_offset, y_offset),(x_offset+scaled_width, y_offset+scaled_height))
     scaler = get_linear_transform(old_bounds, new_bounds)
     
-    def transform(longitude: float, latitude: float)-> Point:
-        x = (longitude - reference_longitude)
+    def transform(x: float, latitude: float)-> Point:
         y = sin(latitude)
-        return scaler(x,y)
-    return transform
+        return x,y
+    return TransformationPipeline([get_translation(-reference_longitude, 0.0), SeparableTransformation(transform), scaler])
 
 def get_peirce_quincuncial_projection(width: float, height: float, standard_longitude: float) -> Transformation:
     # https://en.wikipedia.org/wiki/Peirce_quincuncial_projection
@@ -127,10 +186,19 @@ def get_peirce_quincuncial_projection(width: float, height: float, standard_long
     new_bound = get_centered_square_bound(width, height)
     scaler = get_linear_transform(old_bound, new_bound)
 
+    # Invalid arguments to the elliptic integrals are counted instead of printed
+    diagnostics = {"invalid_elliptic_arguments": 0}
+
     def transform(longitude: float, latitude: float)-> Point:
-        x,y =  toPeirceQuincuncial(longitude, latitude, standard_longitude)
-        return scaler(x,y)
-    return transform
+        x, y, invalid_count = peirce_quincuncial_arrays(longitude, latitude, standard_longitude)
+        diagnostics["invalid_elliptic_arguments"] += invalid_count
+        return x,y
+
+    def cut_sides(longitude: float, latitude: float) -> np.ndarray:
+        # The southern hemisphere is reflected outward in four triangles split at the meridians 45 degrees off the standard longitude
+        triangle = np.floor((longitude - standard_longitude + pi/4) / (pi/2)) % 4
+        return np.where(latitude < 0, triangle, -1).astype(int)
+    return TransformationPipeline([transform, scaler], diagnostics, cut_sides)
 
 # Middeling Projections
 
@@ -178,10 +246,7 @@ def get_equidistant_conic_projection(width: float, height: float, reference_long
 
     old_bound = ((xMin, yMin),(xMax, yMax))
     scaler = get_transform_to_fit(old_bound, width, height)
-    def transform(longitude: float, latitude: float) -> Point:
-        x,y = unscaled_conical_projection(longitude, latitude)
-        return scaler(x,y)
-    return transform
+    return TransformationPipeline([unscaled_conical_projection, scaler])
 
 # Polar Projections
 
@@ -198,20 +263,27 @@ def get_orthographic_projection(width: float, height: float, origin: Point) -> T
         y = (cos(origin_lat)*sin(latitude)) - (sin(origin_lat) * cos(latitude) * cos(longitude - origin_long))
 
         angular_distance = (sin(origin_lat)* sin(latitude)) + (cos(origin_lat) * cos(latitude) * cos(longitude - origin_long))
-        if angular_distance < 0.0:
-            # The Point is at the oposite side of the planet
-            # We'll camp it to the perimeter
-            if x != 0.0 or y != 0.0:
-                # Normalize x,y
-                norm = np.linalg.norm((x,y))
-                x = x / norm
-                y = y / norm
-            else:
-                # Default for the opposite pole
-                x = 0.0
-                y = 1.0
-        return scaler(x, y)
-    return transform
+        # Points at the oposite side of the planet are clamped to the perimeter
+        opposite_side = angular_distance < 0.0
+        # The opposite pole itself has no direction, we default to (0,1) for it
+        opposite_pole = opposite_side & (x == 0.0) & (y == 0.0)
+        if np.ndim(x) == 0:
+            # np.linalg.norm keeps the scalar results bit-identical to the point-wise implementation
+            norm = np.linalg.norm((x,y))
+        else:
+            norm = sqrt(x*x + y*y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_normalized = x / norm
+            y_normalized = y / norm
+        x = np.where(opposite_pole, 0.0, np.where(opposite_side, x_normalized, x))[()]
+        y = np.where(opposite_pole, 1.0, np.where(opposite_side, y_normalized, y))[()]
+        return x, y
+
+    def cut_sides(longitude: float, latitude: float) -> np.ndarray:
+        # Paths fold at the horizon where they continue along the perimeter
+        angular_distance = (sin(origin_lat)* sin(latitude)) + (cos(origin_lat) * cos(latitude) * cos(longitude - origin_long))
+        return (np.asarray(angular_distance) < 0.0).astype(int)
+    return TransformationPipeline([transform, scaler], cut_sides=cut_sides)
 
 def get_stereographic_projection(width: float, height: float, latitude_limit: float, pole: Pole) -> Transformation:
     # https://en.wikipedia.org/wiki/Stereographic_map_projection
@@ -226,18 +298,16 @@ def get_stereographic_projection(width: float, height: float, latitude_limit: fl
         clamp = get_clamp(((-np.pi, latitude_limit),(np.pi, np.pi/2)))
         normalization_factor = tan(pi/4 - latitude_limit / 2.0)
     
+    # The pole is fixed per projection, so the branch only selects the direction of the angle
+    angle_sign = 1.0 if pole is Pole.NORTHPOLE else -1.0
+
     def transform(longitude: float, latitiude: float)-> Point:
-        longitude, latitiude = clamp(longitude, latitiude)
-        angle = 0.0
-        if pole is Pole.NORTHPOLE:
-            angle = pi/4 + latitiude/2.0
-        if pole is Pole.SOUTHPOLE:
-            angle = pi/4 - latitiude/2.0
+        angle = pi/4 + angle_sign * (latitiude/2.0)
         radius = projection_radius * tan(angle) / normalization_factor
         x = x_center + radius * cos(longitude)
         y = y_center + radius * sin(longitude)
         return x,y
-    return transform
+    return TransformationPipeline([clamp, transform])
 
 def get_lambert_azimuthal_equal_area_projection(width: float, height: float, pole: Pole) -> Transformation:
     # https://en.wikipedia.org/wiki/Lambert_azimuthal_equal-area_projection
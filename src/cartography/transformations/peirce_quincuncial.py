@@ -19,41 +19,69 @@ halfSqrt3 = sqrt(3) / 2
 PeirceQuincuncialScale =3.7081493546027438 # 2*K(1/2)
 PeirceQuincuncialLimit =1.8540746773013719 # K(1/2)
 
+# The Carlson iteration stops once all relative deviations from the mean are below this tolerance
+CARLSON_TOLERANCE = 0.0025
+
 def _ellFaux(cos_phi,sin_phi,k):
+    """
+    Returns the incomplete elliptic integral of the first kind and the number of invalid arguments.
+    All arguments may be arrays.
+    """
     x = cos_phi * cos_phi
     y = 1.0 - k * k * sin_phi * sin_phi
-    z = 1.0
-    rf = _ellRF(x,y,z)
-    return (sin_phi * rf)
+    z = np.ones(np.shape(x))
+    rf, invalid_count = _ellRF(x,y,z)
+    return (sin_phi * rf), invalid_count
 
 def _ellRF(x,y,z):
-    if (x < 0.0 or y < 0.0 or z < 0.0):
-        print("Negative argument to Carlson's ellRF")
-        print("ellRF negArgument")
-
-    delx = 1.0 
-    dely = 1.0 
-    delz = 1.0
-    mean = 1.0
-    while(abs(delx) > 0.0025 or  abs(dely) > 0.0025 or abs(delz) > 0.0025):
-        sx = np.sqrt(x)
-        sy = np.sqrt(y)
-        sz = np.sqrt(z)
-        lenght = sx * (sy + sz) + sy * sz
-        x = 0.25 * (x + lenght)
-        y = 0.25 * (y + lenght)
-        z = 0.25 * (z + lenght)
-        mean = (x + y + z) / 3.0
-        delx = (mean - x) / mean
-        dely = (mean - y) / mean
-        delz = (mean - z) / mean
-    e2 = delx * dely - delz * delz
-    e3 = delx * dely * delz
-    return((1.0 + (e2 / 24.0 - 0.1 - 3.0 * e3 / 44.0) * e2+ e3 / 14) / sqrt(mean))
+    """
+    Carlson's elliptic integral RF for arrays of arguments.
+    The iteration runs on all entries at once, entries that have converged are kept fixed
+    so every entry gets the same result as if it was computed on its own.
+    Negative (or NaN) arguments have no valid result, their number is returned alongside the result.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z = np.asarray(z, dtype=float)
+    invalid_count = int(np.count_nonzero(~((x >= 0.0) & (y >= 0.0) & (z >= 0.0))))
+
+    delx = np.ones(x.shape)
+    dely = np.ones(x.shape)
+    delz = np.ones(x.shape)
+    mean = np.ones(x.shape)
+    active = np.ones(x.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        while np.any(active):
+            sx = np.sqrt(x)
+            sy = np.sqrt(y)
+            sz = np.sqrt(z)
+            lenght = sx * (sy + sz) + sy * sz
+            x = np.where(active, 0.25 * (x + lenght), x)
+            y = np.where(active, 0.25 * (y + lenght), y)
+            z = np.where(active, 0.25 * (z + lenght), z)
+            mean = np.where(active, (x + y + z) / 3.0, mean)
+            delx = np.where(active, (mean - x) / mean, delx)
+            dely = np.where(active, (mean - y) / mean, dely)
+            delz = np.where(active, (mean - z) / mean, delz)
+            active = (np.abs(delx) > CARLSON_TOLERANCE) | (np.abs(dely) > CARLSON_TOLERANCE) | (np.abs(delz) > CARLSON_TOLERANCE)
+        e2 = delx * dely - delz * delz
+        e3 = delx * dely * delz
+        rf = (1.0 + (e2 / 24.0 - 0.1 - 3.0 * e3 / 44.0) * e2+ e3 / 14) / sqrt(mean)
+    return rf[()], invalid_count
 
 def toPeirceQuincuncial(longitude: float, latitude: float, standard_longitude=0.34906585):
+    X, Y, _ = peirce_quincuncial_arrays(longitude, latitude, standard_longitude)
+    return X, Y
+
+def peirce_quincuncial_arrays(longitude: float, latitude: float, standard_longitude=0.34906585):
+    """
+    Computes the Peirce Quincuncial projection for floats or whole arrays of longitudes and latitudes.
+    Returns the x and y coordinates and the number of invalid arguments to the elliptic integrals.
+    """
+    longitude = np.asarray(longitude, dtype=float)
+    latitude = np.asarray(latitude, dtype=float)
     # Convert latitude and longitude to radians relative to the central meridian
-    longitude -= standard_longitude
+    longitude = longitude - standard_longitude
 
     # Compute the auxiliary quantities 'm' and 'n'. Set 'm' to match
     # the sign of 'lambda' and 'n' to be positive if |lambda| > pi/2
@@ -61,57 +89,42 @@ def toPeirceQuincuncial(longitude: float, latitude: float, standard_longitude=0.
     cos_phiosqrt2 = halfSqrt2 * cos(latitude)
     cos_lambda = cos(longitude)
     sin_lambda = sin(longitude)
-    cos_a = min(1.0, cos_phiosqrt2 * (sin_lambda + cos_lambda))
-    cos_b = min(1.0, cos_phiosqrt2 * (sin_lambda - cos_lambda))
+    cos_a = np.minimum(1.0, cos_phiosqrt2 * (sin_lambda + cos_lambda))
+    cos_b = np.minimum(1.0, cos_phiosqrt2 * (sin_lambda - cos_lambda))
     sin_a = sqrt(1.0 - cos_a * cos_a)
     sin_b = sqrt(1.0 - cos_b * cos_b)
     cos_a_cos_b = cos_a * cos_b
     sin_a_sin_b = sin_a * sin_b
-    sin2_m = 1.0 + cos_a_cos_b - sin_a_sin_b
-    sin2_n = 1.0 - cos_a_cos_b - sin_a_sin_b
-    if (sin2_m < 0.0):
-        sin2_m = 0.0
-    
+    sin2_m = np.maximum(0.0, 1.0 + cos_a_cos_b - sin_a_sin_b)
+    sin2_n = np.maximum(0.0, 1.0 - cos_a_cos_b - sin_a_sin_b)
+
     sin_m = sqrt(sin2_m)
-    if (sin2_m > 1.0):
-        sin2_m = 1.0
-    
-    cos_m = sqrt(1.0 - sin2_m)
-    if (sin_lambda < 0.0):
-        sin_m = -sin_m
-    
-    if (sin2_n < 0.0):
-        sin2_n = 0.0
-    
+    cos_m = sqrt(1.0 - np.minimum(1.0, sin2_m))
+    sin_m = np.where(sin_lambda < 0.0, -sin_m, sin_m)
+
     sin_n = sqrt(sin2_n)
-    if (sin2_n > 1.0):
-        sin2_n = 1.0 
-    
-    cos_n = sqrt(1.0 - sin2_n)
-    if (cos_lambda > 0.0):
-       sin_n = -sin_n
-    
+    cos_n = sqrt(1.0 - np.minimum(1.0, sin2_n))
+    sin_n = np.where(cos_lambda > 0.0, -sin_n, sin_n)
+
     # Compute elliptic integrals to map the disc to the square
 
-    x = _ellFaux(cos_m,sin_m,halfSqrt2)
-    y = _ellFaux(cos_n,sin_n,halfSqrt2)
+    x, invalid_m = _ellFaux(cos_m,sin_m,halfSqrt2)
+    y, invalid_n = _ellFaux(cos_n,sin_n,halfSqrt2)
 
     # Reflect the Southern Hemisphere outward
 
-    if(latitude < 0):
-        if (longitude < mthreequarterpi):
-            y = PeirceQuincuncialScale - y
-        elif (longitude < mquarterpi):
-            x = -PeirceQuincuncialScale - x
-        elif (longitude < quarterpi):
-            y = -PeirceQuincuncialScale - y
-        elif (longitude < threequarterpi):
-            x = PeirceQuincuncialScale - x
-        else:
-            y = PeirceQuincuncialScale - y
-    
+    southern = latitude < 0
+    reflect_y_up = southern & ((longitude < mthreequarterpi) | (longitude >= threequarterpi))
+    reflect_x_left = southern & (longitude >= mthreequarterpi) & (longitude < mquarterpi)
+    reflect_y_down = southern & (longitude >= mquarterpi) & (longitude < quarterpi)
+    reflect_x_right = southern & (longitude >= quarterpi) & (longitude < threequarterpi)
+    x = np.where(reflect_x_left, -PeirceQuincuncialScale - x, x)
+    x = np.where(reflect_x_right, PeirceQuincuncialScale - x, x)
+    y = np.where(reflect_y_up, PeirceQuincuncialScale - y, y)
+    y = np.where(reflect_y_down, -PeirceQuincuncialScale - y, y)
+
     # return x,y 
     # Rotate the square by 45 degrees to fit the screen better
     X = (x - y) # * halfSqrt2
     Y = (x + y) # * halfSqrt2
-    return X,Y
\ No newline at end of file
+    return X[()], Y[()], invalid_m + invalid_n
@@ -1,3 +1,4 @@
+from math import copysign, degrees
 import numpy as np
 from cartography.projection_types import Point
 from cartography.cubic_spline import CubicSplineInterpolator
@@ -35,9 +36,15 @@ def get_robinson_factors(latitiude: float) -> Point:
     """
     Implementation of the Robinson lookup table. 
     It uses cubic spline interpolation for any points between the set values.
+    The latitude may either be a float or a numpy array.
     """
+    if isinstance(latitiude, float):
+        # Plain floats avoid the overhead of numpy scalars
+        absolute_latitiude_in_degrees = degrees(abs(latitiude))
+        y = _robinson_y_spline.evaluate_scalar(absolute_latitiude_in_degrees)
+        return _robinson_x_spline.evaluate_scalar(absolute_latitiude_in_degrees), copysign(y, latitiude)
     factor_sign = np.sign(latitiude)
-    absolute_latitiude_in_degrees = abs(latitiude)* 180 / np.pi
+    absolute_latitiude_in_degrees = np.abs(latitiude)* 180 / np.pi
     x = _robinson_x_spline.evaluate(absolute_latitiude_in_degrees)
     y = _robinson_y_spline.evaluate(absolute_latitiude_in_degrees)
     return x, y*factor_sign
\ No newline at end of file
@@ -0,0 +1,86 @@
+from typing import Tuple
+import numpy as np
+
+"""
+Neighbouring segments share their end points, and the vertices of a map often appear in several paths
+(e.g. the corners of neighbouring areas). The VertexMemo remembers the projection of such points
+by their exact input coordinates, so every vertex is only projected once.
+
+A dictionary lookup per point costs more than projecting the point with a vectorized kernel,
+so the memo is a sorted array instead: every input point (x, y) is stored as the complex number x + iy,
+which numpy orders by x and then by y without any rounding, and all points of a call are looked up
+with a single binary search.
+"""
+
+# Fraction of the oldest entries that are dropped when the memo is full
+EVICTION_FRACTION = 0.25
+
+class VertexMemo:
+    """
+    A bounded map from exact input points (x, y) to their projected points.
+    All lookups work on arrays, so vectorized callers can split their points into cached and uncached points.
+    When the memo is full the oldest entries are dropped.
+    """
+    def __init__(self, maximal_size=1 << 16) -> None:
+        self.maximal_size = maximal_size
+        # The sorted input points and for every input point the projected point and the store it was added in
+        self.keys = np.empty(0, dtype=complex)
+        self.values = np.empty((0, 2))
+        self.ages = np.empty(0, dtype=int)
+        self.hits = 0
+        self.misses = 0
+        self._age = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns a mask of the points that are in the memo and the projected x and y values.
+        The projected values of points that are not in the memo are undefined.
+        """
+        queries = _get_keys(x, y)
+        if len(self.keys) == 0:
+            found = np.zeros(len(queries), dtype=bool)
+            self.misses += len(queries)
+            return found, np.empty(len(queries)), np.empty(len(queries))
+        indices = np.minimum(np.searchsorted(self.keys, queries), len(self.keys) - 1)
+        found = self.keys[indices] == queries
+        values = self.values[indices]
+        hit_count = int(np.count_nonzero(found))
+        self.hits += hit_count
+        self.misses += len(queries) - hit_count
+        return found, values[:, 0], values[:, 1]
+
+    def store(self, x: np.ndarray, y: np.ndarray, projected_x: np.ndarray, projected_y: np.ndarray):
+        """
+        Stores the projected points of the given input points, which must not be in the memo yet.
+        """
+        keys, first = np.unique(_get_keys(x, y), return_index=True)
+        values = np.column_stack(np.broadcast_arrays(projected_x, projected_y))[first]
+        positions = np.searchsorted(self.keys, keys)
+        self.keys = np.insert(self.keys, positions, keys)
+        self.values = np.insert(self.values, positions, values, axis=0)
+        self.ages = np.insert(self.ages, positions, self._age)
+        self._age += 1
+        if len(self.keys) > self.maximal_size:
+            self._evict()
+
+    def clear(self):
+        self.keys = self.keys[:0]
+        self.values = self.values[:0]
+        self.ages = self.ages[:0]
+
+    def _evict(self):
+        # Keeps the newest entries in their sorted order
+        kept_size = int(self.maximal_size * (1 - EVICTION_FRACTION))
+        kept = np.sort(np.argsort(self.ages, kind="stable")[len(self.ages) - kept_size:])
+        self.keys = self.keys[kept]
+        self.values = self.values[kept]
+        self.ages = self.ages[kept]
+
+def _get_keys(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    keys = np.empty(np.broadcast(x, y).size, dtype=complex)
+    keys.real = x
+    keys.imag = y
+    return keys
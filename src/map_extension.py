@@ -1,41 +1,107 @@
 from abc import ABC, abstractmethod
+from typing import List
 import enum
+import os
 from cartography.projection_builder import ProjectionBuilder
 import inkex
 from inkex import PathElement, ShapeElement, Group
 from cartography.projection import Projection
+from cartography.instrumentation import Instrumentation
 
 class MapEffect(inkex.EffectExtension, ABC):
     def add_arguments(self, pars):
         pars.add_argument("--tab")
+        pars.add_argument("--approximator", type=str, default="equidistant", help="The approximator to use: equidistant or adaptive")
         pars.add_argument("--precision", type=float, help="The approximator tolerance")
         pars.add_argument("--maximal_resolution", type=int, help="The maximal resolution of the approximator")
         pars.add_argument("--increment", type=int, help="The resolution increment of the approximator")
+        pars.add_argument("--incremental", type=inkex.Boolean, default=False, help="Refine on nested grids by doubling the resolution")
+        pars.add_argument("--maximal_depth", type=int, default=10, help="The maximal subdivision depth of the adaptive approximator")
 
+        pars.add_argument("--simplification", type=str, default="none", help="Simplify the approximated curves within the tolerance: none, douglas_peucker or visvalingam")
+        pars.add_argument("--output_mode", type=str, default="lines", help="Write the projected curves as lines or as fitted curves")
+        pars.add_argument("--clipping", type=inkex.Boolean, default=False, help="Cut open paths at the visibility bounds instead of clamping them")
         pars.add_argument("--z_limit", type=float, help="The minimal z_value that causes a jump fill")
         pars.add_argument("--z_fill", type=int, help="Number of points to fill into a jump")
+        pars.add_argument("--z_mode", type=str, default="uniform", help="Fill jumps with z_fill evenly spread points (uniform) or bisect them down to the tolerance (bisection)")
+        pars.add_argument("--workers", type=int, default=1, help="Number of processes used to project the paths")
+        pars.add_argument("--lookup_tolerance", type=float, default=0.0, help="Maximal error of the lookup grid, 0.0 disables the lookup grid")
+        pars.add_argument("--instrumentation", type=inkex.Boolean, default=False, help="Report counters and the time spent in every phase")
+        pars.add_argument("--trace_file", type=str, default="", help="Write the timings of the performance report to this Chrome trace file")
+        pars.add_argument("--cache_directory", type=str, default="", help="Directory of the cache of projected paths, relative to the document. Empty disables the cache")
+        pars.add_argument("--cache_size", type=int, default=100, help="Maximal size of the cache in MB")
+        pars.add_argument("--clear_cache", type=inkex.Boolean, default=False, help="Remove all projected paths from the cache before projecting")
+        # Used by the batch command line (project_maps.py), Inkscape always passes a selection
+        pars.add_argument("--select_all", type=inkex.Boolean, default=False, help="Project every element of the document instead of the selection")
+        pars.add_argument("--keep_original", type=inkex.Boolean, default=True, help="Keep the original elements next to their projection")
         
 
     def create_projection_builder(self, width, height) -> ProjectionBuilder:
         precision = self.options.precision
         maximal_resolution = self.options.maximal_resolution
         increment = self.options.increment
+        incremental = self.options.incremental
+        maximal_depth = self.options.maximal_depth
         z_limit = self.options.z_limit
         z_fill = self.options.z_fill
 
-        return ProjectionBuilder()\
+        builder = ProjectionBuilder()\
                 .with_logger(self.msg)\
-                .from_equirectangular(width, height)\
-                .with_equidistant_approximator(precision, maximal_resolution, increment, z_limit, z_fill)           
+                .with_instrumentation(self.instrumentation)\
+                .with_workers(self.options.workers)\
+                .with_lookup_grid(self.options.lookup_tolerance)\
+                .with_simplification(self.options.simplification)\
+                .with_curve_fitting(self.options.output_mode == "curves")\
+                .with_clipping(self.options.clipping)\
+                .from_equirectangular(width, height)
+        if self.options.cache_directory != "":
+            builder.with_cache(self.get_cache_directory(), self.options.cache_size * 1024 * 1024)
+        if self.options.approximator == "adaptive":
+            return builder.with_adaptive_approximator(precision, maximal_depth)
+        return builder.with_equidistant_approximator(precision, maximal_resolution, increment, z_limit, z_fill, incremental, self.options.z_mode == "bisection")
 
     def effect(self):
+        # The instrumentation is disabled unless a performance report is requested
+        self.instrumentation = Instrumentation(enabled=self.options.instrumentation or self.options.trace_file != "")
         width, height = self.svg.viewport_width, self.svg.viewport_height  
         width, height = self.svg.unittouu(width), self.svg.unittouu(height)
         
-        builder = self.create_projection_builder(width, height)
-        projection = self.get_projection(builder, width, height)
+        with self.instrumentation.phase("build projection"):
+            builder = self.create_projection_builder(width, height)
+            projection = self.get_projection(builder, width, height)
+        if self.options.clear_cache and projection.cache is not None:
+            projection.cache.clear()
 
-        for elem in self.svg.selection:
+        # All paths of the selection are projected together in a single batch
+        with self.instrumentation.phase("copy selection"):
+            path_elements = self.copy_selection()
+        with self.instrumentation.phase("transform"):
+            projection.transform_elements(path_elements)
+
+        if self.options.instrumentation:
+            for line in self.instrumentation.summary():
+                self.msg(line)
+        if self.options.trace_file != "":
+            self.instrumentation.write_chrome_trace(self.options.trace_file)
+    
+    def get_cache_directory(self) -> str:
+        """
+        Returns the cache directory, relative directories are relative to the directory of the document.
+        """
+        directory = os.path.expanduser(self.options.cache_directory)
+        if isinstance(self.options.input_file, str):
+            directory = os.path.join(os.path.dirname(os.path.abspath(self.options.input_file)), directory)
+        return directory
+
+    def copy_selection(self) -> List[PathElement]:
+        """
+        Copies the selection (or the whole document with --select_all) and returns all paths in the copies.
+        """
+        selection = self.svg.selection
+        if self.options.select_all:
+            selection = [child for child in self.svg if isinstance(child, ShapeElement)]
+        path_elements = []
+        for elem in selection:
             elem_copy = elem.copy()
             if isinstance(elem_copy, ShapeElement) and not isinstance(elem_copy, Group):
                 elem_copy = elem_copy.to_path_element()
@@ -44,16 +110,27 @@ class MapEffect(inkex.EffectExtension, ABC):
             else:
                 elem_copy.set_id(elem.get_id()+"_projection")
             
-            elem.getparent().add(elem_copy)
-            self.apply_projection(elem_copy, projection)
-    
+            if self.options.keep_original:
+                elem.getparent().add(elem_copy)
+            else:
+                elem.replace_with(elem_copy)
+            path_elements.extend(self.collect_path_elements(elem_copy))
+        return path_elements
+
     @abstractmethod
     def get_projection(self, projection_builder: ProjectionBuilder, width: float, height: float) -> Projection:
         pass
 
     def apply_projection(self, element, projection: Projection):
+        projection.transform_elements(self.collect_path_elements(element))
+
+    def collect_path_elements(self, element) -> List[PathElement]:
+        """
+        Returns all paths in the element and its children. Any other shape is converted to a path.
+        """
+        path_elements = []
         if isinstance(element, PathElement):
-            projection.transform(element)
+            path_elements.append(element)
         elif isinstance(element, ShapeElement) and not isinstance(element, Group):
             # Convert element to path
             element.composed_transform()
@@ -65,8 +142,9 @@ class MapEffect(inkex.EffectExtension, ABC):
                     found_index = index
                     break
             parent[found_index] = path
-            projection.transform(path)
+            path_elements.append(path)
         
         # Recursion
         for elem in element:
-            self.apply_projection(elem, projection)
+            path_elements.extend(self.collect_path_elements(elem))
+        return path_elements
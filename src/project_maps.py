@@ -0,0 +1,196 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from time import perf_counter
+from copy import deepcopy
+from typing import Dict, List, Tuple, Type
+import glob
+import inspect
+import os
+import sys
+from inkex import load_svg
+from lxml import etree
+from cartography.instrumentation import Instrumentation
+from cartography.multi_projection import MultiProjection
+from map_extension import MapEffect
+
+"""
+Projects SVG files from the command line without Inkscape, e.g.
+
+    python src/project_maps.py --projection mercator --latitude_limit=80 maps/*.svg
+
+The projections are the *_extension.py files next to this script. Every extension runs exactly as it would in Inkscape,
+except that it projects the whole document instead of the selection. The defaults of all parameters are read from the
+.inx file of the extension, any parameter of the .inx file (e.g. --latitude_limit=80 or --precision=0.05) overrides its default.
+Every output is written next to its input as <name>_<projection>.svg.
+
+Several projections can be given at once, e.g. --projection mercator,robinson,orthographic.
+The document is then parsed and converted to longitudes and latitudes only once for all of them (see multi_projection.py).
+Every projection only receives the parameters of its own .inx file.
+"""
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+INX_DIRECTORY = os.path.dirname(SOURCE_DIRECTORY)
+INX_NAMESPACE = "{http://www.inkscape.org/namespace/inkscape/extension}"
+
+def get_projection_names() -> List[str]:
+    """
+    Returns the names of all projections, i.e. of all extensions with an .inx file.
+    """
+    names = []
+    for file_name in sorted(glob.glob(os.path.join(SOURCE_DIRECTORY, "*_extension.py"))):
+        name = os.path.basename(file_name)[:-len("_extension.py")]
+        if os.path.exists(get_inx_file(name)):
+            names.append(name)
+    return names
+
+def get_inx_file(projection: str) -> str:
+    return os.path.join(INX_DIRECTORY, f"{projection}_extension.inx")
+
+def get_effect_class(projection: str) -> Type[MapEffect]:
+    module = import_module(f"{projection}_extension")
+    for _, member in inspect.getmembers(module, inspect.isclass):
+        if issubclass(member, MapEffect) and member is not MapEffect:
+            return member
+    raise ValueError(f"The extension {projection} does not contain a MapEffect")
+
+def get_default_arguments(projection: str) -> Dict[str, str]:
+    """
+    Returns the default of every parameter in the .inx file of the projection.
+    The default of an option group is its first option, just like in Inkscape.
+    """
+    defaults = {}
+    for param in etree.parse(get_inx_file(projection)).iter(f"{INX_NAMESPACE}param"):
+        param_type = param.get("type")
+        if param_type == "notebook":
+            continue
+        value = (param.text or "").strip()
+        if param_type == "optiongroup" and value == "":
+            options = param.findall(f"{INX_NAMESPACE}option")
+            value = options[0].get("value") if len(options) > 0 else ""
+        defaults[param.get("name")] = value
+    return defaults
+
+def get_input_files(inputs: List[str], suffixes: List[str]) -> List[str]:
+    """
+    Returns all given files and the SVG files in all given directories, except for previous outputs.
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(file_name for file_name in sorted(glob.glob(os.path.join(path, "*.svg")))\
+                if not any(file_name.endswith(suffix + ".svg") for suffix in suffixes))
+        else:
+            files.append(path)
+    return files
+
+def get_output_file(input_file: str, suffix: str) -> str:
+    stem, _ = os.path.splitext(input_file)
+    return stem + suffix + ".svg"
+
+def project_file(projection: str, input_file: str, output_file: str, arguments: List[str]) -> Tuple[str, float, str]:
+    """
+    Projects a single file and returns the input file, the time it took and an error message (empty on success).
+    """
+    start = perf_counter()
+    try:
+        effect = get_effect_class(projection)()
+        effect.run(arguments + ["--select_all=true", f"--output={output_file}", input_file])
+    except (Exception, SystemExit) as error:
+        return input_file, perf_counter() - start, str(error) or type(error).__name__
+    return input_file, perf_counter() - start, ""
+
+def project_file_multiple(projections: List[str], input_file: str, output_files: List[str], arguments: List[List[str]]) -> Tuple[str, float, str]:
+    """
+    Projects a single file into several projections from one shared parse of the document.
+    Returns the input file, the time it took and an error message (empty on success).
+    """
+    start = perf_counter()
+    try:
+        document = load_svg(input_file)
+        svg = document.getroot()
+        width, height = svg.unittouu(svg.viewport_width), svg.unittouu(svg.viewport_height)
+        effects = []
+        for projection, projection_arguments in zip(projections, arguments):
+            effect = get_effect_class(projection)()
+            effect.parse_arguments(projection_arguments + ["--select_all=true"])
+            effect.svg = svg
+            effect.instrumentation = Instrumentation(enabled=False)
+            effects.append(effect)
+        multi_projection = MultiProjection([effect.get_projection(effect.create_projection_builder(width, height), width, height)\
+            for effect in effects])
+
+        prepared, source = multi_projection.prepare_elements(effects[0].copy_selection())
+        transformed = multi_projection.transform_paths(source)
+        # Every projection is written into its own copy of the prepared document,
+        # the elements are found again by their position in the document
+        positions = {element: index for index, element in enumerate(svg.iter())}
+        for projection, transformed_paths, output_file in zip(multi_projection.projections, transformed, output_files):
+            target_document = deepcopy(document)
+            target_elements = list(target_document.getroot().iter())
+            targets = [(target_elements[positions[path_element]], transformation) for path_element, transformation in prepared]
+            projection._write_elements(targets, transformed_paths)
+            target_document.write(output_file)
+    except (Exception, SystemExit) as error:
+        return input_file, perf_counter() - start, str(error) or type(error).__name__
+    return input_file, perf_counter() - start, ""
+
+def main(arguments: List[str] = None) -> int:
+    parser = ArgumentParser(description="Projects equirectangular SVG maps without Inkscape. "\
+        "Further --name=value arguments set the parameters of the projection and the approximator (see the .inx files).")
+    parser.add_argument("--projection", required=True, help="The projection to apply, several projections are separated by commas")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of files projected at the same time")
+    parser.add_argument("--suffix", default=None, help="Suffix of the output files, _<projection> by default (only for a single projection)")
+    parser.add_argument("--replace", action="store_true", help="Replace the original elements instead of keeping them next to their projection")
+    parser.add_argument("inputs", nargs="+", help="SVG files or directories containing SVG files")
+    options, parameters = parser.parse_known_args(arguments)
+
+    projections = options.projection.split(",")
+    for projection in projections:
+        if projection not in get_projection_names():
+            parser.error(f"unknown projection {projection}, choose from {', '.join(get_projection_names())}")
+    # Parameters given on the command line come last, so they override the defaults
+    names = [parameter[2:].split("=")[0] for parameter in parameters]
+    arguments = []
+    for projection in projections:
+        defaults = get_default_arguments(projection)
+        if len(projections) == 1:
+            projection_parameters = parameters
+        else:
+            projection_parameters = [parameter for name, parameter in zip(names, parameters) if name in defaults]
+        arguments.append([f"--{name}={value}" for name, value in defaults.items()] + projection_parameters)
+        if options.replace:
+            arguments[-1].append("--keep_original=false")
+    unknown = [name for name in names if all(name not in get_default_arguments(projection) for projection in projections)]
+    if len(projections) > 1 and len(unknown) > 0:
+        parser.error(f"unknown parameters: {', '.join(unknown)}")
+    suffixes = ["_" + projection for projection in projections]
+    if options.suffix is not None and len(projections) == 1:
+        suffixes = [options.suffix]
+
+    input_files = get_input_files(options.inputs, suffixes)
+    start = perf_counter()
+    with ProcessPoolExecutor(max(1, min(options.jobs, len(input_files)))) as executor:
+        if len(projections) == 1:
+            futures = [executor.submit(project_file, projections[0], input_file, get_output_file(input_file, suffixes[0]), arguments[0])\
+                for input_file in input_files]
+        else:
+            futures = [executor.submit(project_file_multiple, projections, input_file,\
+                [get_output_file(input_file, suffix) for suffix in suffixes], arguments) for input_file in input_files]
+        results = [future.result() for future in futures]
+    total = perf_counter() - start
+
+    failures = 0
+    for input_file, seconds, error in results:
+        if error == "":
+            output_files = ", ".join(get_output_file(input_file, suffix) for suffix in suffixes)
+            print(f"{seconds:8.2f} s  {input_file} -> {output_files}")
+        else:
+            failures += 1
+            print(f"{seconds:8.2f} s  {input_file} failed: {error}")
+    print(f"Projected {len(results) - failures} of {len(results)} files in {total:.2f} s "\
+        f"({sum(seconds for _, seconds, _ in results):.2f} s of processing time)")
+    return 1 if failures > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
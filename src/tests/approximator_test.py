@@ -1,8 +1,9 @@
 from tests.test_2D import Test2D
-from cartography.approximator import get_equidistant_approximator
+from cartography.approximator import get_adaptive_approximator, get_adaptive_batch_approximator, get_equidistant_approximator, get_equidistant_batch_approximator
 from numpy import pi, sin, cos, linspace
+import numpy as np
 from cartography.projection_types import Point
-from cartography.basis_function import get_line_function
+from cartography.basis_function import SegmentBatch, get_arc_function, get_cubic_bezier_function, get_line_function
 from typing import List
 
 class EquidistantApproximatorTest(Test2D):
@@ -35,9 +36,7 @@ class EquidistantApproximatorTest(Test2D):
     def test_z_score(self):
         def jump_parabola(t: float) -> Point:
             scaled_t = 10*t
-            if t < 0.5:
-                return (scaled_t, scaled_t*scaled_t)
-            return (scaled_t, scaled_t*scaled_t+10)
+            return (scaled_t, scaled_t*scaled_t + np.where(t < 0.5, 0, 10))
         approximator = get_equidistant_approximator(0.001, 40, 1, 3.0, 5)
         points = approximator(jump_parabola)
         self.assertEqual(45, len(points))
@@ -62,6 +61,155 @@ class EquidistantApproximatorTest(Test2D):
             x,_ = fill_point
             self.assertAlmostEqual(low_bound + (i+1)*fill_size, x)
 
+    def test_z_bisection(self):
+        def jump_parabola(t: float) -> Point:
+            scaled_t = 10*t
+            return (scaled_t, scaled_t*scaled_t + np.where(t < 0.37, 0, 10))
+        approximator = get_equidistant_approximator(0.001, 40, 1, 3.0, 5, z_bisection=True)
+        points = approximator(jump_parabola)
+        x_values = [x for x,_ in points]
+        self.assertEqual(sorted(x_values), x_values)
+        # The points on both sides of the jump are right next to it
+        jump_position = next(i for i, (x, y) in enumerate(points) if y - x*x > 5)
+        self.assertLessEqual(x_values[jump_position-1], 3.7)
+        self.assertGreaterEqual(x_values[jump_position], 3.7)
+        self.assertLess(x_values[jump_position] - x_values[jump_position-1], 0.001)
+        # Only the jump was bisected, all other points are evenly distributed
+        self.assertLess(len(points), 40+25)
+
+
+class NestedGridApproximatorTest(Test2D):
+    def test_simple_line(self):
+        line = get_line_function((0,0), (100, -10))
+        approximator = get_equidistant_approximator(0.1, 100, 1, 0.0, 0, incremental=True)
+        points = approximator(line)
+        self.assertEqual(2, len(points))
+        self.assertPointEqual((0,0), points[0])
+        self.assertPointEqual((100,-10), points[1])
+
+    def test_precision(self):
+        circle = get_circle_function((0,0), 100)
+        point_count = 5000
+        approximator = get_equidistant_approximator(0.0001, point_count, 1, 0.0, 0, incremental=True)
+        points = approximator(circle)
+        # The nested grids are always of size 2^n + 1
+        self.assertEqual(4097, len(points))
+        approximated_circle = get_approximated_function(points)
+        self.assertFunctionEqual(circle, approximated_circle, 0.0, 1.0, point_count+10, 3)
+
+    def test_max_point_count(self):
+        circle = get_circle_function((0,0), 100)
+        approximator = get_equidistant_approximator(0.0001, 12, 1, 0.0, 0, incremental=True)
+        points = approximator(circle)
+        self.assertEqual(12, len(points))
+        self.assertPointEqual((100,0), points[0])
+        self.assertPointEqual((100,0), points[-1])
+
+    def test_no_duplicate_evaluations(self):
+        circle = get_circle_function((0,0), 100)
+        evaluated_t_values = []
+        def counting_circle(t):
+            evaluated_t_values.extend(np.atleast_1d(t))
+            return circle(t)
+        approximator = get_equidistant_approximator(0.001, 1000, 1, 0.0, 0, incremental=True)
+        points = approximator(counting_circle)
+        self.assertEqual(len(evaluated_t_values), len(set(evaluated_t_values)))
+        # Every level checks its midpoints so we evaluate about twice the number of output points
+        self.assertLessEqual(len(evaluated_t_values), 2*len(points))
+
+    def test_z_score(self):
+        def jump_parabola(t: float) -> Point:
+            scaled_t = 10*t
+            return (scaled_t, scaled_t*scaled_t + np.where(t < 0.5, 0, 10))
+        approximator = get_equidistant_approximator(0.001, 33, 1, 3.0, 5, incremental=True)
+        points = approximator(jump_parabola)
+        self.assertEqual(38, len(points))
+        # The jump happens between point 16 (t=0.5) and point 15 (t=15/32)
+        x_values = [x for x,_ in points]
+        self.assertAlmostEqual(7.5*10/16, x_values[15])
+        self.assertAlmostEqual(5.0, x_values[21])
+        for i in range(5):
+            self.assertLess(x_values[15+i], x_values[16+i])
+
+class AdaptiveApproximatorTest(Test2D):
+    def test_simple_line(self):
+        line = get_line_function((0,0), (100, -10))
+        approximator = get_adaptive_approximator(0.1, 10)
+        points = approximator(line)
+        self.assertEqual(2, len(points))
+        self.assertPointEqual((0,0), points[0])
+        self.assertPointEqual((100,-10), points[1])
+
+    def test_maximal_depth(self):
+        circle = get_circle_function((0,0), 100)
+        approximator = get_adaptive_approximator(0.0001, 3)
+        points = approximator(circle)
+        # A circle is split everywhere => 2^3 lines
+        self.assertEqual(9, len(points))
+        self.assertPointEqual((100,0), points[0])
+        self.assertPointEqual((-100,0), points[4])
+        self.assertPointEqual((100,0), points[8])
+
+    def test_precision(self):
+        circle = get_circle_function((0,0), 100)
+        approximator = get_adaptive_approximator(0.001, 14)
+        points = approximator(circle)
+        approximated_circle = get_approximated_function(points)
+        self.assertFunctionEqual(circle, approximated_circle, 0.0, 1.0, 1000, 2)
+
+    def test_local_refinement(self):
+        # A line with a small bump in its middle
+        def bump(t: float) -> Point:
+            return (100*t, 10*np.exp(-((t-0.5)*40)**2))
+        precision = 0.01
+        adaptive_points = get_adaptive_approximator(precision, 14)(bump)
+        equidistant_points = get_equidistant_approximator(precision, 10000, 1, 0.0, 0, incremental=True)(bump)
+        self.assertLess(2*len(adaptive_points), len(equidistant_points))
+        # The points are in order and refined around the bump only
+        x_values = [x for x,_ in adaptive_points]
+        self.assertEqual(sorted(x_values), x_values)
+        self.assertGreater(sum(1 for x in x_values if 40 <= x <= 60), len(x_values) / 2)
+
+class BatchApproximatorTest(Test2D):
+    """
+    Approximating a batch of segments must yield the same points as approximating every segment on its own.
+    """
+    def _get_test_segments(self):
+        return [
+            get_line_function((0,0), (100, -10)),
+            get_arc_function((0,0), (50,50), (50,50), 0, True, False),
+            get_cubic_bezier_function((0,0), (0,80), (80,-80), (80,0)),
+            get_line_function((-5,3), (-5,3)),
+            get_arc_function((10,10), (0,0), (7,7), 0, False, True),
+        ]
+
+    def assertBatchMatchesSegments(self, batch_approximator, approximator):
+        segments = self._get_test_segments()
+        segment_indices, t_values, points = batch_approximator(SegmentBatch(segments), len(segments))
+        for index, segment in enumerate(segments):
+            expected = approximator(segment)
+            selected = segment_indices == index
+            self.assertEqual(len(expected), np.count_nonzero(selected))
+            self.assertEqual(sorted(t_values[selected]), list(t_values[selected]))
+            for expected_point, point in zip(expected, points[selected]):
+                self.assertPointEqual(expected_point, point, 10)
+
+    def test_equidistant(self):
+        self.assertBatchMatchesSegments(get_equidistant_batch_approximator(0.1, 35, 2, 0.0, 0), get_equidistant_approximator(0.1, 35, 2, 0.0, 0))
+
+    def test_nested_grid(self):
+        self.assertBatchMatchesSegments(get_equidistant_batch_approximator(0.1, 20, 1, 0.0, 0, True), get_equidistant_approximator(0.1, 20, 1, 0.0, 0, True))
+
+    def test_z_score(self):
+        self.assertBatchMatchesSegments(get_equidistant_batch_approximator(0.5, 35, 1, 1.5, 3), get_equidistant_approximator(0.5, 35, 1, 1.5, 3))
+
+    def test_adaptive(self):
+        self.assertBatchMatchesSegments(get_adaptive_batch_approximator(0.01, 8), get_adaptive_approximator(0.01, 8))
+
+    def test_empty_batch(self):
+        segment_indices, t_values, points = get_equidistant_batch_approximator(0.1, 35, 1, 1.0, 4)(SegmentBatch([]), 0)
+        self.assertEqual(0, len(segment_indices))
+        self.assertEqual((0, 2), points.shape)
 
 def get_circle_function(center: Point, radius: float):
     center_x, center_y = center
@@ -79,6 +79,46 @@ class TestArcFunction(Test2D):
         # center (5,0) from angle 3*pi/2 to 0
         self.assert_is_circle(arc, (5,0), 5, pi, 5*pi/2)
 
+class TestSegmentEvaluation(Test2D):
+    def _get_test_segments(self):
+        return [
+            get_line_function((1, -1), ( -4, 0.5)),
+            get_quadratic_bezier_function((0,0), (1, 1), (2,0)),
+            get_cubic_bezier_function((0,0), (0,2), (2,2), (2,0)),
+            get_arc_function((0,0), (5,5), (5,5), 0, True, False)
+        ]
+
+    def test_evaluate(self):
+        t_values = np.linspace(0.0, 1.0, 17)
+        for segment in self._get_test_segments():
+            points = segment.evaluate(t_values)
+            self.assertEqual((17, 2), points.shape)
+            for t, point in zip(t_values, points):
+                self.assertPointEqual(segment(t), point)
+
+    def test_endpoints(self):
+        # 313.519 + (121.325 - 313.519) is not exactly 121.325, the end points are still returned exactly
+        segments = self._get_test_segments() + [get_line_function((313.519, 20.0), (121.325, 80.0))]
+        batch = SegmentBatch(segments)
+        for index, segment in enumerate(segments):
+            self.assertEqual(tuple(segment.start), tuple(segment(0.0)))
+            self.assertEqual(tuple(segment.end), tuple(segment(1.0)))
+            x_values, y_values = segment(np.array([0.0, 0.5, 1.0]))
+            self.assertEqual([segment.start[0], segment.end[0]], [x_values[0], x_values[2]])
+            self.assertEqual([segment.start[1], segment.end[1]], [y_values[0], y_values[2]])
+            x_values, y_values = batch(np.array([index, index]), np.array([0.0, 1.0]))
+            self.assertEqual([segment.start, segment.end], [(x_values[0], y_values[0]), (x_values[1], y_values[1])])
+
+    def test_segment_batch(self):
+        segments = self._get_test_segments()
+        batch = SegmentBatch(segments)
+        self.assertEqual(len(segments), len(batch))
+        segment_indices = np.array([3, 0, 2, 1, 3, 0, 1])
+        t_values = np.array([0.0, 0.25, 0.5, 0.75, 1.0, 1.0, 0.1])
+        x_values, y_values = batch(segment_indices, t_values)
+        for index, t, x, y in zip(segment_indices, t_values, x_values, y_values):
+            self.assertPointEqual(segments[index](t), (x, y))
+
 class TestClampFunction(Test2D):
     def test_clamp(self):
         clamp = get_clamp( ((-1, -1),(1, 1)) )
@@ -0,0 +1,40 @@
+import unittest
+import inspect
+from benchmarks.results import compare_results, get_regressions
+from benchmarks.suite import PROJECTION_FACTORIES, run_benchmarks
+from benchmarks.workloads import get_coastline_paths, get_document, get_graticule_paths, get_small_paths
+from cartography.transformations import map_transformation
+from inkex import load_svg
+from inkex.paths import Curve
+
+class BenchmarkTest(unittest.TestCase):
+    def test_every_projection_factory(self):
+        factories = [name for name, member in inspect.getmembers(map_transformation, inspect.isfunction)\
+            if name.startswith("get_") and name.endswith("_projection") and member.__module__ == map_transformation.__name__]
+        self.assertEqual(sorted(factories), sorted(PROJECTION_FACTORIES.keys()))
+
+    def test_workloads(self):
+        self.assertEqual(37 + 19, len(get_graticule_paths(400, 200, 10.0)))
+        coastlines = get_coastline_paths(400, 200, 3, 12, seed=1)
+        self.assertEqual(3, len(coastlines))
+        self.assertEqual(12, sum(isinstance(command, Curve) for command in coastlines[0]))
+        self.assertEqual([str(path) for path in coastlines], [str(path) for path in get_coastline_paths(400, 200, 3, 12, seed=1)])
+
+        document = load_svg(get_document(coastlines + get_small_paths(400, 200, 5), 400, 200).encode())
+        self.assertEqual(8, len(document.getroot().getElementById("map")))
+
+    def test_run(self):
+        results = run_benchmarks(repeat=1, quick=True, selection="approximator/adaptive")
+        self.assertEqual(["approximator/adaptive"], list(results.keys()))
+        self.assertGreater(results["approximator/adaptive"]["best"], 0.0)
+
+    def test_compare(self):
+        baseline = {"a": {"best": 1.0, "median": 1.1}, "b": {"best": 2.0, "median": 2.0}, "c": {"best": 1.0, "median": 1.0}}
+        current = {"a": {"best": 1.1, "median": 1.5}, "b": {"best": 3.0, "median": 3.0}, "d": {"best": 1.0, "median": 1.0}}
+        comparisons = compare_results(baseline, current)
+        self.assertEqual(["a", "b"], [name for name, _, _, _ in comparisons])
+        self.assertEqual([("b", 2.0, 3.0, 1.5)], get_regressions(comparisons))
+        self.assertEqual(2, len(get_regressions(comparisons, threshold=1.05)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from cartography.basis_function import SegmentBatch, get_arc_function, get_cubic_bezier_function, get_line_function
+from cartography.clipping import clip_segments
+from tests.test_2D import Test2D
+import numpy as np
+
+class ClippingTest(Test2D):
+    def setUp(self) -> None:
+        self.bound = ((0.0, 0.0), (10.0, 10.0))
+
+    def test_lines(self):
+        batch = SegmentBatch([
+            get_line_function((-5.0, 5.0), (15.0, 5.0)),
+            get_line_function((2.0, 2.0), (8.0, 3.0)),
+            get_line_function((-5.0, -5.0), (15.0, -5.0)),
+            get_line_function((5.0, 5.0), (5.0, 15.0)),
+            # Only touches the corner
+            get_line_function((-1.0, 1.0), (1.0, -1.0)),
+        ])
+        segments, starts, ends = clip_segments(batch, np.arange(5), self.bound)
+        self.assertEqual([0, 1, 3], segments.tolist())
+        self.assertAlmostEqual(0.25, starts[0])
+        self.assertAlmostEqual(0.75, ends[0])
+        self.assertEqual([0.0, 1.0], [starts[1], ends[1]])
+        self.assertEqual(0.0, starts[2])
+        self.assertAlmostEqual(0.5, ends[2])
+
+    def test_curves(self):
+        batch = SegmentBatch([
+            # Leaves the bound at the top and comes back
+            get_cubic_bezier_function((2.0, 5.0), (4.0, 20.0), (6.0, 20.0), (8.0, 5.0)),
+            get_cubic_bezier_function((2.0, 2.0), (4.0, 8.0), (6.0, 8.0), (8.0, 2.0)),
+            # An arc through (5, 10.35)
+            get_arc_function((2.0, 9.0), (8.0, 9.0), (4.0, 4.0), 0.0, False, False),
+            # A half circle through (5, 15) that only touches the bound with its end points
+            get_arc_function((0.0, 10.0), (10.0, 10.0), (5.0, 5.0), 0.0, False, False),
+        ])
+        segments, starts, ends = clip_segments(batch, np.arange(4), self.bound)
+        self.assertEqual([0, 0, 1, 2, 2], segments.tolist())
+        self.assertEqual([0.0, 1.0], [starts[2], ends[2]])
+        for segment in [0, 2]:
+            self.assertEqual(0.0, starts[segments == segment][0])
+            self.assertEqual(1.0, ends[segments == segment][-1])
+        # The visible intervals end inside the bound, right at its edge
+        crossings = np.concatenate((ends[[0, 3]], starts[[1, 4]]))
+        x, y = batch(segments[[0, 3, 1, 4]], crossings)
+        self.assertTrue(np.all(y <= 10.0))
+        for crossing_y in y:
+            self.assertAlmostEqual(10.0, crossing_y, 6)
+
+if __name__ == '__main__':
+    unittest.main()
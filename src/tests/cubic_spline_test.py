@@ -23,5 +23,45 @@ class CubicSplineTest(unittest.TestCase):
             y_interpolator = interpolator.evaluate(x)
             self.assertAlmostEqual(y_scipy, y_interpolator)
 
+    def test_uniform_knots(self):
+        x_values = [5*i for i in range(19)]
+        y_values = np.cos(np.radians(x_values))
+
+        scipi_spline = CubicSpline(x_values, y_values, bc_type='natural')
+        interpolator = CubicSplineInterpolator(x_values, y_values)
+        self.assertEqual(5.0, interpolator.step)
+
+        testpoints = np.linspace(0, 90, 1000)
+        np.testing.assert_allclose(scipi_spline(testpoints), interpolator.evaluate(testpoints), atol=1e-12)
+        for x in testpoints[::37]:
+            self.assertAlmostEqual(scipi_spline(x), interpolator.evaluate(float(x)))
+
+    def test_array(self):
+        x_values = [-0.6,  0.0,  0.5, 1.0, 1.3]
+        y_values = [ 0.0,  4.0, -0.1, 0.0, 3.5]
+
+        scipi_spline = CubicSpline(x_values, y_values, bc_type='natural')
+        interpolator = CubicSplineInterpolator(x_values, y_values)
+        self.assertIsNone(interpolator.step)
+
+        # Values outside of the knots are extrapolated like scipy does
+        testpoints = np.linspace(-1.0, 1.5, 100)
+        out = np.empty(100)
+        result = interpolator.evaluate_list(testpoints, out)
+        self.assertIs(out, result)
+        np.testing.assert_allclose(scipi_spline(testpoints), result, atol=1e-12)
+        for x in testpoints:
+            self.assertAlmostEqual(scipi_spline(x), interpolator.evaluate(x))
+
+    def test_many_knots(self):
+        x_values = np.sort(np.random.default_rng(0).uniform(0.0, 100.0, 2000))
+        y_values = np.sin(x_values)
+
+        scipi_spline = CubicSpline(x_values, y_values, bc_type='natural')
+        interpolator = CubicSplineInterpolator(x_values, y_values)
+
+        testpoints = np.linspace(0.0, 100.0, 5000)
+        np.testing.assert_allclose(scipi_spline(testpoints), interpolator.evaluate(testpoints), atol=1e-9)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
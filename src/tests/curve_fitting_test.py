@@ -0,0 +1,79 @@
+import unittest
+from inkex.paths import Path, Curve
+from cartography.curve_fitting import get_curve_fitter
+from cartography.instrumentation import Instrumentation
+from cartography.projection_builder import ProjectionBuilder
+from tests.test_2D import Test2D
+import numpy as np
+
+class CurveFittingTest(Test2D):
+    def setUp(self) -> None:
+        # Three segments: a wave, almost a full circle and a single line
+        t_values = np.linspace(0.0, 1.0, 35)
+        wave, circle = self._get_wave(t_values), self._get_circle(t_values)
+        line = np.array([[0.0, 0.0], [5.0, 5.0]])
+        self.samples = (np.repeat([0, 1, 2], [35, 35, 2]), np.concatenate((t_values, t_values, [0.0, 1.0])), np.concatenate((wave, circle, line)))
+
+    def _get_wave(self, t_values: np.ndarray) -> np.ndarray:
+        return np.column_stack((t_values * 100, 20 * np.sin(3 * t_values)))
+
+    def _get_circle(self, t_values: np.ndarray) -> np.ndarray:
+        return np.column_stack((100 * np.cos(6 * t_values), 100 * np.sin(6 * t_values)))
+
+    def test_within_tolerance(self):
+        (segment_indices, t_values, points), controls = get_curve_fitter(0.1)(self.samples)
+        original_indices, original_t_values, original_points = self.samples
+        # A few curves replace the 35 points of the wave and the circle, the line stays a line
+        self.assertLessEqual(np.count_nonzero(segment_indices == 0), 5)
+        self.assertLessEqual(np.count_nonzero(segment_indices == 1), 8)
+        self.assertTrue(np.all(np.isnan(controls[segment_indices == 2])))
+        for segment in range(2):
+            nodes = points[segment_indices == segment]
+            curve_controls = controls[segment_indices == segment]
+            self.assertTrue(np.all(np.isnan(curve_controls[0])))
+            # Every original point is close to one of the curves
+            u = np.linspace(0.0, 1.0, 2001)[:, np.newaxis]
+            curve_points = np.concatenate([(1-u)**3 * nodes[i] + 3*u*(1-u)**2 * curve_controls[i+1, :2] + 3*u**2*(1-u) * curve_controls[i+1, 2:] + u**3 * nodes[i+1]\
+                for i in range(len(nodes) - 1)])
+            for point in original_points[original_indices == segment]:
+                self.assertLess(np.min(np.hypot(*(curve_points - point).T)), 0.1)
+            # The curves do not bulge out between the samples either
+            dense_points = [self._get_wave, self._get_circle][segment](np.linspace(0.0, 1.0, 341))
+            for point in dense_points:
+                self.assertLess(np.min(np.hypot(*(curve_points - point).T)), 0.1)
+
+    def test_bulge(self):
+        # A curve through the samples that are unevenly spread in t overshoots between the first ones
+        t_values = np.array([0.0, 0.25, 0.3, 1.0])
+        points = np.array([[0.0, -0.14], [2.0, 0.03], [5.0, -0.06], [23.0, -0.11]])
+        (_, _, nodes), controls = get_curve_fitter(0.1)((np.zeros(4, dtype=int), t_values, points))
+        u = np.linspace(0.0, 1.0, 2001)[:, np.newaxis]
+        curve_points = np.concatenate([(1-u) * nodes[i] + u * nodes[i+1] if np.isnan(controls[i+1, 0]) else\
+            (1-u)**3 * nodes[i] + 3*u*(1-u)**2 * controls[i+1, :2] + 3*u**2*(1-u) * controls[i+1, 2:] + u**3 * nodes[i+1]\
+            for i in range(len(nodes) - 1)])
+        line_points = np.concatenate([(1-u) * points[i] + u * points[i+1] for i in range(len(points) - 1)])
+        for point in line_points[::10]:
+            self.assertLess(np.min(np.hypot(*(curve_points - point).T)), 0.2)
+
+    def test_projection(self):
+        paths = [Path("M 10 10 C 100 20 300 180 390 100"), Path("M 390 100 C 300 180 100 20 10 10")]
+        instrumentation = Instrumentation()
+        projection = ProjectionBuilder()\
+            .with_instrumentation(instrumentation)\
+            .with_curve_fitting()\
+            .from_equirectangular(400, 200)\
+            .to_robinson(400, 200, 0.0)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        forward, backward = projection.transform_paths(paths, ["forward", "backward"])
+        self.assertGreater(instrumentation.counters["fitted_curves"], 0)
+        self.assertLess(instrumentation.counters["output_nodes"], instrumentation.counters["unfitted_points"])
+        self.assertTrue(all(isinstance(command, Curve) for command in forward[1:]))
+        # The second path is the first one reversed
+        self.assertEqual(len(forward), len(backward))
+        for forward_curve, backward_curve in zip(forward[1:], backward[::-1]):
+            self.assertPointEqual((forward_curve.x2, forward_curve.y2), (backward_curve.x3, backward_curve.y3), 10)
+            self.assertPointEqual((forward_curve.x3, forward_curve.y3), (backward_curve.x2, backward_curve.y2), 10)
+
+if __name__ == "__main__":
+    unittest.main()
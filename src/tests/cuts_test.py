@@ -0,0 +1,31 @@
+import unittest
+from cartography.basis_function import SegmentBatch, get_line_function
+from cartography.cuts import find_cuts
+from cartography.transformations.inverse_map_transformation import get_inverse_equirectangular_projection
+from cartography.transformations.kernel import get_cut_sides
+from cartography.transformations.map_transformation import get_peirce_quincuncial_projection
+from tests.test_2D import Test2D
+import numpy as np
+
+class CutsTest(Test2D):
+    def test_peirce_quincuncial(self):
+        inverse = get_inverse_equirectangular_projection(400, 200)
+        cut_sides = get_cut_sides(get_peirce_quincuncial_projection(400, 400, 0.35))
+        # The cut meridian 45 degrees east of the standard longitude, in the southern hemisphere (y < 100)
+        cut_x = (0.35 + np.pi / 4 + np.pi) / (2 * np.pi) * 400
+        batch = SegmentBatch([
+            get_line_function((250.0, 50.0), (300.0, 50.0)),
+            # The same meridian in the northern hemisphere is no cut
+            get_line_function((250.0, 150.0), (300.0, 150.0)),
+            # Crossing the equator is no cut either
+            get_line_function((100.0, 50.0), (100.0, 150.0)),
+            get_line_function((300.0, 50.0), (250.0, 50.0)),
+        ])
+        segments, lower, upper = find_cuts(batch, np.arange(4), inverse, cut_sides)
+        self.assertEqual([0, 3], segments.tolist())
+        self.assertTrue(np.all(upper - lower < 1e-10))
+        self.assertAlmostEqual(cut_x, 250.0 + lower[0] * 50.0, 6)
+        self.assertAlmostEqual(cut_x, 300.0 - lower[1] * 50.0, 6)
+
+if __name__ == '__main__':
+    unittest.main()
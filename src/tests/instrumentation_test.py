@@ -0,0 +1,63 @@
+import unittest
+import json
+import os
+from tempfile import TemporaryDirectory
+from inkex.paths import Path
+from cartography.instrumentation import Instrumentation
+from cartography.projection_builder import ProjectionBuilder
+
+class InstrumentationTest(unittest.TestCase):
+    def test_counters_and_phases(self):
+        instrumentation = Instrumentation()
+        with instrumentation.phase("outer"):
+            with instrumentation.phase("inner"):
+                instrumentation.count("points", 3)
+            with instrumentation.phase("inner"):
+                instrumentation.count("points")
+        self.assertEqual({"points": 4}, instrumentation.counters)
+        self.assertEqual(["inner", "inner", "outer"], [name for name, _, _ in instrumentation.events])
+        self.assertGreaterEqual(instrumentation.phase_times["outer"], instrumentation.phase_times["inner"])
+        self.assertIn("  points: 4", instrumentation.summary())
+
+    def test_disabled(self):
+        instrumentation = Instrumentation(enabled=False)
+        with instrumentation.phase("phase"):
+            instrumentation.count("points", 3)
+        self.assertEqual({}, instrumentation.counters)
+        self.assertEqual([], instrumentation.events)
+
+    def test_chrome_trace(self):
+        instrumentation = Instrumentation()
+        with instrumentation.phase("phase"):
+            instrumentation.count("points", 2)
+        with TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "trace.json")
+            instrumentation.write_chrome_trace(file_name)
+            with open(file_name) as file:
+                events = json.load(file)["traceEvents"]
+        self.assertEqual(["X", "C"], [event["ph"] for event in events])
+        self.assertEqual("phase", events[0]["name"])
+        self.assertEqual({"points": 2}, events[1]["args"])
+
+    def test_projection(self):
+        instrumentation = Instrumentation()
+        projection = ProjectionBuilder()\
+            .with_instrumentation(instrumentation)\
+            .from_equirectangular(400, 200)\
+            .to_robinson(400, 200, 0.0)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        transformed_paths = projection.transform_paths([Path("M 10 10 L 300 150 C 100 20 300 180 20 100 Z")], ["path"])
+        counters = instrumentation.counters
+        self.assertEqual(1, counters["paths"])
+        self.assertEqual(3, counters["segments"])
+        # The move and every approximated point are nodes, the seam points between the segments are dropped
+        self.assertEqual(1 + counters["points_LineSegment"] + counters["points_CubicBezierSegment"], counters["approximated_nodes"])
+        self.assertEqual(len(transformed_paths[0]) - 1, counters["output_nodes"])
+        self.assertLessEqual(counters["output_nodes"], counters["approximated_nodes"] - 3)
+        self.assertGreater(counters["approximator_iterations"], 1)
+        for phase in ("parse paths", "approximation", "projection calls", "scatter"):
+            self.assertIn(phase, instrumentation.phase_times)
+
+if __name__ == '__main__':
+    unittest.main()
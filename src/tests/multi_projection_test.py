@@ -0,0 +1,63 @@
+import unittest
+from inkex import PathElement, Group
+from inkex.paths import Path
+from cartography.multi_projection import MultiProjection, SHARED_RESOLUTION
+from cartography.projection_builder import ProjectionBuilder
+from tests.test_2D import Test2D
+import numpy as np
+
+class MultiProjectionTest(Test2D):
+    def _get_projections(self):
+        return [
+            ProjectionBuilder().from_equirectangular(400, 200).to_mercator(400, 200, 0.0, 1.4)\
+                .with_equidistant_approximator(0.1, 35, 1, 0.0, 4, incremental=True).build(),
+            ProjectionBuilder().from_equirectangular(400, 200).to_robinson(400, 200, 0.0)\
+                .with_adaptive_approximator(0.1, 10).build(),
+            ProjectionBuilder().from_equirectangular(400, 200).to_orthographic(400, 200, (0.2, -0.5))\
+                .with_equidistant_approximator(0.1, 35, 1, 0.0, 4).build(),
+        ]
+
+    def _get_paths(self):
+        return [Path("M 10 10 L 390 10 L 390 190 Z"), Path("M 50 50 C 80 20 120 180 200 100 Q 250 50 300 120 A 40 20 30 0 1 350 150")]
+
+    def test_matches_single_projections(self):
+        paths = self._get_paths()
+        labels = ["a", "b"]
+        expected = [projection.transform_paths(paths, labels) for projection in self._get_projections()]
+        multi_projection = MultiProjection(self._get_projections())
+        transformed = multi_projection.transform_paths(multi_projection.gather(paths, labels))
+        self.assertEqual(len(expected), len(transformed))
+        for expected_paths, transformed_paths in zip(expected, transformed):
+            self.assertEqual([str(Path(path)) for path in expected_paths], [str(Path(path)) for path in transformed_paths])
+
+    def test_shared_source(self):
+        multi_projection = MultiProjection(self._get_projections())
+        source = multi_projection.gather(self._get_paths(), ["a", "b"])
+        segment_indices = np.array([0, 1, 4, 5, 5])
+        # Table lookups and direct evaluations
+        t_values = np.array([0.0, 0.5, 3 / SHARED_RESOLUTION, 0.3, 1.0])
+        longitudes, latitudes = source(segment_indices, t_values)
+        expected_longitudes, expected_latitudes = multi_projection.inverse_transformation(*source.gathered.batch(segment_indices, t_values))
+        np.testing.assert_array_equal(expected_longitudes, longitudes)
+        np.testing.assert_array_equal(expected_latitudes, latitudes)
+
+    def test_transform_elements(self):
+        group = Group()
+        elements = [group.add(PathElement(d=str(path))) for path in self._get_paths()]
+        group.add(PathElement(d="M 500 500 L 600 600"))
+        results = MultiProjection(self._get_projections()).transform_elements(group.getchildren())
+        self.assertEqual(3, len(results))
+        self.assertIs(elements[1], results[2][1])
+        # The invisible path was deleted, every projection has its own copy of the others
+        self.assertEqual(6, len(group))
+        self.assertEqual([results[0][0], results[1][0], results[2][0], results[0][1], results[1][1], results[2][1]], list(group))
+
+    def test_bounds(self):
+        projections = self._get_projections()
+        projections.append(ProjectionBuilder().from_equirectangular(400, 200).to_robinson(400, 200, 0.0)\
+            .with_visibility_bounds(((-1, -1), (1, 1))).with_adaptive_approximator(0.1, 10).build())
+        with self.assertRaises(ValueError):
+            MultiProjection(projections)
+
+if __name__ == '__main__':
+    unittest.main()
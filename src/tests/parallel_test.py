@@ -0,0 +1,50 @@
+import unittest
+from inkex import PathElement, load_svg
+from inkex.paths import Path
+from cartography.projection_builder import ProjectionBuilder
+from tests.test_2D import Test2D
+
+class ProjectionPoolTest(Test2D):
+    def _get_builder(self, workers: int) -> ProjectionBuilder:
+        return ProjectionBuilder()\
+            .with_workers(workers)\
+            .from_equirectangular(400, 200)\
+            .to_lambert(400, 200, 0.3)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4, incremental=True)
+
+    def test_configuration(self):
+        builder = self._get_builder(3)
+        # to_lambert calls to_cylindrical_equal_area which must not be recorded
+        self.assertEqual(["from_equirectangular", "to_lambert", "with_equidistant_approximator"], [name for name, _, _ in builder.configuration])
+        self.assertEqual({"incremental": True}, builder.configuration[2][2])
+
+    def test_deprecated_linear_approximator(self):
+        with self.assertWarns(DeprecationWarning):
+            builder = ProjectionBuilder().from_equirectangular(400, 200).to_lambert(400, 200, 0.3).with_linear_approximator(0.1)
+        # The replayed configuration uses the adaptive approximator directly
+        self.assertEqual(("with_adaptive_approximator", (0.1, 14), {}), builder.configuration[-1])
+
+    def test_deterministic(self):
+        paths = [Path(f"M {10*i} {5*i} L {400-7*i} {200-3*i} C 100 20 300 180 {20+i} 100 Z") for i in range(9)]
+        labels = [f"path_{i}" for i in range(9)]
+        expected = self._get_builder(1).build().transform_paths(paths, labels)
+        for workers in (2, 3):
+            transformed_paths, messages = self._get_builder(workers).build().pool.transform_paths(paths, labels)
+            # Every coordinate is exactly the one of the single process
+            self.assertEqual([[(command.letter, command.args) for command in path] for path in expected],\
+                [[(command.letter, command.args) for command in path] for path in transformed_paths])
+            self.assertEqual([], messages)
+
+    def test_elements(self):
+        # The paths of elements loaded from a document are bound to them and have to be detached for the workers
+        paths = "".join(f'<path d="M {10*i} {5*i} L {400-7*i} {200-3*i} C 100 20 300 180 {20+i} 100 Z"/>' for i in range(9))
+        document = f'<svg xmlns="http://www.w3.org/2000/svg" width="400" height="200">{paths}</svg>'
+        transformed = []
+        for workers in (1, 2):
+            elements = list(load_svg(document.encode()).getroot().descendants().filter(PathElement))
+            self._get_builder(workers).build().transform_elements(elements)
+            transformed.append([[(command.letter, command.args) for command in element.path] for element in elements])
+        self.assertEqual(transformed[0], transformed[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from tempfile import TemporaryDirectory
+from inkex import Group, PathElement
+from inkex.paths import Line, Move, Path, ZoneClose
+from cartography.instrumentation import Instrumentation
+from cartography.path_cache import PathCache
+from cartography.projection_builder import ProjectionBuilder
+
+class PathCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        cache = PathCache(self.directory.name, 10**6, [("to_robinson", (400, 200, 0.0), {})])
+        key = cache.get_key(Path("M 10 10 L 20 20"))
+        commands = [Move(0.1 + 0.2, 1/3), Line(2.0, 1e-17), ZoneClose()]
+        cache.store([key], [commands])
+        cached = cache.lookup([key, "missing"])
+        self.assertEqual(["M", "L", "Z"], [command.letter for command in cached[key]])
+        # Every float is restored exactly
+        self.assertEqual((0.1 + 0.2, 1/3, 2.0, 1e-17), tuple(cached[key][0].args) + tuple(cached[key][1].args))
+        self.assertNotIn("missing", cached)
+
+    def test_keys(self):
+        cache = PathCache(self.directory.name, 10**6, [("to_robinson", (400, 200, 0.0), {})])
+        other_cache = PathCache(self.directory.name, 10**6, [("to_robinson", (400, 200, 0.1), {})])
+        path = Path("M 10 10 L 20 20")
+        self.assertEqual(cache.get_key(path), cache.get_key(Path("M 10 10 L 20 20")))
+        self.assertNotEqual(cache.get_key(path), cache.get_key(Path("M 10 10 L 20 20.0000001")))
+        self.assertNotEqual(cache.get_key(path), other_cache.get_key(path))
+
+    def test_eviction(self):
+        entry = [Move(1.0, 2.0), Line(3.0, 4.0)]
+        cache = PathCache(self.directory.name, 10**6, [])
+        cache.store(["a", "b", "c"], [entry] * 3)
+        entry_size = cache.size() // 3
+        cache.maximal_size = 3 * entry_size
+        # Using a marks it as recently used, so b is evicted first
+        cache.lookup(["a"])
+        cache.store(["d"], [entry])
+        self.assertEqual({"a", "c", "d"}, set(cache.lookup(["a", "b", "c", "d"]).keys()))
+        cache.clear()
+        self.assertEqual(0, cache.size())
+
+    def test_projection(self):
+        def project(instrumentation: Instrumentation):
+            projection = ProjectionBuilder()\
+                .with_cache(self.directory.name, 10**6)\
+                .with_instrumentation(instrumentation)\
+                .from_equirectangular(400, 200)\
+                .to_mollweide(400, 200, 0.0, 0.0001)\
+                .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+                .build()
+            group = Group()
+            elements = [group.add(PathElement(d=d)) for d in ("M 10 10 L 300 150 C 100 20 300 180 20 100 Z", "M 50 50 h 100")]
+            projection.transform_elements(elements)
+            return [element.get("d") for element in elements]
+
+        first = Instrumentation()
+        second = Instrumentation()
+        self.assertEqual(project(first), project(second))
+        self.assertEqual(2, first.counters["cache_misses"])
+        self.assertEqual(2, second.counters["cache_hits"])
+        self.assertEqual(0, second.counters["cache_misses"])
+        self.assertNotIn("approximation", second.phase_times)
+
+if __name__ == '__main__':
+    unittest.main()
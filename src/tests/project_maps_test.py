@@ -0,0 +1,62 @@
+import unittest
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+from inkex import load_svg
+from project_maps import get_default_arguments, get_effect_class, get_input_files, get_projection_names, main
+from mercator_extension import ApplyMercatorEffect
+
+DOCUMENT = b"""<svg xmlns="http://www.w3.org/2000/svg" width="400" height="200" viewBox="0 0 400 200">
+<g id="map"><path id="coast" d="M 10 10 L 390 10 L 390 190 Z"/><rect id="box" x="100" y="60" width="120" height="50"/></g>
+<path id="line" d="M 0 100 L 400 100"/>
+</svg>"""
+
+class ProjectMapsTest(unittest.TestCase):
+    def test_projections(self):
+        names = get_projection_names()
+        self.assertIn("mercator", names)
+        self.assertIn("lambert_azimuthal_equal_area", names)
+        self.assertNotIn("map", names)
+        self.assertIs(ApplyMercatorEffect, get_effect_class("mercator"))
+
+    def test_default_arguments(self):
+        defaults = get_default_arguments("stereographic")
+        self.assertEqual("NORTHPOLE", defaults["pole"])
+        self.assertEqual("36", defaults["latitude_limit"])
+        self.assertEqual("equidistant", defaults["approximator"])
+        self.assertEqual("0.1", defaults["precision"])
+        self.assertNotIn("tab", defaults)
+
+    def test_project_directory(self):
+        with TemporaryDirectory() as directory:
+            for name in ("a", "b"):
+                with open(os.path.join(directory, name + ".svg"), "wb") as file:
+                    file.write(DOCUMENT)
+            with redirect_stdout(StringIO()) as output:
+                result = main(["--projection", "mercator", "--latitude_limit=80", "--replace", "--jobs", "2", directory])
+            self.assertEqual(0, result)
+            self.assertIn("Projected 2 of 2 files", output.getvalue())
+
+            document = load_svg(os.path.join(directory, "a_mercator.svg")).getroot()
+            self.assertEqual(["map_projection", "line_projection"], [child.get_id() for child in document])
+            # The outputs of a previous run are not projected again
+            self.assertEqual(2, len(get_input_files([directory], ["_mercator"])))
+
+    def test_multiple_projections(self):
+        with TemporaryDirectory() as directory:
+            input_file = os.path.join(directory, "map.svg")
+            with open(input_file, "wb") as file:
+                file.write(DOCUMENT)
+            with redirect_stdout(StringIO()):
+                main(["--projection", "robinson", "--jobs", "1", "--precision=0.2", input_file])
+                os.rename(os.path.join(directory, "map_robinson.svg"), os.path.join(directory, "single.svg"))
+                result = main(["--projection", "mercator,robinson", "--jobs", "1", "--precision=0.2", "--latitude_limit=80", input_file])
+            self.assertEqual(0, result)
+            self.assertTrue(os.path.exists(os.path.join(directory, "map_mercator.svg")))
+            # Sharing the source does not change the result
+            with open(os.path.join(directory, "single.svg")) as single, open(os.path.join(directory, "map_robinson.svg")) as multiple:
+                self.assertEqual(single.read(), multiple.read())
+
+if __name__ == '__main__':
+    unittest.main()
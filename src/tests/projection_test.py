@@ -0,0 +1,197 @@
+import unittest
+from inkex.paths import Path
+from cartography.cuts import find_cuts
+from cartography.instrumentation import Instrumentation
+from cartography.projection import _remove_redundant_points
+from cartography.projection_builder import ProjectionBuilder
+from tests.test_2D import Test2D
+import numpy as np
+
+class ProjectionTest(Test2D):
+    def _get_projection(self, instrumentation: Instrumentation = None):
+        return ProjectionBuilder()\
+            .with_instrumentation(instrumentation)\
+            .from_equirectangular(400, 200)\
+            .to_mollweide(400, 200, 0.0, 0.0001)\
+            .with_adaptive_approximator(0.1, 10)\
+            .build()
+
+    def test_shared_segments(self):
+        # Two neighbouring countries share a border, drawn in opposite directions
+        paths = [
+            Path("M 150 50 L 250 50 C 280 80 220 120 250 150 L 150 150 Z"),
+            Path("M 250 150 C 220 120 280 80 250 50 L 350 50 L 350 150 Z"),
+        ]
+        instrumentation = Instrumentation()
+        first, second = self._get_projection(instrumentation).transform_paths(paths, ["a", "b"])
+        self.assertEqual(1, instrumentation.counters["shared_segments"])
+        self.assertEqual(7, instrumentation.counters["segments"])
+
+        # The border has exactly the same points in both paths
+        first_points = [(command.x, command.y) for command in first[:-1]]
+        second_points = [(command.x, command.y) for command in second[:-1]]
+        # The second path starts with the border and continues with a line from (250, 50)
+        border_end = second_points.index(first_points[2], 1)
+        border = second_points[1:border_end+1][::-1]
+        start = first_points.index(border[1]) - 1
+        self.assertGreater(len(border), 2)
+        self.assertEqual(border, first_points[start:start+len(border)])
+
+    def test_batch_independence(self):
+        # Whichever path gathers the border first, it is approximated in the same direction
+        paths = [
+            Path("M 150 50 L 250 50 C 280 80 220 120 250 150 L 150 150 Z"),
+            Path("M 250 150 C 220 120 280 80 250 50 L 350 50 L 350 150 Z"),
+        ]
+        # Unlike the adaptive approximator the equidistant samples depend on the direction
+        projection = ProjectionBuilder()\
+            .from_equirectangular(400, 200)\
+            .to_mollweide(400, 200, 0.0, 0.0001)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        together = projection.transform_paths(paths, ["a", "b"])
+        alone = [projection.transform_paths([path], [label])[0] for path, label in zip(paths, ["a", "b"])]
+        for expected, transformed in zip(alone, together):
+            self.assertEqual([(command.letter, command.args) for command in expected], [(command.letter, command.args) for command in transformed])
+
+    def test_shared_arcs(self):
+        paths = [Path("M 100 100 A 50 30 20 0 1 200 100"), Path("M 200 100 A 50 30 20 0 0 100 100"), Path("M 200 100 A 50 30 20 0 1 100 100")]
+        instrumentation = Instrumentation()
+        forward, backward, other = self._get_projection(instrumentation).transform_paths(paths, ["a", "b", "c"])
+        # Only the arc with the flipped sweep flag is the same arc reversed
+        self.assertEqual(1, instrumentation.counters["shared_segments"])
+        # Apart from the end points, which are projected as moves, both paths have the same points
+        self.assertEqual([(command.x, command.y) for command in forward[1:-1]], [(command.x, command.y) for command in backward[1:-1]][::-1])
+        self.assertNotEqual([(command.x, command.y) for command in backward[1:]], [(command.x, command.y) for command in other[1:]])
+
+    def test_axis_aligned_lines(self):
+        paths = [Path("M 20 30 H 380 V 170 H 20 Z"), Path("M 50 50 L 150 120")]
+        def transform(lookup_grid_error: float, instrumentation: Instrumentation):
+            return ProjectionBuilder()\
+                .with_instrumentation(instrumentation)\
+                .with_lookup_grid(lookup_grid_error)\
+                .from_equirectangular(400, 200)\
+                .to_mercator(400, 200, 0.2, 1.3)\
+                .with_equidistant_approximator(0.01, 35, 1, 0.0, 4)\
+                .build()\
+                .transform_paths(paths, ["rectangle", "line"])
+        instrumentation = Instrumentation()
+        rectangle, line = transform(0.0, instrumentation)
+        self.assertEqual(4, instrumentation.counters["axis_aligned_segments"])
+        self.assertEqual(["M", "L", "L", "L", "L", "Z"], [command.letter for command in rectangle])
+        self.assertGreater(len(line), 2)
+        # A lookup grid is not separable, the lines are approximated and end up the same
+        instrumentation = Instrumentation()
+        approximated_rectangle, _ = transform(0.00001, instrumentation)
+        self.assertNotIn("axis_aligned_segments", instrumentation.counters)
+        for command, approximated_command in zip(rectangle[:-1], approximated_rectangle[:-1]):
+            self.assertPointEqual((command.x, command.y), (approximated_command.x, approximated_command.y), 3)
+
+    def test_clipping(self):
+        paths = [
+            Path("M 50 100 L 50 5 L 100 5 L 100 100"),
+            Path("M 100 100 L 100 5 L 50 5 L 50 100"),
+            Path("M 50 100 L 50 5 L 100 5 L 100 100 Z"),
+            Path("M 10 5 L 300 5"),
+        ]
+        def transform(clipping: bool, instrumentation: Instrumentation):
+            return ProjectionBuilder()\
+                .with_instrumentation(instrumentation)\
+                .with_clipping(clipping)\
+                .from_equirectangular(400, 200)\
+                .to_mercator(400, 200, 0.2, 1.3)\
+                .with_equidistant_approximator(0.01, 35, 1, 0.0, 4)\
+                .build()\
+                .transform_paths(paths, ["open", "reversed", "closed", "invisible"])
+        instrumentation = Instrumentation()
+        opened, reversed, closed, invisible = transform(True, instrumentation)
+        self.assertEqual(4, instrumentation.counters["clipped_segments"])
+        # The open path is cut where it leaves the visible area and continues where it comes back
+        self.assertEqual(["M", "L", "M", "L"], [command.letter for command in opened])
+        self.assertEqual(["M", "L", "M", "L"], [command.letter for command in reversed])
+        opened_points = [(command.x, command.y) for command in opened]
+        reversed_points = [(command.x, command.y) for command in reversed]
+        for point, reversed_point in zip(opened_points, [reversed_points[index] for index in [3, 2, 1, 0]]):
+            self.assertPointEqual(point, reversed_point, 6)
+        self.assertEqual([], invisible)
+        # Closed paths are still clamped
+        _, _, unclipped_closed, unclipped_invisible = transform(False, Instrumentation())
+        self.assertEqual(unclipped_closed, closed)
+        self.assertEqual(["M", "L"], [command.letter for command in unclipped_invisible])
+
+    def test_cuts(self):
+        paths = [
+            # Crosses a cut of the southern hemisphere
+            Path("M 250 50 L 300 50"),
+            Path("M 250 50 L 300 50 L 300 80 L 250 80 Z"),
+            # Crosses the equator, which is no cut
+            Path("M 100 50 L 100 150"),
+        ]
+        instrumentation = Instrumentation()
+        line, area, meridian = ProjectionBuilder()\
+            .with_instrumentation(instrumentation)\
+            .from_equirectangular(400, 200)\
+            .to_peirce_quincuncial(400, 400, 0.35)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()\
+            .transform_paths(paths, ["line", "area", "meridian"])
+        # The line is the first side of the area
+        self.assertEqual(2, instrumentation.counters["cut_segments"])
+        # The jump is not drawn
+        self.assertEqual(2, sum(command.letter == "M" for command in line))
+        points = [(command.x, command.y) for command in line]
+        for (x_a, y_a), (x_b, y_b), command in zip(points[:-1], points[1:], line[1:]):
+            if command.letter != "M":
+                self.assertLess(np.hypot(x_b - x_a, y_b - y_a), 50.0)
+        # A split area is not closed again. It is only broken at its two crossings with the cut, not at its start:
+        # the part before the first crossing continues the part after the last crossing
+        self.assertEqual(2, sum(command.letter == "M" for command in area))
+        self.assertNotIn("Z", [command.letter for command in area])
+        moves = [index for index, command in enumerate(area) if command.letter == "M"]
+        # The line starts at the start of the area
+        start = (line[0].x, line[0].y)
+        self.assertNotIn(start, [(area[index].x, area[index].y) for index in moves])
+        self.assertIn(start, [(command.x, command.y) for command in area])
+        for index, command in enumerate(area[1:], 1):
+            if index not in moves:
+                self.assertLess(np.hypot(command.x - area[index-1].x, command.y - area[index-1].y), 50.0)
+        self.assertEqual(1, sum(command.letter == "M" for command in meridian))
+
+    def test_cut_rings(self):
+        # Rings around the south pole and along the southern hemisphere cross several cuts
+        paths = [Path("M 30 30 L 370 30 L 370 10 L 30 10 Z"), Path("M 120 80 L 390 60 L 200 20 Z")]
+        projection = ProjectionBuilder()\
+            .from_equirectangular(400, 200)\
+            .to_peirce_quincuncial(400, 400, 0.35)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        for path in paths:
+            gathered = projection.gather_paths([path], ["ring"])
+            crossings, _, _ = find_cuts(gathered.batch, np.arange(len(gathered.batch)), projection.to_longitude_latitude, projection.cut_sides)
+            self.assertGreater(len(crossings), 1)
+            ring = projection.project_gathered(gathered)[0]
+            self.assertEqual(len(crossings), sum(command.letter == "M" for command in ring))
+
+    def test_redundant_points(self):
+        run = [(0.0, 0.0), (1.0, 0.0), (1.0, 0.0), (2.0, 0.0), (2.0, 1.0), (2.0, 0.5), (3.0, 3.0)]
+        # Coincident and collinear points are dropped, the reversal at (2, 1) is kept
+        self.assertEqual([[2.0, 0.0], [2.0, 1.0], [2.0, 0.5], [3.0, 3.0]], _remove_redundant_points(run))
+        self.assertEqual([], _remove_redundant_points([(1.0, 2.0)]))
+
+    def test_output_nodes(self):
+        instrumentation = Instrumentation()
+        projection = ProjectionBuilder()\
+            .with_instrumentation(instrumentation)\
+            .from_equirectangular(400, 200)\
+            .to_lambert(400, 200, 0.0)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        # A meridian is a straight line in a cylindrical projection, a parallel is straight as well
+        meridian, parallel = projection.transform_paths([Path("M 100 20 L 100 180"), Path("M 20 70 L 380 70 L 390 70")], ["a", "b"])
+        self.assertEqual(["M", "L"], [command.letter for command in meridian])
+        self.assertEqual(["M", "L"], [command.letter for command in parallel])
+        self.assertEqual(4, instrumentation.counters["output_nodes"])
+        self.assertGreater(instrumentation.counters["approximated_nodes"], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from inkex.paths import Path
+from cartography.instrumentation import Instrumentation
+from cartography.projection_builder import ProjectionBuilder
+from cartography.simplification import get_douglas_peucker_simplifier, get_visvalingam_simplifier
+from tests.test_2D import Test2D
+import numpy as np
+
+class SimplificationTest(Test2D):
+    def setUp(self) -> None:
+        # Three segments: a straight line, a wave and a single line
+        t_values = np.linspace(0.0, 1.0, 40)
+        straight = np.column_stack((t_values * 100, t_values * 50))
+        wave = np.column_stack((t_values * 100, 10 * np.sin(6 * t_values)))
+        line = np.array([[0.0, 0.0], [5.0, 5.0]])
+        self.samples = (np.repeat([0, 1, 2], [40, 40, 2]), np.concatenate((t_values, t_values, [0.0, 1.0])), np.concatenate((straight, wave, line)))
+
+    def assertWithinTolerance(self, simplified, tolerance: float):
+        segment_indices, t_values, points = simplified
+        original_indices, original_t_values, original_points = self.samples
+        for segment in range(3):
+            kept_t_values = t_values[segment_indices == segment]
+            kept_points = points[segment_indices == segment]
+            # The first and last point of every segment are kept
+            self.assertEqual(original_t_values[original_indices == segment][[0, -1]].tolist(), kept_t_values[[0, -1]].tolist())
+            # Every removed point is within the tolerance of the simplified polyline
+            for t, point in zip(original_t_values[original_indices == segment], original_points[original_indices == segment]):
+                index = min(max(np.searchsorted(kept_t_values, t), 1), len(kept_t_values) - 1)
+                start, end = kept_points[index - 1], kept_points[index]
+                direction = end - start
+                offset = point - start
+                distance = abs(direction[0] * offset[1] - direction[1] * offset[0]) / np.hypot(*direction)
+                self.assertLessEqual(distance, tolerance)
+        self.assertEqual(2, np.count_nonzero(segment_indices == 0))
+
+    def test_douglas_peucker(self):
+        simplified = get_douglas_peucker_simplifier(0.5)(self.samples)
+        self.assertWithinTolerance(simplified, 0.5)
+        self.assertLess(len(simplified[0]), 25)
+
+    def test_visvalingam(self):
+        simplified = get_visvalingam_simplifier(0.5)(self.samples)
+        self.assertWithinTolerance(simplified, 0.5)
+        self.assertLess(len(simplified[0]), 25)
+
+    def test_projection(self):
+        paths = [Path("M 10 10 C 100 20 300 180 390 100 L 10 190 Z")]
+        def get_projection(method: str, instrumentation: Instrumentation):
+            return ProjectionBuilder()\
+                .with_instrumentation(instrumentation)\
+                .with_simplification(method)\
+                .from_equirectangular(400, 200)\
+                .to_robinson(400, 200, 0.0)\
+                .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+                .build()
+        instrumentation = Instrumentation()
+        full = get_projection("none", instrumentation).transform_paths(paths, ["path"])[0]
+        self.assertNotIn("simplification", instrumentation.phase_times)
+        for method in ("douglas_peucker", "visvalingam"):
+            instrumentation = Instrumentation()
+            simplified = get_projection(method, instrumentation).transform_paths(paths, ["path"])[0]
+            self.assertLess(len(simplified), len(full))
+            self.assertGreater(instrumentation.counters["unsimplified_points"], instrumentation.counters["points_CubicBezierSegment"])
+        with self.assertRaises(ValueError):
+            ProjectionBuilder().with_simplification("unknown")
+
+if __name__ == "__main__":
+    unittest.main()
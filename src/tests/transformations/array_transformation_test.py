@@ -0,0 +1,58 @@
+import unittest
+from cartography.projection_types import Pole
+from cartography.transformations.generic_transformation import transform_arrays
+from cartography.transformations.map_transformation import *
+from tests.transformations.map_transform_test import MapTransformTest
+import numpy as np
+
+class ArrayTransformationTest(MapTransformTest):
+    """
+    Tests that every projection yields the same results for arrays as for the individual points.
+    """
+    def setUp(self) -> None:
+        x_linspace = np.linspace(-np.pi, np.pi, 25)
+        y_linspace = np.linspace(-np.pi/2, np.pi/2, 13)
+        longitudes, latitudes = np.meshgrid(x_linspace, y_linspace)
+        self.longitudes = longitudes.ravel()
+        self.latitudes = latitudes.ravel()
+
+    def assertArrayMatchesScalar(self, transformation: Transformation):
+        points = transform_arrays(transformation, self.longitudes, self.latitudes)
+        self.assertEqual((len(self.longitudes), 2), points.shape)
+        for i in range(len(self.longitudes)):
+            self.assertPointEqual(transformation(self.longitudes[i], self.latitudes[i]), points[i], 10)
+
+    def test_cylindrical(self):
+        self.assertArrayMatchesScalar(get_mercator_projection(200, 100, 0.2, 1.3))
+        self.assertArrayMatchesScalar(get_cylindrical_equal_area_projection(200, 100, 0.0, 0.6544984695))
+
+    def test_pseudo_cylindrical(self):
+        self.assertArrayMatchesScalar(get_winkel_tripel_projection(200, 100, 0.5))
+        self.assertArrayMatchesScalar(get_robinson_projection(200, 100, 0.0))
+        self.assertArrayMatchesScalar(get_mollweide_projection(200, 100, 0.0, 0.001))
+
+    def test_peirce_quincuncial(self):
+        self.assertArrayMatchesScalar(get_peirce_quincuncial_projection(200, 100, 0.0))
+
+    def test_conic(self):
+        self.assertArrayMatchesScalar(get_equidistant_conic_projection(200, 100, 0.0, 0.0, 0.3, 1.0))
+        self.assertArrayMatchesScalar(get_equidistant_conic_projection(200, 100, 0.0, 0.0, 0.5, -0.5))
+
+    def test_polar(self):
+        self.assertArrayMatchesScalar(get_orthographic_projection(200, 100, (0.0, -np.pi/2)))
+        self.assertArrayMatchesScalar(get_orthographic_projection(200, 100, (0.3, 0.4)))
+        self.assertArrayMatchesScalar(get_stereographic_projection(200, 100, 0.3, Pole.NORTHPOLE))
+        self.assertArrayMatchesScalar(get_stereographic_projection(200, 100, -0.3, Pole.SOUTHPOLE))
+        self.assertArrayMatchesScalar(get_lambert_azimuthal_equal_area_projection(200, 100, Pole.NORTHPOLE))
+        self.assertArrayMatchesScalar(get_lambert_azimuthal_equal_area_projection(200, 100, Pole.SOUTHPOLE))
+
+    def test_orthographic_opposite_side(self):
+        transformation = get_orthographic_projection(200, 100, (0.0, np.pi/2))
+        # Points on the opposite side are clamped to the perimeter
+        points = transform_arrays(transformation, [0.0, 1.0, -2.5], [-np.pi/2, -0.5, -1.2])
+        for point in points:
+            radius = np.linalg.norm(point - np.array((100, 50)))
+            self.assertAlmostEqual(50, radius)
+
+if __name__ == "__main__":
+    unittest.main()
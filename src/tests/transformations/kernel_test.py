@@ -0,0 +1,84 @@
+import unittest
+from cartography.basis_function import get_clamp
+from cartography.projection_types import Pole
+from cartography.transformations.generic_transformation import get_linear_transform, get_translation
+from cartography.transformations.inverse_map_transformation import get_inverse_equirectangular_projection
+from cartography.transformations.kernel import AffineTransformation, ClampTransformation, TransformationPipeline, compile_kernel, is_separable
+from cartography.transformations.map_transformation import *
+from tests.test_2D import Test2D
+import numpy as np
+
+class CompileKernelTest(Test2D):
+    def setUp(self) -> None:
+        x_linspace = np.linspace(-10, 410, 43)
+        y_linspace = np.linspace(-10, 210, 23)
+        x_values, y_values = np.meshgrid(x_linspace, y_linspace)
+        self.x_values = x_values.ravel()
+        self.y_values = y_values.ravel()
+
+    def assertKernelMatchesChain(self, transformations):
+        kernel = compile_kernel(transformations)
+        x_kernel, y_kernel = kernel(self.x_values, self.y_values)
+        for i in range(len(self.x_values)):
+            x, y = self.x_values[i], self.y_values[i]
+            for transformation in transformations:
+                x, y = transformation(x, y)
+            self.assertPointEqual((x, y), (x_kernel[i], y_kernel[i]), 9)
+        return kernel
+
+    def test_affine_folding(self):
+        first = get_linear_transform(((0, 0), (400, 200)), ((-1, 2), (1, 3)))
+        second = get_translation(0.5, -0.25)
+        third = get_linear_transform(((-1, 2), (1, 3)), ((10, 10), (-10, -10)))
+        kernel = self.assertKernelMatchesChain([first, second, third])
+        self.assertEqual(1, len(kernel.transformations))
+        self.assertIsInstance(kernel.transformations[0], AffineTransformation)
+
+    def test_clamp_folding(self):
+        inverse = get_inverse_equirectangular_projection(400, 200)
+        clamp_a = get_clamp(((-3, -1), (3, 1)))
+        shift = get_translation(-0.5, 0.0)
+        clamp_b = get_clamp(((-2, -1.5), (2, 0.5)))
+        kernel = self.assertKernelMatchesChain([inverse, clamp_a, shift, clamp_b])
+        self.assertEqual(2, len(kernel.transformations))
+        self.assertIsInstance(kernel.transformations[0], AffineTransformation)
+        self.assertIsInstance(kernel.transformations[1], ClampTransformation)
+
+    def test_disjoint_clamps(self):
+        clamp_a = get_clamp(((0, 0), (1, 1)))
+        clamp_b = get_clamp(((2, -1), (3, 0.5)))
+        kernel = self.assertKernelMatchesChain([clamp_a, clamp_b])
+        self.assertEqual(((2, 0), (2, 0.5)), kernel.transformations[0].bound)
+
+    def test_projections(self):
+        inverse = get_inverse_equirectangular_projection(400, 200)
+        clamp = get_clamp(((-np.pi, -np.pi/2), (np.pi, np.pi/2)))
+        projections = [
+            get_mercator_projection(400, 200, 0.3, 1.2),
+            get_cylindrical_equal_area_projection(400, 200, 0.2, 0.5),
+            get_robinson_projection(400, 200, 0.0),
+            get_orthographic_projection(400, 200, (0.3, 0.4)),
+            get_stereographic_projection(400, 200, 0.2, Pole.SOUTHPOLE),
+            get_equidistant_conic_projection(400, 200, 0.0, 0.0, 0.5, -0.5),
+        ]
+        for projection in projections:
+            self.assertKernelMatchesChain([inverse, clamp, projection])
+
+    def test_mercator_stages(self):
+        inverse = get_inverse_equirectangular_projection(400, 200)
+        clamp = get_clamp(((-np.pi, -np.pi/2), (np.pi, np.pi/2)))
+        kernel = compile_kernel([inverse, clamp, get_mercator_projection(400, 200, 0.3, 1.2)])
+        # inverse & shift, both clamps, mercator, scaler
+        self.assertEqual(4, len(kernel.transformations))
+
+    def test_separable(self):
+        inverse = get_inverse_equirectangular_projection(400, 200)
+        clamp = get_clamp(((-np.pi, -np.pi/2), (np.pi, np.pi/2)))
+        self.assertTrue(is_separable(compile_kernel([inverse, clamp, get_mercator_projection(400, 200, 0.3, 1.2)])))
+        self.assertTrue(is_separable(compile_kernel([inverse, clamp, get_cylindrical_equal_area_projection(400, 200, 0.3, 0.5)])))
+        self.assertFalse(is_separable(compile_kernel([inverse, clamp, get_robinson_projection(400, 200, 0.3)])))
+        rotation = AffineTransformation(((0.0, 1.0), (1.0, 0.0)), (0.0, 0.0))
+        self.assertFalse(is_separable(compile_kernel([inverse, rotation])))
+
+if __name__ == "__main__":
+    unittest.main()
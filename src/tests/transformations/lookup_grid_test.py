@@ -0,0 +1,46 @@
+import unittest
+from cartography.transformations.lookup_grid import get_lookup_grid_transformation
+from cartography.transformations.map_transformation import *
+from tests.test_2D import Test2D
+import numpy as np
+
+class LookupGridTest(Test2D):
+    def setUp(self) -> None:
+        self.bound = ((-np.pi, -np.pi/2), (np.pi, np.pi/2))
+        random = np.random.default_rng(3)
+        self.longitudes = random.uniform(-np.pi, np.pi, 2000)
+        self.latitudes = random.uniform(-np.pi/2, np.pi/2, 2000)
+
+    def assertGridWithinError(self, transformation: Transformation, maximal_error: float):
+        grid = get_lookup_grid_transformation(transformation, self.bound, maximal_error)
+        self.assertLessEqual(grid.maximal_error, maximal_error)
+        x_exact, y_exact = transformation(self.longitudes, self.latitudes)
+        x_grid, y_grid = grid(self.longitudes, self.latitudes)
+        errors = np.hypot(x_exact - x_grid, y_exact - y_grid)
+        # The error is measured at the cell centers, other positions may be slightly worse
+        self.assertLess(np.max(errors), 2 * maximal_error)
+        return grid
+
+    def test_smooth_projection(self):
+        grid = self.assertGridWithinError(get_robinson_projection(400, 200, 0.0), 0.01)
+        self.assertFalse(np.any(grid.exact))
+
+    def test_local_refinement(self):
+        grid = self.assertGridWithinError(get_mollweide_projection(400, 200, 0.0, 0.0001), 0.01)
+        # Only the tiles close to the poles need the finest grid
+        self.assertGreater(np.max(grid.leaf_levels), 0)
+        self.assertGreater(np.count_nonzero(grid.leaf_levels == 0), 0)
+
+    def test_discontinuity(self):
+        grid = self.assertGridWithinError(get_peirce_quincuncial_projection(400, 200, 0.0), 0.01)
+        # The tiles along the cuts of the projection are evaluated exactly
+        self.assertTrue(np.any(grid.exact))
+
+    def test_scalar(self):
+        transformation = get_robinson_projection(400, 200, 0.0)
+        grid = get_lookup_grid_transformation(transformation, self.bound, 0.01)
+        self.assertPointEqual(transformation(0.3, -0.2), grid(0.3, -0.2), 1)
+        self.assertPointEqual(transformation(np.pi, np.pi/2), grid(np.pi, np.pi/2), 1)
+
+if __name__ == "__main__":
+    unittest.main()
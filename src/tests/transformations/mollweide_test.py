@@ -1,5 +1,5 @@
 import unittest
-from cartography.transformations.map_transformation import get_mollweide_projection
+from cartography.transformations.map_transformation import get_mollweide_projection, MOLLWEIDE_CACHE_SIZE
 from tests.transformations.transformation_field import TransformationField
 from tests.transformations.map_transform_test import MapTransformTest
 import numpy as np
@@ -27,5 +27,41 @@ class MollweideTest(MapTransformTest):
                     _, y_prev = field.points[i-1][j]
                     self.assertAlmostEqual(y_prev, y)
 
+    def test_precision(self):
+        latitudes = np.linspace(-np.pi/2, np.pi/2, 1001)
+        longitudes = np.full(len(latitudes), 2.0)
+        x, y = get_mollweide_projection(200, 100, 0.0, 0.0001)(longitudes, latitudes)
+        x_exact, y_exact = get_mollweide_projection(200, 100, 0.0, 1e-12)(longitudes, latitudes)
+        self.assertLess(np.max(np.hypot(x - x_exact, y - y_exact)), 0.01)
+
+    def test_cache(self):
+        transformation = get_mollweide_projection(200, 100, 0.0, 0.001)
+        latitudes = np.repeat(np.linspace(-1.5, 1.5, 50), 10)
+        longitudes = np.tile(np.linspace(-3, 3, 10), 50)
+        first = transformation(longitudes, latitudes)
+        self.assertEqual(50, transformation.diagnostics["solved_latitudes"])
+        second = transformation(longitudes, latitudes)
+        self.assertEqual(50, transformation.diagnostics["solved_latitudes"])
+        self.assertEqual(50, transformation.diagnostics["cached_latitudes"])
+        np.testing.assert_array_equal(first, second)
+        self.assertPointEqual(transformation(longitudes[13], latitudes[13]), (first[0][13], first[1][13]), 10)
+
+        # The cache is bounded, forgotten latitudes are solved again
+        transformation(np.zeros(2 * MOLLWEIDE_CACHE_SIZE), np.linspace(-1.0, 1.0, 2 * MOLLWEIDE_CACHE_SIZE))
+        transformation(longitudes, latitudes)
+        self.assertEqual(50 + 2 * MOLLWEIDE_CACHE_SIZE + 50, transformation.diagnostics["solved_latitudes"])
+
+    def test_least_recently_used(self):
+        transformation = get_mollweide_projection(200, 100, 0.0, 0.001)
+        frequent = np.linspace(-1.5, 1.5, 50)
+        transformation(np.zeros(50), frequent)
+        # The frequently used latitudes stay cached while the cache is filled with others
+        for start in range(4):
+            others = np.linspace(-1.0, 1.0, MOLLWEIDE_CACHE_SIZE // 2) + start * 1e-3
+            transformation(np.zeros(len(others)), others)
+            transformation(np.zeros(50), frequent)
+        self.assertEqual(50 + 2 * MOLLWEIDE_CACHE_SIZE, transformation.diagnostics["solved_latitudes"])
+        self.assertEqual(4 * 50, transformation.diagnostics["cached_latitudes"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,10 +1,40 @@
 import unittest
 from cartography.projection_types import Point
 from cartography.transformations.map_transformation import get_peirce_quincuncial_projection
+from cartography.transformations.peirce_quincuncial import _ellRF, peirce_quincuncial_arrays
+import numpy as np
 from tests.transformations.transformation_field import TransformationField
 from tests.transformations.map_transform_test import MapTransformTest
 
 class PeirceQuincuncialTest(MapTransformTest):
+    def test_carlson_batch(self):
+        x_values = np.array([0.0, 0.3, 1.0, 0.5, -1.0])
+        y_values = np.array([1.0, 0.9, 0.5, 0.5, 1.0])
+        rf_values, invalid_count = _ellRF(x_values, y_values, np.ones(5))
+        self.assertEqual(1, invalid_count)
+        self.assertTrue(np.isnan(rf_values[4]))
+        for i in range(4):
+            rf, count = _ellRF(x_values[i], y_values[i], 1.0)
+            self.assertEqual(0, count)
+            self.assertEqual(rf, rf_values[i])
+        # RF(0,1,1) = pi/2
+        self.assertAlmostEqual(np.pi/2, rf_values[0], 4)
+
+    def test_southern_reflections(self):
+        longitudes = np.linspace(-np.pi, np.pi, 41)
+        latitudes = np.full(41, -0.6)
+        x_values, y_values, invalid_count = peirce_quincuncial_arrays(longitudes, latitudes, 0.2)
+        self.assertEqual(0, invalid_count)
+        for longitude, x, y in zip(longitudes, x_values, y_values):
+            self.assertEqual((x, y), peirce_quincuncial_arrays(longitude, -0.6, 0.2)[:2])
+
+    def test_diagnostics(self):
+        transformation = get_peirce_quincuncial_projection(200, 100, 0.0)
+        transformation(np.linspace(-3, 3, 20), np.linspace(-1.5, 1.5, 20))
+        self.assertEqual(0, transformation.diagnostics["invalid_elliptic_arguments"])
+        transformation(np.array([0.1, np.nan]), np.array([0.2, 0.3]))
+        self.assertEqual(2, transformation.diagnostics["invalid_elliptic_arguments"])
+
     def test_bounds(self):
         transformation = get_peirce_quincuncial_projection(200, 100, 0.0)
         x_resolution = 25
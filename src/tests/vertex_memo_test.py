@@ -0,0 +1,71 @@
+import unittest
+from inkex.paths import Path
+from cartography.instrumentation import Instrumentation
+from cartography.projection_builder import ProjectionBuilder
+from cartography.vertex_memo import VertexMemo
+from tests.test_2D import Test2D
+import numpy as np
+
+class VertexMemoTest(Test2D):
+    def test_lookup(self):
+        memo = VertexMemo()
+        x = np.array([1.0, 2.0, 2.0, -0.0])
+        y = np.array([3.0, 3.0, 1.0, 5.0])
+        found, _, _ = memo.lookup(x, y)
+        self.assertFalse(np.any(found))
+        memo.store(x, y, x * 10, y * 10)
+        self.assertEqual(4, len(memo))
+
+        found, projected_x, projected_y = memo.lookup(np.array([2.0, 1.0, 3.0, 0.0]), np.array([1.0, 3.0, 1.0, 5.0]))
+        # The input points are compared exactly, 0.0 and -0.0 are the same point
+        self.assertEqual([True, True, False, True], found.tolist())
+        self.assertEqual([20.0, 10.0, 0.0], projected_x[found].tolist())
+        self.assertEqual([10.0, 30.0, 50.0], projected_y[found].tolist())
+        self.assertEqual(3, memo.hits)
+        self.assertEqual(5, memo.misses)
+
+    def test_eviction(self):
+        memo = VertexMemo(maximal_size=100)
+        for i in range(10):
+            x = np.arange(30, dtype=float) + 100 * i
+            memo.store(x, x, x, -x)
+        self.assertLessEqual(len(memo), 100)
+        # The newest points are kept and the memo stays sorted
+        found, _, projected_y = memo.lookup(x, x)
+        self.assertTrue(np.all(found))
+        self.assertEqual((-x).tolist(), projected_y.tolist())
+        self.assertTrue(np.all(np.diff(memo.keys.real) > 0))
+        found, _, _ = memo.lookup(np.array([0.0]), np.array([0.0]))
+        self.assertFalse(found[0])
+
+    def test_projection(self):
+        # Neighbouring segments and both paths share their vertices
+        paths = [Path("M 100 50 L 200 50 L 200 150 Z"), Path("M 200 50 L 200 150 L 300 150 Z")]
+        instrumentation = Instrumentation()
+        projection = ProjectionBuilder()\
+            .with_instrumentation(instrumentation)\
+            .from_equirectangular(400, 200)\
+            .to_robinson(400, 200, 0.0)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        memoized = projection.transform_paths(paths, ["a", "b"])
+        self.assertGreater(instrumentation.counters["vertex_memo_hits"], 0)
+        self.assertEqual(4, len(projection.vertex_memo))
+
+        projection.vertex_memo = VertexMemo(maximal_size=0)
+        self.assertEqual([str(Path(path)) for path in memoized], [str(Path(path)) for path in projection.transform_paths(paths, ["a", "b"])])
+
+    def test_inexact_line_end(self):
+        # The line ends at a vertex that interpolation does not hit exactly
+        paths = [Path("M 78.7 20 L 234.1 80"), Path("M 234.1 80 L 300 150")]
+        projection = ProjectionBuilder()\
+            .from_equirectangular(400, 200)\
+            .to_robinson(400, 200, 0.0)\
+            .with_equidistant_approximator(0.1, 35, 1, 0.0, 4)\
+            .build()
+        first, second = projection.transform_paths(paths, ["a", "b"])
+        self.assertEqual(3, len(projection.vertex_memo))
+        self.assertEqual((first[-1].x, first[-1].y), (second[0].x, second[0].y))
+
+if __name__ == "__main__":
+    unittest.main()